@@ -16,6 +16,14 @@ from typing import List, Dict, Any, Optional
 # Configure logger
 logger = logging.getLogger(__name__)
 
+try:
+    from local_s3vectors import create_s3vectors_client
+except ImportError:
+    # AgentCore bundles only agents/; the offline stand-in (pipeline/setup/local_s3vectors.py)
+    # is available when it is on PYTHONPATH
+    def create_s3vectors_client(**kwargs):
+        return boto3.client('s3vectors', **kwargs)
+
 # Helper functions for camera-specific ID processing (self-contained)
 def extract_scene_from_id(camera_id: str) -> str:
     """
@@ -68,9 +76,9 @@ class S3VectorsClient:
     - behavioral-insights: Legacy Titan 1024-dim embeddings (backward compatibility)
     """
 
-    def __init__(self):
-        # Lazy initialization - create boto3 client only when needed
-        self._client = None
+    def __init__(self, client=None):
+        # Lazy initialization - create boto3 client only when needed (or use an injected one)
+        self._client = client
         self.bucket = os.getenv('VECTOR_BUCKET_NAME', '')
 
         # Multi-Index Architecture Support
@@ -92,8 +100,8 @@ class S3VectorsClient:
     def client(self):
         """Lazy boto3 client creation only when first accessed"""
         if self._client is None:
-            logger.info("Creating boto3 s3vectors client on first use")
-            self._client = boto3.client('s3vectors')
+            logger.info("Creating s3vectors client on first use")
+            self._client = create_s3vectors_client()
         return self._client
 
     async def query_fleet_statistics(self, scene_embeddings: List[float],
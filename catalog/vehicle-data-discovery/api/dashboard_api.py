@@ -11,6 +11,7 @@ from mangum import Mangum
 
 from dependencies import init_aws_clients, rate_limiter
 from services.cache_service import S3BackedMetricsCache
+from services.vector_index import vector_index_mirror
 from auth import require_auth
 from routes import (
     health_router,
@@ -44,6 +45,10 @@ async def lifespan(app: FastAPI):
     # Load cached metrics from S3
     logger.info("Loading cached DTO metrics from S3...")
     metrics_cache.load_from_s3_on_startup()
+
+    # In-memory vector index mirror (loads Phase 4-5 outputs in the background)
+    logger.info("Starting vector index mirror...")
+    vector_index_mirror.start()
     
     logger.info("Listening on port 8000")
     logger.info("=" * 50)
@@ -51,6 +56,7 @@ async def lifespan(app: FastAPI):
     yield  # Application runs here
     
     logger.info("Shutting down...")
+    vector_index_mirror.stop()
 
 
 # Create the API app
@@ -10,6 +10,14 @@ from botocore.exceptions import UnknownServiceError
 
 logger = logging.getLogger(__name__)
 
+try:
+    from local_s3vectors import create_s3vectors_client
+except ImportError:
+    # Outside the webapp image the offline stand-in (pipeline/setup/local_s3vectors.py)
+    # is available only when it is on PYTHONPATH
+    def create_s3vectors_client(**kwargs):
+        return boto3.client('s3vectors', **kwargs)
+
 # Configuration from environment
 BUCKET = os.getenv("S3_BUCKET", "")
 VECTOR_BUCKET = os.getenv("VECTOR_BUCKET_NAME", "")
@@ -96,7 +104,7 @@ def _init_aws_clients():
         logger.info("Bedrock client initialized")
 
         try:
-            clients['s3vectors'] = boto3.client('s3vectors', region_name=AWS_REGION)
+            clients['s3vectors'] = create_s3vectors_client(region_name=AWS_REGION)
             clients['s3vectors_available'] = True
             logger.info("S3 Vectors client initialized")
         except (UnknownServiceError, Exception) as e:
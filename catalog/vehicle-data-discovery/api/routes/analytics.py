@@ -5,8 +5,9 @@ from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from fastapi import APIRouter
 
-from dependencies import s3, s3vectors, s3vectors_available, BUCKET, VECTOR_BUCKET, INDICES_CONFIG
+from dependencies import s3, s3vectors_available, BUCKET, VECTOR_BUCKET, INDICES_CONFIG
 from services.embedding_service import generate_embedding
+from services.vector_index import vector_index_mirror
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/analytics", tags=["analytics"])
@@ -60,7 +61,7 @@ def analyze_uniqueness_within_category(concept_description: str, similarity_thre
         if not query_vector:
             return {"unique_scenes": [], "uniqueness_score": 0.0, "error": "Failed to generate embedding"}
 
-        results = s3vectors.query_vectors(
+        results = vector_index_mirror.query_vectors(
             vectorBucketName=VECTOR_BUCKET,
             indexName=INDICES_CONFIG[DEFAULT_ANALYTICS_ENGINE]["name"],
             queryVector={"float32": query_vector},
@@ -135,7 +136,7 @@ def get_semantic_coverage_count(concept_description: str, similarity_threshold:
         if not vector:
             logger.warning(f"Failed to generate embedding for: {concept_description}")
             return 0
-        results = s3vectors.query_vectors(
+        results = vector_index_mirror.query_vectors(
             vectorBucketName=VECTOR_BUCKET,
             indexName=INDICES_CONFIG[DEFAULT_ANALYTICS_ENGINE]["name"],
             queryVector={"float32": vector},
@@ -163,7 +164,7 @@ def debug_coverage():
         if not vector:
             return {"error": "Failed to generate embedding", "vector_length": 0}
         
-        results = s3vectors.query_vectors(
+        results = vector_index_mirror.query_vectors(
             vectorBucketName=VECTOR_BUCKET,
             indexName=INDICES_CONFIG[DEFAULT_ANALYTICS_ENGINE]["name"],
             queryVector={"float32": vector},
@@ -677,7 +678,7 @@ def get_coverage_matrix():
                 query = f"autonomous vehicle driving scenario: {cat['description']}"
                 vector = generate_embedding(query, DEFAULT_ANALYTICS_ENGINE)
                 if vector:
-                    results = s3vectors.query_vectors(
+                    results = vector_index_mirror.query_vectors(
                         vectorBucketName=VECTOR_BUCKET,
                         indexName=INDICES_CONFIG[DEFAULT_ANALYTICS_ENGINE]["name"],
                         queryVector={"float32": vector},
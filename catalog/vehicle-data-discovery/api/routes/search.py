@@ -4,10 +4,11 @@ import logging
 from typing import List
 from fastapi import APIRouter
 
-from dependencies import s3, s3vectors, BUCKET, VECTOR_BUCKET, INDICES_CONFIG
+from dependencies import s3, BUCKET, VECTOR_BUCKET, INDICES_CONFIG
 from models.requests import SearchRequest
 from utils.camera_utils import extract_scene_from_id, extract_camera_from_id
 from services.embedding_service import generate_embedding, get_scene_behavioral_text
+from services.vector_index import vector_index_mirror
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["search"])
@@ -65,7 +66,7 @@ def twin_engine_search(request: SearchRequest):
         beh_vector = generate_embedding(query_text, "behavioral")
         if beh_vector:
             try:
-                beh_results = s3vectors.query_vectors(
+                beh_results = vector_index_mirror.query_vectors(
                     vectorBucketName=VECTOR_BUCKET,
                     indexName=INDICES_CONFIG["behavioral"]["name"],
                     queryVector={"float32": beh_vector},
@@ -99,7 +100,7 @@ def twin_engine_search(request: SearchRequest):
 
     if vis_vector:
         try:
-            vis_results = s3vectors.query_vectors(
+            vis_results = vector_index_mirror.query_vectors(
                 vectorBucketName=VECTOR_BUCKET,
                 indexName=INDICES_CONFIG["visual"]["name"],
                 queryVector={"float32": vis_vector},
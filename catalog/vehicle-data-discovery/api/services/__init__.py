@@ -9,10 +9,12 @@ from .scene_service import (
     format_tags_for_ui,
     apply_metadata_filter
 )
+from .embedding_cache import EmbeddingCache, embedding_cache
 from .embedding_service import (
     get_scene_behavioral_text,
     generate_embedding
 )
+from .vector_index import FlatCosineIndex, VectorIndexMirror, vector_index_mirror
 
 __all__ = [
     "S3BackedMetricsCache",
@@ -23,6 +25,11 @@ __all__ = [
     "format_hil_priority",
     "format_tags_for_ui",
     "apply_metadata_filter",
+    "EmbeddingCache",
+    "embedding_cache",
     "get_scene_behavioral_text",
     "generate_embedding",
+    "FlatCosineIndex",
+    "VectorIndexMirror",
+    "vector_index_mirror",
 ]
@@ -0,0 +1,165 @@
+"""
+Persistent text-embedding cache: local SQLite tier plus optional S3 tier.
+
+Shared by the dashboard API and Phase 4-5 (Dockerfile.arm64 copies this file next to
+s3_vectors_behavioral_embeddings.py), so both use the same keys, storage and S3 layout.
+The S3 tier stays off the critical path: lookups for a batch run concurrently and are
+bounded by EMBEDDING_CACHE_S3_READ_TIMEOUT_SEC, and writes run in the background.
+"""
+import os
+import re
+import hashlib
+import logging
+import sqlite3
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Optional
+
+import numpy as np
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_embedding_text(text: str) -> str:
+    """Unicode NFC with surrounding and repeated whitespace collapsed (case is preserved)."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def embedding_cache_key(model_id: str, input_type: str, text: str) -> str:
+    """Content address of an embedding: SHA-256 over (model id, input type, normalized text)."""
+    payload = "\n".join([model_id, input_type, normalize_embedding_text(text)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache in front of Bedrock/SageMaker.
+
+    Local tier: SQLite file (EMBEDDING_CACHE_PATH) holding float32 vectors.
+    S3 tier (optional): EMBEDDING_CACHE_S3_BUCKET / EMBEDDING_CACHE_S3_PREFIX, one
+    float32 object per key; hits are copied into the local tier. Lookups still in
+    flight when the read timeout passes count as misses (and still fill the local
+    tier when they finish).
+    """
+
+    def __init__(self, path: str = None, s3_bucket: str = None, s3_prefix: str = None, s3_client=None):
+        self.path = path or os.getenv("EMBEDDING_CACHE_PATH", "/tmp/embedding_cache.sqlite")
+        self.s3_bucket = s3_bucket if s3_bucket is not None else os.getenv("EMBEDDING_CACHE_S3_BUCKET", "")
+        self.s3_prefix = s3_prefix or os.getenv("EMBEDDING_CACHE_S3_PREFIX", "embedding-cache")
+        self.s3_read_timeout = float(os.getenv("EMBEDDING_CACHE_S3_READ_TIMEOUT_SEC", "0.5"))
+        self.enabled = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+        self.lock = threading.Lock()
+        self._conn = None
+        self._s3_client = s3_client
+        # Sized to the S3 client's default connection pool (10); joined at interpreter exit,
+        # so queued writes still land
+        self._s3_pool = ThreadPoolExecutor(max_workers=int(os.getenv("EMBEDDING_CACHE_S3_CONCURRENCY", "10")))
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        return self._conn
+
+    def _s3(self):
+        if not self.s3_bucket:
+            return None
+        with self.lock:
+            if self._s3_client is None:
+                import boto3
+                self._s3_client = boto3.client("s3")
+        return self._s3_client
+
+    def get(self, model_id: str, input_type: str, text: str) -> Optional[List[float]]:
+        """Cached vector, or None on a miss (or if the cache is disabled/unavailable)."""
+        return self.get_many([embedding_cache_key(model_id, input_type, text)])[0]
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        """Cached vectors by key (None per miss): local tier first, then all S3 lookups concurrently."""
+        vectors = [None] * len(keys)
+        if not self.enabled:
+            return vectors
+
+        try:
+            with self.lock:
+                conn = self._connection()
+                for i, key in enumerate(keys):
+                    row = conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+                    if row:
+                        vectors[i] = np.frombuffer(row[0], dtype=np.float32).tolist()
+        except Exception as e:
+            logger.warning(f"Embedding cache read failed: {e}")
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        s3 = self._s3() if missing else None
+        if s3 is None:
+            return vectors
+
+        lookups = {self._s3_pool.submit(self._get_s3, s3, keys[i]): i for i in missing}
+        done, not_done = wait(lookups, timeout=self.s3_read_timeout)
+        for future in done:
+            vectors[lookups[future]] = future.result()
+        if not_done:
+            logger.info(f"Embedding cache: {len(not_done)} S3 lookups still pending after {self.s3_read_timeout}s, treated as misses")
+        return vectors
+
+    def put(self, model_id: str, input_type: str, text: str, vector: List[float]):
+        """Store a vector in the local tier and, when configured, queue it for the S3 tier."""
+        self.put_key(embedding_cache_key(model_id, input_type, text), vector)
+
+    def put_key(self, key: str, vector: List[float]):
+        """Store a vector under a precomputed key (best effort; the S3 write runs in the background)."""
+        if not self.enabled or not vector:
+            return
+        blob = np.asarray(vector, dtype=np.float32).tobytes()
+
+        try:
+            self._put_local(key, blob)
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+        s3 = self._s3()
+        if s3 is not None:
+            self._s3_pool.submit(self._put_s3, s3, key, blob)
+
+    def _s3_key(self, key: str) -> str:
+        return f"{self.s3_prefix}/{key}.f32"
+
+    def _get_s3(self, s3, key: str) -> Optional[List[float]]:
+        """S3-tier lookup (copied into the local tier on hit); None on miss or error."""
+        try:
+            blob = s3.get_object(Bucket=self.s3_bucket, Key=self._s3_key(key))["Body"].read()
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in ("NoSuchKey", "404"):
+                logger.warning(f"Embedding cache S3 read failed: {e}")
+            return None
+        except Exception as e:
+            logger.warning(f"Embedding cache S3 read failed: {e}")
+            return None
+
+        try:
+            self._put_local(key, blob)
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+        return np.frombuffer(blob, dtype=np.float32).tolist()
+
+    def _put_s3(self, s3, key: str, blob: bytes):
+        try:
+            s3.put_object(Bucket=self.s3_bucket, Key=self._s3_key(key), Body=blob,
+                          ContentType="application/octet-stream")
+        except Exception as e:
+            logger.warning(f"Embedding cache S3 write failed: {e}")
+
+    def _put_local(self, key: str, blob: bytes):
+        with self.lock:
+            conn = self._connection()
+            conn.execute("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", (key, blob))
+            conn.commit()
+
+
+# Shared instance used by generate_embedding
+embedding_cache = EmbeddingCache()
@@ -4,6 +4,8 @@ import logging
 import boto3
 from typing import List
 
+from .embedding_cache import embedding_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -43,13 +45,28 @@ def get_scene_behavioral_text(scene_id: str) -> str:
 
 
 def generate_embedding(text: str, engine_type: str) -> List[float]:
-    """Generate embedding vector using the correct engine."""
-    from dependencies import INDICES_CONFIG, AWS_REGION
+    """Generate embedding vector using the correct engine (served from the embedding cache when possible)."""
+    from dependencies import INDICES_CONFIG
 
     config = INDICES_CONFIG.get(engine_type)
     if not config:
         return []
 
+    input_type = "search_query" if config["source"] == "bedrock" else "text"
+    cached = embedding_cache.get(config["embedding_model"], input_type, text)
+    if cached is not None:
+        return cached
+
+    vector = _invoke_embedding_model(text, config, engine_type)
+    if vector:
+        embedding_cache.put(config["embedding_model"], input_type, text, vector)
+    return vector
+
+
+def _invoke_embedding_model(text: str, config: dict, engine_type: str) -> List[float]:
+    """Call Bedrock or SageMaker for one query embedding."""
+    from dependencies import AWS_REGION
+
     try:
         if config["source"] == "bedrock":
             bedrock = boto3.client('bedrock-runtime', region_name=AWS_REGION)
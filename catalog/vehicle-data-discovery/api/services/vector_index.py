@@ -0,0 +1,296 @@
+"""In-process mirror of the S3 Vectors indices for low-latency dashboard queries."""
+import os
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+try:
+    # Same index storage and filter semantics as the offline stand-in, so the two cannot diverge
+    from local_s3vectors import LocalVectorIndex, matches_filter
+except ImportError:
+    # Outside the webapp image pipeline/setup/local_s3vectors.py must be on PYTHONPATH;
+    # without it the mirror stays off and every query goes to S3 Vectors
+    LocalVectorIndex = matches_filter = None
+
+PHASE45_PREFIX = "processed/phase4-5/"
+PHASE45_OUTPUT = "embeddings_output.json"
+
+# Phase 4-5 output sections and the index their records were written to
+ENGINE_SECTIONS = {"cohere": "behavioral", "cosmos": "visual"}
+
+# Same limits S3 Vectors enforces on topK (requests outside them are rejected)
+MIN_TOP_K = 1
+MAX_TOP_K = 100
+
+# Distinct metadata filters whose row masks are kept between index changes
+MAX_CACHED_FILTERS = 256
+
+
+class FlatCosineIndex:
+    """
+    Exact cosine k-NN over the stand-in's index storage (local_s3vectors.LocalVectorIndex).
+
+    A query is one BLAS mat-vec plus argpartition; metadata filters are evaluated with the
+    stand-in's matches_filter and become a row mask that is cached until the index next changes.
+    """
+
+    def __init__(self, name: str, dimensions: int):
+        self.name = name
+        self.dimensions = dimensions
+        self.index = LocalVectorIndex(name, dimensions)
+        self.filter_masks: Dict[str, np.ndarray] = {}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.index.count
+
+    def upsert(self, key: str, vector: List[float], metadata: dict) -> bool:
+        vector = np.asarray(vector, dtype=np.float32)
+        if vector.shape != (self.dimensions,):
+            logger.warning(f"Skipping {key} for {self.name}: {vector.size} dims, expected {self.dimensions}")
+            return False
+
+        with self.lock:
+            self.index.put(key, vector, metadata)
+            self.filter_masks.clear()
+        return True
+
+    def remove(self, key: str):
+        with self.lock:
+            self.index.delete(key)
+            self.filter_masks.clear()
+
+    def _filter_mask(self, metadata_filter: dict) -> np.ndarray:
+        cache_key = json.dumps(metadata_filter, sort_keys=True)
+        mask = self.filter_masks.get(cache_key)
+        if mask is None:
+            mask = np.fromiter((matches_filter(m, metadata_filter) for m in self.index.metadata),
+                               dtype=bool, count=self.index.count)
+            if len(self.filter_masks) >= MAX_CACHED_FILTERS:
+                self.filter_masks.clear()
+            self.filter_masks[cache_key] = mask
+        return mask
+
+    def query(self, vector: List[float], top_k: int, metadata_filter: dict = None,
+              return_metadata: bool = False, return_distance: bool = False) -> List[dict]:
+        """Nearest rows as S3 Vectors-shaped results (distance = 1 - cosine similarity)"""
+        if not MIN_TOP_K <= top_k <= MAX_TOP_K:
+            raise ValueError(f"topK must be between {MIN_TOP_K} and {MAX_TOP_K}")
+        query = np.asarray(vector, dtype=np.float32)
+        if query.shape != (self.dimensions,):
+            raise ValueError(f"Query vector has {query.size} dims, {self.name} expects {self.dimensions}")
+
+        with self.lock:
+            distances = self.index.distances(query)
+            if metadata_filter:
+                candidates = np.flatnonzero(self._filter_mask(metadata_filter))
+            else:
+                candidates = np.arange(self.index.count)
+
+            if candidates.size > top_k:
+                candidates = candidates[np.argpartition(distances[candidates], top_k - 1)[:top_k]]
+            nearest = candidates[np.argsort(distances[candidates], kind="stable")]
+
+            results = []
+            for row in nearest:
+                result = {"key": self.index.keys[row]}
+                if return_metadata:
+                    result["metadata"] = dict(self.index.metadata[row])
+                if return_distance:
+                    result["distance"] = float(distances[row])
+                results.append(result)
+            return results
+
+
+class VectorIndexMirror:
+    """
+    Read-only, in-memory copy of every index in INDICES_CONFIG.
+
+    Built at startup from the Phase 4-5 outputs (processed/phase4-5/{scene}/embeddings_output.json,
+    whose s3_records are what was written to S3 Vectors) and refreshed in the background by
+    re-listing that prefix and loading only new or changed outputs. Records are only mirrored for
+    indices the output reports as fully written (index_results status "success"), so the mirror
+    never holds a vector S3 Vectors lacks. S3 Vectors stays the source of truth: until the mirror
+    has loaded, while any scene is not fully written to an index (S3 Vectors may still hold some
+    or all of its vectors), or if a local query fails, query_vectors goes to S3 Vectors.
+    """
+
+    def __init__(self):
+        from dependencies import INDICES_CONFIG
+        self.enabled = os.getenv("VECTOR_MIRROR_ENABLED", "true").lower() == "true"
+        if self.enabled and LocalVectorIndex is None:
+            logger.warning("local_s3vectors not importable - vector index mirror disabled")
+            self.enabled = False
+        self.refresh_interval = int(os.getenv("VECTOR_MIRROR_REFRESH_SEC", "60"))
+        self.load_workers = int(os.getenv("VECTOR_MIRROR_LOAD_WORKERS", "16"))
+        self.indices = {config["name"]: FlatCosineIndex(config["name"], config["dimensions"])
+                        for config in INDICES_CONFIG.values()} if self.enabled else {}
+        self.engine_indices = {engine: config["name"] for engine, config in INDICES_CONFIG.items()}
+        self.output_etags: Dict[str, str] = {}    # Phase 4-5 output key -> ETag last loaded
+        self.scene_keys: Dict[str, Dict[str, set]] = {}  # scene -> index name -> vector keys
+        self.incomplete_scenes: Dict[str, List[str]] = {}  # scene -> indices not fully written
+        self.incomplete_indices: set = set()  # indices queried on S3 Vectors until their scenes complete
+        self.ready = False
+        self.last_refresh = None
+        self.refresh_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Initial load plus periodic refresh, on a daemon thread so startup is not blocked"""
+        if not self.enabled or self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self._refresh_loop, name="vector-index-mirror", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _refresh_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Vector index mirror refresh failed: {e}")
+            self.stop_event.wait(self.refresh_interval)
+
+    def refresh(self) -> int:
+        """Load Phase 4-5 outputs that are new or changed since the last pass; returns the count loaded"""
+        from dependencies import s3, BUCKET
+        if s3 is None:
+            logger.warning("S3 client not initialized - vector index mirror not loaded")
+            return 0
+
+        with self.refresh_lock:
+            bucket = BUCKET.replace("behavioral-vectors", "fleet-discovery-studio")
+            listed = {}
+            for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=PHASE45_PREFIX):
+                for obj in page.get("Contents", []):
+                    if obj["Key"].endswith(f"/{PHASE45_OUTPUT}"):
+                        listed[obj["Key"]] = obj["ETag"]
+
+            changed = [key for key, etag in listed.items() if self.output_etags.get(key) != etag]
+            for key in set(self.output_etags) - set(listed):
+                self._remove_scene(key.split("/")[-2])
+                del self.output_etags[key]
+
+            if changed:
+                with ThreadPoolExecutor(max_workers=self.load_workers) as executor:
+                    outputs = executor.map(lambda key: self._load_output(s3, bucket, key), changed)
+                    for key, output in zip(changed, outputs):
+                        if output is not None:
+                            self._apply_output(key.split("/")[-2], output)
+                            self.output_etags[key] = listed[key]
+
+            self.ready = True
+            self.last_refresh = datetime.utcnow().isoformat()
+            if changed:
+                logger.info(f"Vector index mirror refreshed: {len(changed)} scene outputs loaded "
+                            f"({', '.join(f'{name}={len(index)}' for name, index in self.indices.items())})")
+            return len(changed)
+
+    def _load_output(self, s3, bucket: str, key: str) -> Optional[dict]:
+        try:
+            return json.loads(s3.get_object(Bucket=bucket, Key=key)["Body"].read())
+        except Exception as e:
+            logger.warning(f"Vector index mirror could not load {key}: {e}")
+            return None
+
+    def _apply_output(self, scene_id: str, output: dict):
+        """Replace a scene's vectors with the records from its latest Phase 4-5 output"""
+        index_results = output.get("s3_vectors_integration", {}).get("index_results", {})
+        loaded = {}
+        skipped = set()
+        for section, engine in ENGINE_SECTIONS.items():
+            section_data = output.get("multi_model_embeddings", {}).get(section, {})
+            for record in section_data.get("s3_records", []):
+                index_name = record.get("target_index") or section_data.get("target_index") or self.engine_indices[engine]
+                index = self.indices.get(index_name)
+                vector = record.get("data", {}).get("float32")
+                if index is None or not vector:
+                    continue
+                if index_results.get(index_name, {}).get("status") != "success":
+                    # Some batches failed (or status unknown): S3 Vectors may not hold this record
+                    skipped.add(index_name)
+                    continue
+                if index.upsert(record["key"], vector, record.get("metadata", {})):
+                    loaded.setdefault(index_name, set()).add(record["key"])
+
+        # Keys a re-processed scene no longer produces
+        for index_name, keys in self.scene_keys.get(scene_id, {}).items():
+            for key in keys - loaded.get(index_name, set()):
+                self.indices[index_name].remove(key)
+        self.scene_keys[scene_id] = loaded
+
+        if skipped:
+            self.incomplete_scenes[scene_id] = sorted(skipped)
+            logger.warning(f"Vector index mirror skipped {scene_id} for {', '.join(sorted(skipped))}: "
+                           f"not fully indexed in S3 Vectors, querying those indices there")
+        else:
+            self.incomplete_scenes.pop(scene_id, None)
+        self._update_incomplete_indices()
+
+    def _remove_scene(self, scene_id: str):
+        self.incomplete_scenes.pop(scene_id, None)
+        self._update_incomplete_indices()
+        for index_name, keys in self.scene_keys.pop(scene_id, {}).items():
+            for key in keys:
+                self.indices[index_name].remove(key)
+
+    def _update_incomplete_indices(self):
+        self.incomplete_indices = {name for names in self.incomplete_scenes.values() for name in names}
+
+    def query_vectors(self, vectorBucketName: str, indexName: str, queryVector: dict, topK: int,
+                      filter: dict = None, returnMetadata: bool = False, returnDistance: bool = False) -> dict:
+        """
+        Drop-in for s3vectors.query_vectors: answered locally once the mirror is loaded and holds
+        every scene of the index, otherwise (or on any local error) by S3 Vectors.
+        """
+        if not MIN_TOP_K <= topK <= MAX_TOP_K:
+            # Same rejection S3 Vectors returns, without the round trip
+            raise ClientError({"Error": {"Code": "ValidationException",
+                                         "Message": f"topK must be between {MIN_TOP_K} and {MAX_TOP_K}"}},
+                              "QueryVectors")
+
+        index = self.indices.get(indexName)
+        if self.ready and index is not None and len(index) and indexName not in self.incomplete_indices:
+            try:
+                vectors = index.query(queryVector["float32"], topK, filter, returnMetadata, returnDistance)
+                return {"vectors": vectors, "distanceMetric": "cosine"}
+            except Exception as e:
+                logger.warning(f"Local query on {indexName} failed, using S3 Vectors: {e}")
+
+        from dependencies import s3vectors
+        kwargs = {"filter": filter} if filter else {}
+        return s3vectors.query_vectors(
+            vectorBucketName=vectorBucketName,
+            indexName=indexName,
+            queryVector=queryVector,
+            topK=topK,
+            returnMetadata=returnMetadata,
+            returnDistance=returnDistance,
+            **kwargs
+        )
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "last_refresh": self.last_refresh,
+            "scenes": len(self.scene_keys),
+            "incomplete_scenes": len(self.incomplete_scenes),
+            "indices_on_s3_vectors": sorted(self.incomplete_indices),
+            "indices": {name: len(index) for name, index in self.indices.items()},
+        }
+
+
+# Shared instance started by the API lifespan and used by the search/analytics routes
+vector_index_mirror = VectorIndexMirror()
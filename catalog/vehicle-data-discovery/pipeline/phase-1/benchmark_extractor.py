@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Fleet Discovery Studio - Phase 1 Extractor Micro-Benchmark
+Measures message-loop throughput (messages/sec) on a synthetic multi-sensor ROS bag.
+
+Compares the legacy per-message classification loop against the per-connection
+dispatch table used by extract_multisensor_data_single_pass. Both loops use the
+same deserializer so the numbers isolate dispatch overhead.
+
+Usage:
+    BENCH_FRAMES=2000 BENCH_REPEAT=3 python3 benchmark_extractor.py
+"""
+
+import os
+import time
+import tempfile
+import logging
+from typing import Dict, Any
+
+import numpy as np
+
+# Extractor module creates AWS clients at import time
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-west-2')
+
+from rosbags.rosbag1 import Reader, Writer
+from rosbags.typesys import Stores, get_typestore
+
+import multi_sensor_rosbag_extractor as extractor
+
+logger = logging.getLogger(__name__)
+
+CAMERA_TOPICS = ['/CAM_FRONT/image_rect_compressed', '/CAM_BACK/image_rect_compressed']
+
+
+def write_synthetic_bag(bag_path: str, num_frames: int) -> int:
+    """
+    Write a synthetic rosbag1 with camera, lidar, telemetry, vehicle and unrouted topics.
+
+    Returns:
+        Total number of messages written
+    """
+    typestore = get_typestore(Stores.ROS1_NOETIC)
+    types = typestore.types
+    Header = types['std_msgs/msg/Header']
+    Time = types['builtin_interfaces/msg/Time']
+    Vector3 = types['geometry_msgs/msg/Vector3']
+    Quaternion = types['geometry_msgs/msg/Quaternion']
+    Point = types['geometry_msgs/msg/Point']
+
+    # Fake JPEG payload (SOI ... EOI) - content is never decoded in Phase 1
+    jpeg = np.frombuffer(b'\xff\xd8' + os.urandom(20000) + b'\xff\xd9', dtype=np.uint8)
+    fields = [types['sensor_msgs/msg/PointField'](name=name, offset=4 * i, datatype=7, count=1)
+              for i, name in enumerate('xyz')]
+    cov9, cov36 = np.zeros(9), np.zeros(36)
+
+    total = 0
+    with Writer(bag_path) as writer:
+        cameras = [writer.add_connection(topic, 'sensor_msgs/msg/CompressedImage', typestore=typestore)
+                   for topic in CAMERA_TOPICS]
+        lidar = writer.add_connection('/LIDAR_TOP', 'sensor_msgs/msg/PointCloud2', typestore=typestore)
+        imu = writer.add_connection('/imu', 'sensor_msgs/msg/Imu', typestore=typestore)
+        odom = writer.add_connection('/odom', 'nav_msgs/msg/Odometry', typestore=typestore)
+        speed = writer.add_connection('/vehicle/speed', 'std_msgs/msg/Float32', typestore=typestore)
+        diag = writer.add_connection('/diagnostics_text', 'std_msgs/msg/String', typestore=typestore)
+
+        def write(connection, timestamp, msg):
+            writer.write(connection, timestamp, typestore.serialize_ros1(msg, connection.msgtype))
+
+        for i in range(num_frames):
+            timestamp = i * 50_000_000
+            header = Header(seq=i, stamp=Time(sec=timestamp // 10**9, nanosec=timestamp % 10**9), frame_id='base_link')
+
+            for camera in cameras:
+                write(camera, timestamp, types['sensor_msgs/msg/CompressedImage'](header=header, format='jpeg', data=jpeg))
+                total += 1
+
+            if i % 2 == 0:
+                cloud = types['sensor_msgs/msg/PointCloud2'](
+                    header=header, height=1, width=2000, fields=fields, is_bigendian=False,
+                    point_step=12, row_step=24000, data=np.zeros(24000, dtype=np.uint8), is_dense=True
+                )
+                write(lidar, timestamp, cloud)
+                total += 1
+
+            # 100 Hz-style IMU relative to 20 Hz cameras
+            for k in range(5):
+                write(imu, timestamp + k * 10_000_000, types['sensor_msgs/msg/Imu'](
+                    header=header, orientation=Quaternion(x=0.0, y=0.0, z=0.0, w=1.0), orientation_covariance=cov9,
+                    angular_velocity=Vector3(x=0.0, y=0.0, z=0.0), angular_velocity_covariance=cov9,
+                    linear_acceleration=Vector3(x=0.1 * k, y=0.0, z=9.81), linear_acceleration_covariance=cov9
+                ))
+                total += 1
+
+            pose = types['geometry_msgs/msg/Pose'](position=Point(x=float(i), y=0.5 * i, z=0.0),
+                                                   orientation=Quaternion(x=0.0, y=0.0, z=0.0, w=1.0))
+            twist = types['geometry_msgs/msg/Twist'](linear=Vector3(x=10.0, y=0.0, z=0.0), angular=Vector3(x=0.0, y=0.0, z=0.0))
+            write(odom, timestamp, types['nav_msgs/msg/Odometry'](
+                header=header, child_frame_id='base_link',
+                pose=types['geometry_msgs/msg/PoseWithCovariance'](pose=pose, covariance=cov36),
+                twist=types['geometry_msgs/msg/TwistWithCovariance'](twist=twist, covariance=cov36)
+            ))
+            write(speed, timestamp, types['std_msgs/msg/Float32'](data=10.0))
+            write(diag, timestamp, types['std_msgs/msg/String'](data='ok'))
+            total += 3
+
+    return total
+
+
+def legacy_extract(bag_path: str) -> int:
+    """Baseline loop: classification, msgtype string and helper classes built per message"""
+    results = {'camera': [], 'lidar': [], 'telemetry': [], 'vehicle': []}
+
+    with Reader(bag_path) as reader:
+        typestore = extractor.build_bag_typestore(reader.connections)
+        for (connection, timestamp, rawdata) in reader.messages():
+            try:
+                topic = connection.topic
+
+                class TimestampCompat:
+                    def __init__(self, sec):
+                        self.sec = sec
+                    def to_sec(self):
+                        return self.sec
+
+                t = TimestampCompat(timestamp / 1e9)
+                sensor_type = extractor.classify_by_message_type(connection)
+                msg_type_str = str(connection.msgtype)
+
+                if 'CompressedImage' in msg_type_str:
+                    class CompressedImageMeta:
+                        def __init__(self):
+                            self.format = "jpeg"
+                            self.data_size = len(rawdata)
+                    msg = CompressedImageMeta()
+                else:
+                    try:
+                        msg = typestore.deserialize_ros1(rawdata, connection.msgtype)
+                    except Exception:
+                        continue
+
+                if sensor_type in extractor.MESSAGE_HANDLERS:
+                    results[sensor_type].append(extractor.MESSAGE_HANDLERS[sensor_type](topic, msg, t))
+
+                total_messages = sum(len(records) for records in results.values())
+                if total_messages % 1000 == 0:
+                    logger.debug(f"Processed {total_messages} messages...")
+            except Exception:
+                continue
+
+    return sum(len(records) for records in results.values())
+
+
+def dispatch_extract(bag_path: str) -> int:
+    """Current loop: per-connection dispatch table"""
+    results = extractor.extract_multisensor_data_single_pass(bag_path, 'benchmark')
+    return sum(len(records) for records in results['sensors'].values())
+
+
+def time_loop(label: str, func, bag_path: str, total_messages: int, repeat: int) -> Dict[str, Any]:
+    """Run one loop `repeat` times and report best-of messages/sec"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        records = func(bag_path)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    rate = total_messages / best
+    print(f"{label:<10} {records:>8} records  {best:8.3f}s  {rate:12,.0f} messages/sec")
+    return {"records": records, "seconds": best, "messages_per_sec": rate}
+
+
+def main():
+    num_frames = int(os.getenv('BENCH_FRAMES', '2000'))
+    repeat = int(os.getenv('BENCH_REPEAT', '3'))
+
+    # Keep benchmark output free of per-message progress logging
+    logging.getLogger(extractor.__name__).setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        bag_path = os.path.join(temp_dir, 'synthetic.bag')
+        total_messages = write_synthetic_bag(bag_path, num_frames)
+        print(f"Synthetic bag: {total_messages} messages, {os.path.getsize(bag_path) / 1e6:.1f} MB")
+
+        before = time_loop('before', legacy_extract, bag_path, total_messages, repeat)
+        after = time_loop('after', dispatch_extract, bag_path, total_messages, repeat)
+
+    print(f"Speedup: {after['messages_per_sec'] / before['messages_per_sec']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,16 +8,38 @@ import os
 import sys
 import json
 import boto3
+import math
+import struct
 import logging
+import threading
+import multiprocessing
+from array import array
+from collections import namedtuple
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
 from typing import Dict, Any, List, Tuple
+import numpy as np
 from rosbags.rosbag1 import Reader
-from rosbags.serde import deserialize_cdr
+from rosbags.typesys import Stores, get_typestore, get_types_from_msg
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Optional columnar output (streaming Parquet mode)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+NAN = float('nan')
+
+# Sensor classes written by the extractor, in output order
+SENSOR_CLASSES = ['cameras', 'lidar', 'telemetry', 'vehicle_state']
+
 # Global AWS clients for performance
 s3_client = boto3.client('s3')
 sfn_client = boto3.client('stepfunctions')
@@ -48,45 +70,11 @@ def main():
         logger.info(f"Downloading ROS bag from S3...")
         s3_client.download_file(s3_bucket, input_s3_key, local_bag_path)
 
-        # Single-pass bag extraction (no AWS dependencies)
-        extraction_results = extract_multisensor_data_single_pass(local_bag_path, scene_id)
+        # Single-pass bag extraction (no AWS dependencies), optionally split into time shards
+        extraction_results = extract_scene(local_bag_path, scene_id, shards=int(os.getenv('PHASE1_SHARDS', '1')))
 
-        # AWS Handler: Upload output to S3
-        output_data = {
-            "scene_id": scene_id,
-            "input_file": input_s3_key,
-            "extraction_timestamp": datetime.utcnow().isoformat(),
-            **extraction_results
-        }
-
-        s3_client.put_object(
-            Bucket=s3_bucket,
-            Key=output_s3_key,
-            Body=json.dumps(output_data, indent=2),
-            ContentType='application/json'
-        )
-
-        # AWS Handler: Verify output exists
-        verify_s3_output_exists(s3_bucket, output_s3_key)
-
-        # AWS Handler: Report success to Step Functions
-        success_payload = {
-            "output_s3_key": output_s3_key,
-            "s3_uri": f"s3://{s3_bucket}/{output_s3_key}",
-            "scene_id": scene_id,
-            "extraction_summary": {
-                "total_frames": extraction_results["frame_count"],
-                "total_telemetry_points": extraction_results["telemetry_points"],
-                "sensors_processed": list(extraction_results["sensors"].keys())
-            },
-            "timestamp": datetime.utcnow().isoformat(),
-            "status": "SUCCESS"
-        }
-
-        sfn_client.send_task_success(
-            taskToken=task_token,
-            output=json.dumps(success_payload)
-        )
+        # AWS Handler: Upload output to S3 and report success to Step Functions
+        publish_scene_results(s3_bucket, scene_id, input_s3_key, output_s3_key, extraction_results, task_token)
 
         # Cleanup
         os.remove(local_bag_path)
@@ -96,124 +84,657 @@ def main():
         logger.error(f"Phase 1 failed: {str(e)}")
 
         # AWS Handler: Report failure to Step Functions
-        if task_token:
-            try:
-                sfn_client.send_task_failure(
-                    taskToken=task_token,
-                    error="Phase1.ExtractionFailed",
-                    cause=f"Multi-sensor extraction failed: {str(e)}"
-                )
-            except Exception as callback_error:
-                logger.error(f"Failed to send callback: {str(callback_error)}")
+        report_scene_failure(task_token, e)
 
         sys.exit(1)
 
 
-def extract_multisensor_data_single_pass(bag_path: str, scene_id: str) -> Dict[str, Any]:
+def main_batch():
+    """
+    Batch handler - extracts many scenes in one container run.
+
+    Reads a JSON manifest of scenes from S3 (BATCH_MANIFEST_S3_KEY), prefetches bags
+    from S3 ahead of a process pool sized to the available cores, and publishes each
+    scene's output and Step Functions callback as soon as that scene finishes.
+
+    Manifest format: {"scenes": [...]} or a bare list, where each entry is either a
+    scene ID or {"scene_id", "input_s3_key"?, "output_s3_key"?, "task_token"?}
+    """
+    s3_bucket = os.getenv('S3_BUCKET', '')
+    manifest_key = os.getenv('BATCH_MANIFEST_S3_KEY')
+    if not manifest_key:
+        raise ValueError("BATCH_MANIFEST_S3_KEY environment variable is required")
+
+    scenes = load_batch_manifest(s3_bucket, manifest_key)
+    workers = int(os.getenv('PHASE1_WORKERS', str(os.cpu_count() or 1)))
+    prefetch = int(os.getenv('PHASE1_PREFETCH', str(workers)))
+    logger.info(f"Batch extraction: {len(scenes)} scenes, {workers} workers, {prefetch} bags prefetched")
+
+    # Bounds bags on local disk (being extracted + downloaded ahead of the workers)
+    local_bag_slots = threading.BoundedSemaphore(workers + prefetch)
+
+    def download_scene(scene: Dict[str, str]) -> str:
+        local_bag_slots.acquire()
+        try:
+            local_bag_path = f"/tmp/{scene['scene_id']}.bag"
+            s3_client.download_file(s3_bucket, scene['input_s3_key'], local_bag_path)
+            logger.info(f"Prefetched {scene['scene_id']}")
+            return local_bag_path
+        except Exception:
+            local_bag_slots.release()
+            raise
+
+    failed_scenes = []
+
+    def fail_scene(scene: Dict[str, str], error: Exception) -> None:
+        logger.error(f"Scene {scene['scene_id']} failed: {str(error)}")
+        failed_scenes.append(scene['scene_id'])
+        report_scene_failure(scene.get('task_token'), error)
+
+    # Spawned workers: the parent holds download threads, which don't mix with fork
+    with ThreadPoolExecutor(max_workers=prefetch) as downloader, \
+            ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        downloads = {downloader.submit(download_scene, scene): scene for scene in scenes}
+        extractions = {}
+        pending = set(downloads)
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in downloads:
+                    scene = downloads.pop(future)
+                    try:
+                        local_bag_path = future.result()
+                    except Exception as e:
+                        fail_scene(scene, e)
+                        continue
+                    extraction = pool.submit(extract_scene, local_bag_path, scene['scene_id'])
+                    extractions[extraction] = (scene, local_bag_path)
+                    pending.add(extraction)
+                    continue
+
+                scene, local_bag_path = extractions.pop(future)
+                try:
+                    publish_scene_results(
+                        s3_bucket, scene['scene_id'], scene['input_s3_key'], scene['output_s3_key'],
+                        future.result(), scene.get('task_token')
+                    )
+                    logger.info(f"Scene {scene['scene_id']} completed")
+                except Exception as e:
+                    fail_scene(scene, e)
+                finally:
+                    if os.path.exists(local_bag_path):
+                        os.remove(local_bag_path)
+                    local_bag_slots.release()
+
+    logger.info(f"Batch extraction complete: {len(scenes) - len(failed_scenes)} succeeded, {len(failed_scenes)} failed")
+    if failed_scenes:
+        logger.error(f"Failed scenes: {failed_scenes}")
+        sys.exit(1)
+
+
+def load_batch_manifest(bucket: str, manifest_key: str) -> List[Dict[str, str]]:
+    """Load and normalize the batch manifest, filling S3 keys from templates"""
+    response = s3_client.get_object(Bucket=bucket, Key=manifest_key)
+    manifest = json.loads(response['Body'].read())
+    entries = manifest.get('scenes', []) if isinstance(manifest, dict) else manifest
+
+    input_template = os.getenv('BATCH_INPUT_KEY_TEMPLATE', 'raw-data/fleet-pipeline/compressed-NuScenes-v1.0-trainval-{scene_id}.bag')
+    output_template = os.getenv('BATCH_OUTPUT_KEY_TEMPLATE', 'processed/phase1/{scene_id}/extraction_output.json')
+
+    scenes = []
+    for entry in entries:
+        scene = {'scene_id': entry} if isinstance(entry, str) else dict(entry)
+        scene.setdefault('input_s3_key', input_template.format(scene_id=scene['scene_id']))
+        scene.setdefault('output_s3_key', output_template.format(scene_id=scene['scene_id']))
+        scenes.append(scene)
+    return scenes
+
+
+def extract_scene(local_bag_path: str, scene_id: str, shards: int = 1) -> Dict[str, Any]:
+    """
+    Extract one scene in the configured output format (runs in-process or in a pool worker)
+
+    PHASE1_OUTPUT_FORMAT=parquet streams each sensor class to its own Parquet file
+    so memory stays flat regardless of bag size. With shards > 1 the bag is split
+    into time ranges that are extracted in parallel worker processes.
+    """
+    output_format = os.getenv('PHASE1_OUTPUT_FORMAT', 'json').lower()
+    output_dir = f"/tmp/{scene_id}_columnar" if output_format == 'parquet' else None
+    telemetry_mode = os.getenv('PHASE1_TELEMETRY_MODE', 'raw').lower()
+    if shards > 1:
+        results = extract_multisensor_data_sharded(local_bag_path, scene_id, shards, output_dir=output_dir,
+                                                   telemetry_mode=telemetry_mode)
+    else:
+        results = extract_multisensor_data_single_pass(local_bag_path, scene_id, output_dir=output_dir,
+                                                       telemetry_mode=telemetry_mode)
+
+    # Fixed-rate telemetry series are written as a memory-mappable .npy sidecar
+    if "telemetry_series" in results:
+        window_sec = float(os.getenv('PHASE1_TELEMETRY_WINDOW_SEC', '1.0'))
+        results["telemetry_series"] = results["telemetry_series"].save(
+            f"/tmp/{scene_id}_telemetry_series.npy", window_sec
+        )
+    return results
+
+
+def publish_scene_results(s3_bucket: str, scene_id: str, input_s3_key: str, output_s3_key: str,
+                          extraction_results: Dict[str, Any], task_token: str = None) -> None:
+    """Upload a scene's extraction output to S3, verify it and report success to Step Functions"""
+    if "sensor_files" in extraction_results:
+        extraction_results["sensor_files"] = upload_columnar_outputs(
+            s3_bucket, output_s3_key, extraction_results["sensor_files"]
+        )
+
+    if "telemetry_series" in extraction_results:
+        series = extraction_results["telemetry_series"]
+        series_s3_key = f"{os.path.dirname(output_s3_key)}/telemetry_series.npy"
+        s3_client.upload_file(series["file"], s3_bucket, series_s3_key)
+        os.remove(series["file"])
+        series["file"] = f"s3://{s3_bucket}/{series_s3_key}"
+
+    output_data = {
+        "scene_id": scene_id,
+        "input_file": input_s3_key,
+        "extraction_timestamp": datetime.utcnow().isoformat(),
+        **extraction_results
+    }
+
+    s3_client.put_object(
+        Bucket=s3_bucket,
+        Key=output_s3_key,
+        Body=json.dumps(output_data, indent=2),
+        ContentType='application/json'
+    )
+
+    # AWS Handler: Verify output exists
+    verify_s3_output_exists(s3_bucket, output_s3_key)
+
+    if not task_token:
+        return
+
+    success_payload = {
+        "output_s3_key": output_s3_key,
+        "s3_uri": f"s3://{s3_bucket}/{output_s3_key}",
+        "scene_id": scene_id,
+        "extraction_summary": {
+            "total_frames": extraction_results["frame_count"],
+            "total_telemetry_points": extraction_results["telemetry_points"],
+            "sensors_processed": list(extraction_results["sensors"].keys())
+        },
+        "timestamp": datetime.utcnow().isoformat(),
+        "status": "SUCCESS"
+    }
+
+    sfn_client.send_task_success(
+        taskToken=task_token,
+        output=json.dumps(success_payload)
+    )
+
+
+def report_scene_failure(task_token: str, error: Exception) -> None:
+    """Report a scene failure to Step Functions (no-op without a task token)"""
+    if not task_token:
+        return
+    try:
+        sfn_client.send_task_failure(
+            taskToken=task_token,
+            error="Phase1.ExtractionFailed",
+            cause=f"Multi-sensor extraction failed: {str(error)}"
+        )
+    except Exception as callback_error:
+        logger.error(f"Failed to send callback: {str(callback_error)}")
+
+
+def extract_multisensor_data_single_pass(bag_path: str, scene_id: str, output_dir: str = None,
+                                         start: int = None, stop: int = None,
+                                         telemetry_mode: str = 'raw') -> Dict[str, Any]:
     """
     Single-pass ROS bag extraction (no AWS dependencies)
 
     Args:
         bag_path: Local path to ROS bag file
         scene_id: Scene identifier
+        output_dir: If set, stream each sensor class to a Parquet file in this
+            directory instead of holding all messages in memory
+        start: Only extract messages at or after this bag timestamp (ns)
+        stop: Only extract messages before this bag timestamp (ns)
+        telemetry_mode: 'raw' keeps per-message telemetry records, 'series' only
+            aggregates them into fixed-rate series, 'both' does both
 
     Returns:
-        Dictionary with extraction results
+        Dictionary with extraction results ('telemetry_series' holds a
+        TelemetrySeriesAggregator unless telemetry_mode is 'raw')
     """
     logger.info(f"Processing ROS bag in single pass: {bag_path}")
 
-    # Initialize result containers
-    camera_frames = []
-    lidar_points = []
-    telemetry_data = []
-    vehicle_data = []
+    # Initialize result containers (in-memory lists or streaming columnar writers)
+    if output_dir:
+        writers = open_columnar_writers(output_dir, scene_id)
+        camera_frames = writers['cameras']
+        lidar_points = writers['lidar']
+        telemetry_data = writers['telemetry']
+        vehicle_data = writers['vehicle_state']
+    else:
+        camera_frames = []
+        lidar_points = []
+        telemetry_data = []
+        vehicle_data = []
+
+    try:
+        # Telemetry aggregation stage: fixed-rate series instead of (or alongside) raw records
+        telemetry_series = None
+        if telemetry_mode in ('series', 'both'):
+            telemetry_series = TelemetrySeriesAggregator(telemetry_data if telemetry_mode == 'both' else None)
+            if output_dir and telemetry_mode == 'series':
+                # Keep the (empty) Parquet file so every sensor class has an output
+                writers['telemetry'].close()
+            telemetry_data = telemetry_series
+
+        # Use dynamic topic discovery instead of hard-coded topics
+        # Initialize topic sets - will be populated dynamically
+        camera_topics = set()
+        lidar_topics = set()
+        telemetry_topics = set()
+        vehicle_topics = set()
+
+        sinks = {
+            'camera': (camera_frames, camera_topics),
+            'lidar': (lidar_points, lidar_topics),
+            'telemetry': (telemetry_data, telemetry_topics),
+            'vehicle': (vehicle_data, vehicle_topics)
+        }
+        processed_messages = 0
+
+        # SINGLE PASS: Read bag once and dispatch by connection
+        with Reader(bag_path) as reader:
+            # Resolve classification, decoder and handler once per connection, not per message
+            routes = build_connection_routes(reader.connections, sinks)
+
+            # Connection-level pre-filter: 'unknown' types are never read or deserialized
+            # (an empty connection list would make rosbags read every connection)
+            routed_connections = [connection for connection in reader.connections if connection.id in routes]
+            messages = reader.messages(connections=routed_connections, start=start, stop=stop) if routed_connections else ()
+
+            for (connection, timestamp, rawdata) in messages:
+                route = routes[connection.id]
+
+                try:
+                    msg = route.decode(rawdata)
+                except Exception:
+                    # Skip messages that can't be deserialized (e.g. unknown message types)
+                    logger.debug(f"Skipping message from {route.topic}: deserialization failed")
+                    continue
+
+                try:
+                    # Convert timestamp from nanoseconds to seconds (compatible with old API)
+                    route.sink.append(route.handler(route.topic, msg, TimestampCompat(timestamp / 1e9)))
+                    route.topics.add(route.topic)
+                except Exception as msg_error:
+                    logger.warning(f"Failed to process message from {route.topic}: {str(msg_error)}")
+                    continue
+
+                # Progress logging
+                processed_messages += 1
+                if processed_messages % 1000 == 0:
+                    logger.info(f"Processed {processed_messages} messages...")
+    except BaseException:
+        # Don't leak open ParquetWriters or leave partial files behind (matters for the
+        # long-lived batch/shard workers that call this many times)
+        if output_dir:
+            for writer in writers.values():
+                writer.abort()
+        raise
+
+    logger.info(f"Extraction complete: {len(camera_frames)} camera, {len(lidar_points)} lidar, {len(telemetry_data)} telemetry, {len(vehicle_data)} vehicle messages")
+
+    if output_dir:
+        topics = {
+            'cameras': camera_topics,
+            'lidar': lidar_topics,
+            'telemetry': telemetry_topics,
+            'vehicle_state': vehicle_topics
+        }
+        sensor_files = {}
+        sensors = {}
+        for sensor_class, writer in writers.items():
+            writer.close()
+            sensor_files[sensor_class] = writer.path
+            sensors[sensor_class] = {
+                "rows": len(writer),
+                "row_groups": writer.row_groups,
+                "topics": sorted(topics[sensor_class])
+            }
+
+        results = {
+            "output_format": "parquet",
+            "sensors": sensors,
+            "sensor_files": sensor_files,
+            "frame_count": len(camera_frames),
+            "telemetry_points": len(telemetry_data)
+        }
+    else:
+        if telemetry_series is not None:
+            # Raw records only kept in 'both' mode
+            telemetry_data = telemetry_series.inner if telemetry_series.inner is not None else []
+
+        results = {
+            "sensors": {
+                "cameras": camera_frames,
+                "lidar": lidar_points,
+                "telemetry": telemetry_data,
+                "vehicle_state": vehicle_data
+            },
+            "frame_count": len(camera_frames),
+            "telemetry_points": len(telemetry_series if telemetry_series is not None else telemetry_data)
+        }
+
+    if telemetry_series is not None:
+        results["telemetry_series"] = telemetry_series
+    return results
+
 
-    # Use dynamic topic discovery instead of hard-coded topics
-    # Initialize topic sets - will be populated dynamically
-    camera_topics = set()
-    lidar_topics = set()
-    telemetry_topics = set()
-    vehicle_topics = set()
+def plan_time_shards(bag_path: str, num_shards: int) -> List[Tuple[int, int]]:
+    """
+    Split a bag into contiguous time ranges of roughly equal message counts.
 
-    # SINGLE PASS: Read bag once and dispatch by topic
+    Uses the rosbag1 chunk index (chunk start times and per-connection counts), so
+    no message data is read. Boundaries fall on chunk start times; the first and
+    last ranges are open-ended (None).
+
+    Returns:
+        List of (start, stop) bag timestamps in ns, in time order
+    """
     with Reader(bag_path) as reader:
-        for (connection, timestamp, rawdata) in reader.messages():
-            try:
-                topic = connection.topic
-
-                # Convert timestamp from nanoseconds to seconds (compatible with old API)
-                t_sec = timestamp / 1e9
-
-                # Create timestamp object with to_sec() method for compatibility
-                class TimestampCompat:
-                    def __init__(self, sec):
-                        self.sec = sec
-                    def to_sec(self):
-                        return self.sec
-
-                t = TimestampCompat(t_sec)
-
-                # Classify by ROS message type (not topic names - robust approach)
-                sensor_type = classify_by_message_type(connection)
-
-                # Handle binary vs structured data based on message type
-                msg_type_str = str(connection.msgtype)
-
-                # For compressed images: DON'T deserialize binary data, extract metadata only
-                if 'CompressedImage' in msg_type_str:
-                    # Create minimal message object with basic metadata for compressed images
-                    class CompressedImageMeta:
-                        def __init__(self):
-                            self.format = "jpeg"  # Default format for compressed images
-                            self.data_size = len(rawdata)
-                    msg = CompressedImageMeta()
-
-                # For regular structured messages: Safe to deserialize
-                else:
-                    try:
-                        msg = deserialize_cdr(rawdata, connection.msgtype)
-                    except Exception as deser_error:
-                        # Skip messages that can't be deserialized (e.g. unknown message types)
-                        logger.debug(f"Skipping message from {topic}: deserialization failed")
-                        continue
+        chunk_infos = sorted(reader.chunk_infos, key=lambda info: info.start_time)
+
+    total_messages = sum(sum(info.connection_counts.values()) for info in chunk_infos)
+    if num_shards <= 1 or len(chunk_infos) < 2 or total_messages == 0:
+        return [(None, None)]
+
+    boundaries = []
+    cumulative = 0
+    for info in chunk_infos:
+        # Start a new shard at this chunk once the current one holds its share of messages
+        if cumulative >= total_messages * (len(boundaries) + 1) / num_shards:
+            if not boundaries or info.start_time > boundaries[-1]:
+                boundaries.append(info.start_time)
+            if len(boundaries) == num_shards - 1:
+                break
+        cumulative += sum(info.connection_counts.values())
+
+    starts = [None] + boundaries
+    stops = boundaries + [None]
+    return list(zip(starts, stops))
+
+
+def extract_multisensor_data_sharded(bag_path: str, scene_id: str, num_shards: int,
+                                     output_dir: str = None, telemetry_mode: str = 'raw') -> Dict[str, Any]:
+    """
+    Time-sharded ROS bag extraction across worker processes (no AWS dependencies)
 
-                if sensor_type == 'camera':
-                    camera_topics.add(topic)
-                    camera_frames.append(process_camera_message(topic, msg, t))
-                elif sensor_type == 'lidar':
-                    lidar_topics.add(topic)
-                    lidar_points.append(process_lidar_message(topic, msg, t))
-                elif sensor_type == 'telemetry':
-                    telemetry_topics.add(topic)
-                    telemetry_data.append(process_telemetry_message(topic, msg, t))
-                elif sensor_type == 'vehicle':
-                    vehicle_topics.add(topic)
-                    vehicle_data.append(process_vehicle_message(topic, msg, t))
-                # Note: 'unknown' types are ignored, not an error
+    Each shard runs extract_multisensor_data_single_pass over its time range;
+    per-sensor results are concatenated in shard (timestamp) order, which gives
+    the same output as a single pass over the whole bag.
 
-                # Progress logging
-                total_messages = len(camera_frames) + len(lidar_points) + len(telemetry_data) + len(vehicle_data)
-                if total_messages % 1000 == 0:
-                    logger.info(f"Processed {total_messages} messages...")
+    Args:
+        bag_path: Local path to ROS bag file
+        scene_id: Scene identifier
+        num_shards: Number of time ranges / worker processes
+        output_dir: Streaming Parquet output directory (see extract_multisensor_data_single_pass)
+        telemetry_mode: Telemetry aggregation mode (see extract_multisensor_data_single_pass)
 
-            except Exception as msg_error:
-                logger.warning(f"Failed to process message from {connection.topic}: {str(msg_error)}")
-                continue
+    Returns:
+        Dictionary with extraction results
+    """
+    shards = plan_time_shards(bag_path, num_shards)
+    if len(shards) == 1:
+        return extract_multisensor_data_single_pass(bag_path, scene_id, output_dir=output_dir,
+                                                    telemetry_mode=telemetry_mode)
+
+    logger.info(f"Extracting {bag_path} in {len(shards)} time shards")
+
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = [
+            pool.submit(
+                extract_multisensor_data_single_pass, bag_path, scene_id,
+                os.path.join(output_dir, f"shard_{index:03d}") if output_dir else None,
+                start, stop, telemetry_mode
+            )
+            for index, (start, stop) in enumerate(shards)
+        ]
+        shard_results = [future.result() for future in futures]
+
+    if output_dir:
+        results = merge_columnar_shards(shard_results, output_dir, scene_id)
+    else:
+        merged = {sensor_class: [] for sensor_class in SENSOR_CLASSES}
+        for result in shard_results:
+            for sensor_class in SENSOR_CLASSES:
+                merged[sensor_class].extend(result["sensors"][sensor_class])
+
+        results = {
+            "sensors": merged,
+            "frame_count": len(merged['cameras']),
+            "telemetry_points": sum(result["telemetry_points"] for result in shard_results)
+        }
 
-    logger.info(f"Extraction complete: {len(camera_frames)} camera, {len(lidar_points)} lidar, {len(telemetry_data)} telemetry, {len(vehicle_data)} vehicle messages")
+    if telemetry_mode in ('series', 'both'):
+        telemetry_series = TelemetrySeriesAggregator()
+        for result in shard_results:
+            telemetry_series.merge(result["telemetry_series"])
+        results["telemetry_series"] = telemetry_series
+    return results
+
+
+def merge_columnar_shards(shard_results: List[Dict[str, Any]], output_dir: str, scene_id: str) -> Dict[str, Any]:
+    """Concatenate per-shard Parquet files row group by row group, in shard order"""
+    schemas = get_columnar_schemas()
+    sensor_files = {}
+    sensors = {}
+
+    for sensor_class in SENSOR_CLASSES:
+        path = os.path.join(output_dir, f"{scene_id}_{sensor_class}.parquet")
+        rows = 0
+        row_groups = 0
+        topics = set()
+
+        with pq.ParquetWriter(path, schemas[sensor_class], compression='zstd') as writer:
+            for result in shard_results:
+                shard_path = result["sensor_files"][sensor_class]
+                shard_file = pq.ParquetFile(shard_path)
+                for row_group in range(shard_file.num_row_groups):
+                    writer.write_table(shard_file.read_row_group(row_group))
+                    row_groups += 1
+                rows += result["sensors"][sensor_class]["rows"]
+                topics.update(result["sensors"][sensor_class]["topics"])
+                os.remove(shard_path)
+
+        sensor_files[sensor_class] = path
+        sensors[sensor_class] = {"rows": rows, "row_groups": row_groups, "topics": sorted(topics)}
 
     return {
-        "sensors": {
-            "cameras": camera_frames,
-            "lidar": lidar_points,
-            "telemetry": telemetry_data,
-            "vehicle_state": vehicle_data
-        },
-        "frame_count": len(camera_frames),
-        "telemetry_points": len(telemetry_data)
+        "output_format": "parquet",
+        "sensors": sensors,
+        "sensor_files": sensor_files,
+        "frame_count": sensors['cameras']['rows'],
+        "telemetry_points": sum(result["telemetry_points"] for result in shard_results)
     }
 
 
+class TimestampCompat:
+    """Timestamp object with to_sec() method for compatibility with the rosbag API"""
+    __slots__ = ('sec',)
+
+    def __init__(self, sec: float):
+        self.sec = sec
+
+    def to_sec(self) -> float:
+        return self.sec
+
+
+class CompressedImageMeta:
+    """Minimal stand-in for a compressed image message (binary payload is not deserialized)"""
+    __slots__ = ('format', 'data_size')
+
+    def __init__(self, data_size: int):
+        self.format = "jpeg"  # Default format for compressed images
+        self.data_size = data_size
+
+
+class ConnectionRoute:
+    """Pre-resolved dispatch entry for one bag connection"""
+    __slots__ = ('topic', 'sensor_type', 'decode', 'handler', 'sink', 'topics')
+
+    def __init__(self, topic: str, sensor_type: str, decode, handler, sink, topics: set):
+        self.topic = topic
+        self.sensor_type = sensor_type
+        self.decode = decode
+        self.handler = handler
+        self.sink = sink
+        self.topics = topics
+
+
+def decode_compressed_image(rawdata) -> CompressedImageMeta:
+    """Metadata-only decode for compressed images - DON'T deserialize binary data"""
+    return CompressedImageMeta(len(rawdata))
+
+
+PointFieldMeta = namedtuple('PointFieldMeta', ['name', 'offset', 'datatype', 'count'])
+
+
+class PointCloudMeta:
+    """Metadata-only view of a sensor_msgs/PointCloud2 message (point data not read)"""
+    __slots__ = ('height', 'width', 'fields')
+
+    def __init__(self, height: int, width: int, fields: List[PointFieldMeta]):
+        self.height = height
+        self.width = width
+        self.fields = fields
+
+
+class ImageMeta:
+    """Metadata-only view of a sensor_msgs/Image message (pixel data not read)"""
+    __slots__ = ('height', 'width', 'encoding')
+
+    def __init__(self, height: int, width: int, encoding: str):
+        self.height = height
+        self.width = width
+        self.encoding = encoding
+
+
+_UINT32 = struct.Struct('<I')
+_POINT_FIELD_TAIL = struct.Struct('<IBI')  # offset, datatype, count
+
+
+def _read_ros1_string(rawdata, offset: int) -> Tuple[str, int]:
+    """Read a ROS1 string (uint32 length + bytes), returning (value, next offset)"""
+    (length,) = _UINT32.unpack_from(rawdata, offset)
+    offset += 4
+    return bytes(rawdata[offset:offset + length]).decode('utf-8'), offset + length
+
+
+def _skip_ros1_header(rawdata) -> int:
+    """Return the offset just past a leading std_msgs/Header (seq, stamp, frame_id)"""
+    (frame_id_length,) = _UINT32.unpack_from(rawdata, 12)
+    return 16 + frame_id_length
+
+
+def parse_pointcloud2_header(rawdata) -> PointCloudMeta:
+    """Read height, width and fields from a ROS1-serialized PointCloud2 without touching point data"""
+    offset = _skip_ros1_header(rawdata)
+    height, width, field_count = struct.unpack_from('<III', rawdata, offset)
+    offset += 12
+
+    fields = []
+    for _ in range(field_count):
+        name, offset = _read_ros1_string(rawdata, offset)
+        field_offset, datatype, count = _POINT_FIELD_TAIL.unpack_from(rawdata, offset)
+        offset += _POINT_FIELD_TAIL.size
+        fields.append(PointFieldMeta(name, field_offset, datatype, count))
+
+    return PointCloudMeta(height, width, fields)
+
+
+def parse_image_header(rawdata) -> ImageMeta:
+    """Read height, width and encoding from a ROS1-serialized Image without touching pixel data"""
+    offset = _skip_ros1_header(rawdata)
+    height, width = struct.unpack_from('<II', rawdata, offset)
+    encoding, _ = _read_ros1_string(rawdata, offset + 8)
+    return ImageMeta(height, width, encoding)
+
+
+# Message type -> header-only parser for the metadata fields Phase 1 records
+HEADER_ONLY_PARSERS = {
+    'sensor_msgs/msg/PointCloud2': parse_pointcloud2_header,
+    'sensor_msgs/msg/Image': parse_image_header
+}
+
+
+def decode_header_only(parser, full_decode, rawdata):
+    """Header-only decode, falling back to full deserialization if the buffer is malformed"""
+    try:
+        return parser(rawdata)
+    except (struct.error, UnicodeDecodeError):
+        return full_decode(rawdata)
+
+
+def build_bag_typestore(connections):
+    """ROS1 typestore extended with any custom message definitions embedded in the bag"""
+    typestore = get_typestore(Stores.ROS1_NOETIC)
+    for connection in connections:
+        if connection.msgtype in typestore.types:
+            continue
+        try:
+            typestore.register(get_types_from_msg(connection.msgdef.data, connection.msgtype))
+        except Exception as register_error:
+            logger.debug(f"Could not register {connection.msgtype}: {str(register_error)}")
+    return typestore
+
+
+def build_connection_routes(connections, sinks: Dict[str, Tuple[Any, set]]) -> Dict[int, ConnectionRoute]:
+    """
+    Build the connection id -> route dispatch table for a bag.
+
+    Connections with an 'unknown' sensor type get no route and are skipped by the
+    message loop without any per-message classification work.
+
+    Args:
+        connections: rosbags reader connections
+        sinks: sensor type -> (result container, topic set)
+
+    Returns:
+        Dictionary mapping connection id to its ConnectionRoute
+    """
+    typestore = build_bag_typestore(connections)
+    routes = {}
+    for connection in connections:
+        sensor_type = classify_by_message_type(connection)
+        if sensor_type == 'unknown':
+            continue
+
+        # For compressed images: extract metadata only; structured messages are deserialized.
+        # rosbag1 payloads use ROS1 serialization, not CDR
+        if 'CompressedImage' in str(connection.msgtype):
+            decode = decode_compressed_image
+        else:
+            decode = partial(typestore.deserialize_ros1, typename=connection.msgtype)
+
+            # Header-only path for large payloads whose records only need metadata fields.
+            # Only used when the bag's definition matches the standard one (same layout)
+            header_parser = HEADER_ONLY_PARSERS.get(connection.msgtype)
+            if header_parser and connection.digest == typestore.generate_msgdef(connection.msgtype)[1]:
+                decode = partial(decode_header_only, header_parser, decode)
+
+        sink, topics = sinks[sensor_type]
+        routes[connection.id] = ConnectionRoute(
+            connection.topic, sensor_type, decode, MESSAGE_HANDLERS[sensor_type], sink, topics
+        )
+
+    logger.info(f"Dispatch table: {len(routes)} of {len(connections)} connections routed")
+    return routes
+
+
 def classify_by_message_type(connection) -> str:
     """
     Classify sensor data by ROS message type (robust approach - no hard-coding)
@@ -310,6 +831,13 @@ def process_telemetry_message(topic: str, msg, timestamp) -> Dict[str, Any]:
             "z": msg.linear_acceleration.z
         }
 
+    # Extract speed (linear velocity magnitude) from Odometry / TwistStamped if available
+    twist = getattr(msg, 'twist', None)
+    twist = getattr(twist, 'twist', twist)
+    if hasattr(twist, 'linear'):
+        linear = twist.linear
+        telemetry_point["speed"] = math.sqrt(linear.x * linear.x + linear.y * linear.y + linear.z * linear.z)
+
     return telemetry_point
 
 
@@ -322,6 +850,274 @@ def process_vehicle_message(topic: str, msg, timestamp) -> Dict[str, Any]:
     }
 
 
+# Telemetry series channels: (record key, component) -> channel name
+SERIES_CHANNELS = [
+    ('position', 'x'), ('position', 'y'), ('position', 'z'),
+    ('acceleration', 'x'), ('acceleration', 'y'), ('acceleration', 'z'),
+    ('speed', None)
+]
+SERIES_CHANNEL_NAMES = [f"{key}_{component}" if component else key for key, component in SERIES_CHANNELS]
+
+# One row per (topic, window): min/max/mean per channel, NaN where a window has no samples
+SERIES_DTYPE = np.dtype(
+    [('topic', np.uint16), ('window_start', np.float64), ('count', np.uint32)] +
+    [(f"{name}_{stat}", np.float32) for name in SERIES_CHANNEL_NAMES for stat in ('min', 'max', 'mean')]
+)
+
+
+class TelemetrySeriesAggregator:
+    """
+    Telemetry aggregation stage: reduces per-message telemetry records to fixed-rate
+    series (position, acceleration, speed) per topic with min/max/mean per window.
+
+    Samples are buffered array-backed per topic (8 doubles per message) and reduced
+    with NumPy in save(). Exposes append()/len() so it can stand in for the telemetry
+    result container; an optional inner container still receives the raw records.
+    """
+
+    def __init__(self, inner=None):
+        self.inner = inner
+        self.samples = {}
+
+    def append(self, record: Dict[str, Any]) -> None:
+        if self.inner is not None:
+            self.inner.append(record)
+
+        samples = self.samples.get(record['topic'])
+        if samples is None:
+            samples = self.samples[record['topic']] = array('d')
+
+        samples.append(record['timestamp'])
+        for key, component in SERIES_CHANNELS:
+            value = record.get(key)
+            if component and value is not None:
+                value = value.get(component)
+            samples.append(NAN if value is None else value)
+
+    def merge(self, other: 'TelemetrySeriesAggregator') -> None:
+        """Append another aggregator's samples (e.g. a later time shard)"""
+        for topic, samples in other.samples.items():
+            self.samples.setdefault(topic, array('d')).extend(samples)
+
+    def __len__(self) -> int:
+        return sum(len(samples) for samples in self.samples.values()) // (len(SERIES_CHANNELS) + 1)
+
+    def __getstate__(self):
+        # Raw containers (possibly Parquet writers) stay in the worker process
+        return {'inner': None, 'samples': self.samples}
+
+    def build_series(self, window_sec: float) -> Tuple[np.ndarray, List[str], float, int]:
+        """
+        Reduce buffered samples to a fixed-rate grid shared by all topics.
+
+        Returns:
+            (structured SERIES_DTYPE array ordered by topic then window, topics, grid start, windows per topic)
+        """
+        topics = sorted(topic for topic, samples in self.samples.items() if samples)
+        if not topics:
+            return np.zeros(0, dtype=SERIES_DTYPE), [], 0.0, 0
+
+        width = len(SERIES_CHANNELS) + 1
+        data = {topic: np.frombuffer(self.samples[topic], dtype=np.float64).reshape(-1, width) for topic in topics}
+        start_time = math.floor(min(values[:, 0].min() for values in data.values()) / window_sec) * window_sec
+        end_time = max(values[:, 0].max() for values in data.values())
+        num_windows = int((end_time - start_time) // window_sec) + 1
+
+        series = np.zeros(len(topics) * num_windows, dtype=SERIES_DTYPE)
+        for name in SERIES_DTYPE.names[3:]:
+            series[name] = np.nan
+
+        for topic_index, topic in enumerate(topics):
+            values = data[topic]
+            values = values[np.argsort(values[:, 0], kind='stable')]
+            windows = ((values[:, 0] - start_time) // window_sec).astype(np.int64)
+            starts = np.flatnonzero(np.r_[True, windows[1:] != windows[:-1]])
+            occupied = windows[starts]
+
+            rows = series[topic_index * num_windows:(topic_index + 1) * num_windows]
+            rows['topic'] = topic_index
+            rows['window_start'] = start_time + np.arange(num_windows) * window_sec
+            rows['count'][occupied] = np.diff(np.r_[starts, len(values)])
+
+            for channel_index, name in enumerate(SERIES_CHANNEL_NAMES):
+                column = values[:, channel_index + 1]
+                valid = ~np.isnan(column)
+                counts = np.add.reduceat(valid.astype(np.int64), starts)
+                totals = np.add.reduceat(np.where(valid, column, 0.0), starts)
+                with np.errstate(invalid='ignore'):
+                    rows[f"{name}_mean"][occupied] = totals / counts
+                rows[f"{name}_min"][occupied] = np.fmin.reduceat(column, starts)
+                rows[f"{name}_max"][occupied] = np.fmax.reduceat(column, starts)
+
+        return series, topics, start_time, num_windows
+
+    def save(self, path: str, window_sec: float) -> Dict[str, Any]:
+        """Write the series as a .npy sidecar (np.load(path, mmap_mode='r')) and return its summary"""
+        series, topics, start_time, num_windows = self.build_series(window_sec)
+        np.save(path, series)
+        logger.info(f"Telemetry series: {len(self)} samples -> {len(series)} rows ({os.path.getsize(path)} bytes)")
+        return {
+            "file": path,
+            "format": "npy",
+            "window_sec": window_sec,
+            "start_time": start_time,
+            "windows_per_topic": num_windows,
+            "topics": topics,
+            "channels": SERIES_CHANNEL_NAMES,
+            "dtype": SERIES_DTYPE.descr
+        }
+
+
+# Sensor type -> per-message record builder
+MESSAGE_HANDLERS = {
+    'camera': process_camera_message,
+    'lidar': process_lidar_message,
+    'telemetry': process_telemetry_message,
+    'vehicle': process_vehicle_message
+}
+
+
+class ColumnarSensorWriter:
+    """
+    Streaming Parquet writer for one sensor class.
+
+    Buffers flattened message records column-wise and flushes them as a Parquet
+    row group every `row_group_size` rows, so memory is bounded by one row group.
+    Exposes append()/len() so it can stand in for the in-memory result lists.
+    """
+
+    def __init__(self, path: str, schema, row_group_size: int):
+        self.path = path
+        self.schema = schema
+        self.row_group_size = row_group_size
+        self.row_groups = 0
+        self._rows_written = 0
+        self._columns = {name: [] for name in schema.names}
+        self._buffered = 0
+        self._writer = pq.ParquetWriter(path, schema, compression='zstd')
+
+    def append(self, record: Dict[str, Any]) -> None:
+        row = flatten_sensor_record(record)
+        for name, column in self._columns.items():
+            column.append(row.get(name))
+        self._buffered += 1
+        if self._buffered >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffered:
+            return
+        table = pa.Table.from_pydict(self._columns, schema=self.schema)
+        self._writer.write_table(table, row_group_size=self._buffered)
+        self.row_groups += 1
+        self._rows_written += self._buffered
+        self._columns = {name: [] for name in self.schema.names}
+        self._buffered = 0
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self.flush()
+            self._writer.close()
+            self._writer = None
+
+    def abort(self) -> None:
+        """Close without flushing buffered rows and delete the partial file"""
+        try:
+            if self._writer is not None:
+                self._writer.close()
+        finally:
+            self._writer = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def __len__(self) -> int:
+        return self._rows_written + self._buffered
+
+
+def get_columnar_schemas() -> Dict[str, Any]:
+    """Arrow schemas for the flattened per-sensor records"""
+    common = [('topic', pa.string()), ('timestamp', pa.float64())]
+    return {
+        'cameras': pa.schema(common + [
+            ('encoding', pa.string()),
+            ('format', pa.string()),
+            ('data_size', pa.int64()),
+            ('width', pa.int64()),
+            ('height', pa.int64())
+        ]),
+        'lidar': pa.schema(common + [
+            ('point_count', pa.int64()),
+            ('fields', pa.list_(pa.string()))
+        ]),
+        'telemetry': pa.schema(common + [
+            ('message_type', pa.string()),
+            ('position_x', pa.float64()),
+            ('position_y', pa.float64()),
+            ('position_z', pa.float64()),
+            ('acceleration_x', pa.float64()),
+            ('acceleration_y', pa.float64()),
+            ('acceleration_z', pa.float64()),
+            ('speed', pa.float64())
+        ]),
+        'vehicle_state': pa.schema(common + [
+            ('value', pa.float64()),
+            ('value_text', pa.string())
+        ])
+    }
+
+
+def flatten_sensor_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten nested record dicts ({"position": {"x": ..}} -> position_x) into columns"""
+    row = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                row[f"{key}_{sub_key}"] = sub_value
+        elif key == 'value' and not isinstance(value, (int, float)):
+            # Non-numeric vehicle values (e.g. JointState) are kept as text
+            row['value_text'] = str(value)
+        else:
+            row[key] = value
+    return row
+
+
+def open_columnar_writers(output_dir: str, scene_id: str) -> Dict[str, ColumnarSensorWriter]:
+    """Open one streaming Parquet writer per sensor class"""
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Columnar output requires pyarrow (pip install pyarrow)")
+
+    os.makedirs(output_dir, exist_ok=True)
+    row_group_size = int(os.getenv('PHASE1_ROW_GROUP_SIZE', '10000'))
+    schemas = get_columnar_schemas()
+
+    writers = {}
+    try:
+        for sensor_class in SENSOR_CLASSES:
+            writers[sensor_class] = ColumnarSensorWriter(
+                os.path.join(output_dir, f"{scene_id}_{sensor_class}.parquet"),
+                schemas[sensor_class],
+                row_group_size
+            )
+    except BaseException:
+        for writer in writers.values():
+            writer.abort()
+        raise
+    return writers
+
+
+def upload_columnar_outputs(bucket: str, output_s3_key: str, sensor_files: Dict[str, str]) -> Dict[str, str]:
+    """Upload per-sensor Parquet files next to the Phase 1 JSON and remove local copies"""
+    output_prefix = os.path.dirname(output_s3_key)
+    s3_uris = {}
+    for sensor_class, local_path in sensor_files.items():
+        s3_key = f"{output_prefix}/{sensor_class}.parquet"
+        s3_client.upload_file(local_path, bucket, s3_key)
+        s3_uris[sensor_class] = f"s3://{bucket}/{s3_key}"
+        os.remove(local_path)
+        logger.info(f"Uploaded columnar output: s3://{bucket}/{s3_key}")
+    return s3_uris
+
+
 def verify_s3_output_exists(bucket: str, key: str) -> None:
     """Verify output file was created in S3"""
     try:
@@ -335,4 +1131,7 @@ def verify_s3_output_exists(bucket: str, key: str) -> None:
 
 
 if __name__ == "__main__":
-    main()
+    if os.getenv('BATCH_MANIFEST_S3_KEY'):
+        main_batch()
+    else:
+        main()
@@ -7,12 +7,305 @@ import os
 import cv2
 import boto3
 import numpy as np
+import struct
 import subprocess
 import tempfile
-from typing import List, Dict, Tuple
+from PIL import Image
+from typing import List, Dict, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
 from datetime import datetime
 
+_UINT32 = struct.Struct('<I')
+
+# H.264 encode settings per output purpose:
+# - 'web': dashboard rendition, processed-videos/scene-XXXX/{camera}.mp4
+# - 'proxy': fast model-input rendition, processed-videos/scene-XXXX/proxy/{camera}.mp4
+#   (only produced when PHASE2_PROXY_RENDITION=true)
+ENCODE_PROFILES = {
+    'web': {'preset': os.getenv('PHASE2_WEB_PRESET', 'medium'), 'crf': os.getenv('PHASE2_WEB_CRF', '23')},
+    'proxy': {'preset': os.getenv('PHASE2_PROXY_PRESET', 'ultrafast'), 'crf': os.getenv('PHASE2_PROXY_CRF', '28')}
+}
+
+
+def get_encode_renditions() -> List[str]:
+    """Renditions to encode per camera ('web' always comes first)"""
+    renditions = ['web']
+    if os.getenv('PHASE2_PROXY_RENDITION', 'false').lower() == 'true':
+        renditions.append('proxy')
+    return renditions
+
+
+def h264_output_args(rendition: str, threads: int = 0) -> List[str]:
+    """FFmpeg H.264 output options for a rendition (threads=0 lets x264 decide)"""
+    profile = ENCODE_PROFILES[rendition]
+    args = [
+        '-c:v', 'libx264',                       # H.264 codec (universal browser support)
+        '-pix_fmt', 'yuv420p',                   # Pixel format for web compatibility
+        '-movflags', '+faststart',               # Optimize for web streaming
+        '-preset', profile['preset'],            # Encoding speed vs quality for this purpose
+        '-crf', str(profile['crf'])              # Constant rate factor
+    ]
+    if threads:
+        args += ['-threads', str(threads)]       # Bound x264 threads when encoders run concurrently
+    return args
+
+
+def get_frame_cache_targets() -> Dict[str, Dict[str, object]]:
+    """
+    Model-ready frame arrays to emit per camera when PHASE2_FRAME_CACHE=true
+
+    Sampling, resolution and resize method must match what Phase 3 would do to the
+    video, so the InternVideo2.5 target reads the same INTERNVIDEO_NUM_FRAMES/
+    INTERNVIDEO_INPUT_SIZE variables as Phase 3 (Phase 3 ignores arrays whose config
+    doesn't match its own).
+    """
+    if os.getenv('PHASE2_FRAME_CACHE', 'false').lower() != 'true':
+        return {}
+    return {
+        # load_video: get_index sampling, PIL bicubic resize of the shorter side + center crop
+        'internvideo': {
+            'num_frames': int(os.getenv('INTERNVIDEO_NUM_FRAMES', '8')),
+            'input_size': int(os.getenv('INTERNVIDEO_INPUT_SIZE', '224')),
+            'center_crop': True,
+            'resize': 'pil_bicubic'
+        },
+        # cosmos_embed_video: 8 evenly spaced frames squashed to 448x448
+        'cosmos': {'num_frames': 8, 'input_size': 448, 'center_crop': False, 'resize': 'cv2_bicubic'}
+    }
+
+
+def get_index(num_frames: int, num_segments: int) -> List[int]:
+    """InternVideo2.5 frame index calculation (identical to Phase 3 get_index)"""
+    seg_size = float(num_frames - 1) / num_segments
+    start = int(seg_size / 2)
+    offsets = np.array([start + int(np.round(seg_size * idx)) for idx in range(num_segments)])
+    return offsets.tolist()
+
+
+def sample_frame_indices(target_name: str, target: Dict[str, object], total_frames: int) -> List[int]:
+    """Frame indices Phase 3 samples from a video with total_frames frames"""
+    if target_name == 'internvideo':
+        return get_index(total_frames, target['num_frames'])
+    return np.linspace(0, total_frames - 1, target['num_frames'], dtype=int).tolist()
+
+
+def resize_for_target(rgb_image: np.ndarray, target: Dict[str, object]) -> np.ndarray:
+    """Resize an RGB frame the way Phase 3 preprocesses it for the target model"""
+    size = target['input_size']
+    if not target['center_crop']:
+        return cv2.resize(rgb_image, (size, size), interpolation=cv2.INTER_CUBIC)
+
+    # Shorter side to size with PIL bicubic (antialiased, as Phase 3 load_video), then crop the middle
+    height, width = rgb_image.shape[:2]
+    if height <= width:
+        new_height, new_width = size, int(size * width / height)
+    else:
+        new_height, new_width = int(size * height / width), size
+    resized = np.asarray(Image.fromarray(rgb_image).resize((new_width, new_height), Image.Resampling.BICUBIC))
+    top = int(round((new_height - size) / 2.0))
+    left = int(round((new_width - size) / 2.0))
+    return resized[top:top + size, left:left + size]
+
+
+def extract_jpeg_payload(rawdata: bytes):
+    """
+    Return the compressed image bytes of a ROS1-serialized CompressedImage without copying.
+
+    Layout: header (seq, stamp, frame_id), format string, uint8[] data. Falls back to
+    scanning for the JPEG SOI marker (0xFFD8) if the buffer doesn't parse.
+
+    Returns:
+        memoryview of the image payload, or None if no image data is found
+    """
+    view = memoryview(rawdata)
+    try:
+        (frame_id_length,) = _UINT32.unpack_from(rawdata, 12)
+        offset = 16 + frame_id_length
+        (format_length,) = _UINT32.unpack_from(rawdata, offset)
+        offset += 4 + format_length
+        (data_length,) = _UINT32.unpack_from(rawdata, offset)
+        offset += 4
+        if data_length and offset + data_length == len(rawdata):
+            return view[offset:]
+    except struct.error:
+        pass
+
+    jpeg_start = rawdata.find(b'\xff\xd8')
+    return view[jpeg_start:] if jpeg_start != -1 else None
+
+
+class CameraFrameSink:
+    """Per-camera destination for CompressedImage messages read in a single bag pass"""
+
+    def __init__(self, topic: str, output_dir: str):
+        self.topic = topic
+        self.output_dir = output_dir
+        self.frame_paths = []
+        self.message_count = 0
+
+    def write(self, timestamp: int, rawdata: bytes) -> None:
+        """Decode one CompressedImage payload and save it as a frame (timestamp in ns)"""
+        self.message_count += 1
+
+        jpeg_data = extract_jpeg_payload(rawdata)
+        if jpeg_data is None:
+            print(f"   {self.topic} message {self.message_count}: No JPEG SOI marker found in rawdata")
+            return
+
+        np_arr = np.frombuffer(jpeg_data, np.uint8)
+        cv_image = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
+        if cv_image is None:
+            print(f"   {self.topic} message {self.message_count}: OpenCV decode FAILED - invalid JPEG data")
+            return
+
+        timestamp_sec = timestamp / 1e9  # Convert from nanoseconds
+        frame_path = os.path.join(self.output_dir, f"frame_{len(self.frame_paths):06d}_{timestamp_sec:.6f}.jpg")
+        cv2.imwrite(frame_path, cv_image)
+        self.frame_paths.append(frame_path)
+
+    def close(self) -> None:
+        pass
+
+
+class FFmpegPipeSink:
+    """
+    Per-camera H.264 encoder fed directly with the compressed JPEG bytes from the bag.
+
+    Frames are piped into an ffmpeg image2pipe/MJPEG stdin process, so there is no
+    intermediate decode, no JPEG re-encode and no frame files on disk. All renditions
+    of the camera are encoded by the same process from a single decode.
+    """
+
+    def __init__(self, topic: str, output_video_paths: Dict[str, str], fps: int = 10, threads: int = 0):
+        self.topic = topic
+        self.output_video_paths = output_video_paths
+        self.message_count = 0
+        self.frame_count = 0
+        self.error = None
+
+        ffmpeg_cmd = [
+            'ffmpeg',
+            '-y',                                    # Overwrite output file
+            '-loglevel', 'error',                    # Keep stderr small (it is only read at exit)
+            '-f', 'image2pipe',                      # Concatenated images on stdin
+            '-c:v', 'mjpeg',                         # Input frames are JPEG
+            '-framerate', str(fps),                  # Input framerate
+            '-i', '-'                                # Read from stdin
+        ]
+        for rendition, output_video_path in output_video_paths.items():
+            ffmpeg_cmd += h264_output_args(rendition, threads) + [output_video_path]
+        # nosemgrep: dangerous-subprocess-use-audit - ffmpeg_cmd is constructed from validated paths, not user input
+        self.process = subprocess.Popen(ffmpeg_cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    def write(self, timestamp: int, rawdata: bytes) -> None:
+        """Pipe one CompressedImage payload into the encoder (timestamp in ns)"""
+        self.message_count += 1
+        if self.error:
+            return
+
+        jpeg_data = extract_jpeg_payload(rawdata)
+        if jpeg_data is None:
+            print(f"   {self.topic} message {self.message_count}: No JPEG SOI marker found in rawdata")
+            return
+
+        try:
+            self.process.stdin.write(jpeg_data)
+            self.frame_count += 1
+        except (BrokenPipeError, OSError) as e:
+            # ffmpeg exited early - the reason is reported from stderr in close()
+            self.error = f"ffmpeg stdin closed: {e}"
+
+    def close(self, timeout: int = 300) -> bool:
+        """Finish encoding and return True if every rendition produced a non-empty video"""
+        try:
+            _, stderr = self.process.communicate(timeout=timeout)
+        except ValueError:
+            # stdin already closed after a broken pipe
+            stderr = self.process.stderr.read()
+            self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.communicate()
+            self.error = f"FFmpeg encoding timed out after {timeout} seconds"
+            return False
+
+        if self.process.returncode != 0:
+            self.error = f"FFmpeg failed with return code {self.process.returncode}: {stderr.decode(errors='replace').strip()}"
+            return False
+
+        for output_video_path in self.output_video_paths.values():
+            if not self.frame_count or not os.path.exists(output_video_path) or os.path.getsize(output_video_path) == 0:
+                self.error = self.error or "FFmpeg completed but no output file created"
+                return False
+
+        return True
+
+
+class FrameSampleSink:
+    """
+    Tee in front of a camera sink that keeps only the frames Phase 3 would sample.
+
+    The camera's frame count comes from the bag index before the pass, so sample
+    indices are known up front and only those few JPEGs are decoded. Each target
+    is a (num_frames, size, size, 3) uint8 RGB array saved as .npy for np.load(mmap_mode='r').
+    """
+
+    def __init__(self, topic: str, inner, targets: Dict[str, Dict[str, object]], total_frames: int):
+        self.topic = topic
+        self.inner = inner
+        self.targets = targets
+        self.total_frames = total_frames
+        self.frame_count = 0
+
+        # frame index -> [(target name, slot in the target array)]
+        self.wanted = {}
+        self.arrays = {}
+        self.filled = {}
+        for target_name, target in targets.items():
+            size = target['input_size']
+            self.arrays[target_name] = np.zeros((target['num_frames'], size, size, 3), dtype=np.uint8)
+            self.filled[target_name] = 0
+            for slot, frame_index in enumerate(sample_frame_indices(target_name, target, total_frames)):
+                self.wanted.setdefault(frame_index, []).append((target_name, slot))
+
+    def write(self, timestamp: int, rawdata: bytes) -> None:
+        """Forward the message to the camera sink, decoding it only if it is a sampled frame"""
+        self.inner.write(timestamp, rawdata)
+
+        jpeg_data = extract_jpeg_payload(rawdata)
+        if jpeg_data is None:
+            return
+        frame_index = self.frame_count
+        self.frame_count += 1
+
+        slots = self.wanted.get(frame_index)
+        if not slots:
+            return
+
+        cv_image = cv2.imdecode(np.frombuffer(jpeg_data, np.uint8), cv2.IMREAD_COLOR)
+        if cv_image is None:
+            return
+        rgb_image = cv2.cvtColor(cv_image, cv2.COLOR_BGR2RGB)
+        for target_name, slot in slots:
+            self.arrays[target_name][slot] = resize_for_target(rgb_image, self.targets[target_name])
+            self.filled[target_name] += 1
+
+    def is_complete(self, encoded_frames: int) -> bool:
+        """True if every sampled frame was captured and the video has the frame count sampling assumed"""
+        return (self.total_frames > 0 and self.frame_count == self.total_frames == encoded_frames
+                and all(self.filled[name] == target['num_frames'] for name, target in self.targets.items()))
+
+    def save(self, output_dir: str, camera_name: str) -> Dict[str, str]:
+        """Write each target array as .npy and return target name -> local path"""
+        os.makedirs(output_dir, exist_ok=True)
+        paths = {}
+        for target_name, frames in self.arrays.items():
+            paths[target_name] = os.path.join(output_dir, f"{camera_name}_{target_name}.npy")
+            np.save(paths[target_name], frames)
+        return paths
+
+
 class ROSBagVideoReconstructor:
     def __init__(self):
         self.s3_client = boto3.client('s3')
@@ -22,6 +315,13 @@ class ROSBagVideoReconstructor:
         # Dynamic topic discovery - no hard-coding
         self.camera_topics = []
 
+        # Proxy (model-input) rendition URIs of the last processed scene
+        self.proxy_video_paths = {}
+
+        # Pre-sampled frame arrays of the last processed scene (PHASE2_FRAME_CACHE)
+        self.frame_samplers = {}
+        self.frame_cache_paths = {}
+
     def download_rosbag(self, scene_id: str) -> str:
         """Download ROS bag from S3 to local temporary file"""
         s3_key = os.getenv('INPUT_ROSBAG_KEY')
@@ -67,48 +367,254 @@ class ROSBagVideoReconstructor:
             print(f" Topic discovery failed: {e}")
             return []
 
-    def extract_camera_frames(self, bag_path: str, output_dir: str) -> Dict[str, List[str]]:
-        """Extract frames from all camera topics using dynamic discovery"""
+    @staticmethod
+    def camera_name_from_topic(topic: str) -> str:
+        """Extract camera name from topic dynamically"""
+        camera_name = topic.split('/')[-1].replace('image_compressed', '').replace('image_rect_compressed', '').strip('_')
+        if not camera_name:
+            camera_name = topic.split('/')[-2] if len(topic.split('/')) > 2 else topic.replace('/', '_')
+        return camera_name
+
+    def extract_camera_frames(self, bag_path: str, output_dir: str, cameras: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """Extract frames from the discovered camera topics (only the named cameras, if given)"""
         print(f" Extracting frames from: {bag_path}")
 
-        # Dynamically discover camera topics
+        # Dynamically discover camera topics (connection records only, no message reads)
         self.camera_topics = self.discover_camera_topics(bag_path)
 
         if not self.camera_topics:
             print(" No camera topics discovered in ROS bag")
             return {}
 
+        topics = [topic for topic in self.camera_topics if cameras is None or self.camera_name_from_topic(topic) in cameras]
+
         # Create output directories for each camera
         camera_dirs = {}
-        for topic in self.camera_topics:
-            # Extract camera name from topic dynamically
-            camera_name = topic.split('/')[-1].replace('image_compressed', '').replace('image_rect_compressed', '').strip('_')
-            if not camera_name:
-                camera_name = topic.split('/')[-2] if len(topic.split('/')) > 2 else topic.replace('/', '_')
-
-            camera_dir = os.path.join(output_dir, camera_name)
+        for topic in topics:
+            camera_dir = os.path.join(output_dir, self.camera_name_from_topic(topic))
             os.makedirs(camera_dir, exist_ok=True)
             camera_dirs[topic] = camera_dir
 
-        # Extract frames using dynamic topics
+        # Single pass: read the bag once and route every camera's messages to its sink
+        try:
+            topic_frames = self.extract_frames_single_pass(bag_path, camera_dirs)
+        except Exception as e:
+            print(f" Single-pass extraction failed, falling back to per-topic extraction: {e}")
+            topic_frames = None
+            self.frame_samplers = {}  # Per-topic extraction doesn't sample model frames
+
         frame_paths = {}
 
-        for topic in self.camera_topics:
-            camera_name = topic.split('/')[-1].replace('image_compressed', '').replace('image_rect_compressed', '').strip('_')
-            if not camera_name:
-                camera_name = topic.split('/')[-2] if len(topic.split('/')) > 2 else topic.replace('/', '_')
+        for topic in topics:
+            camera_name = self.camera_name_from_topic(topic)
 
-            camera_dir = camera_dirs[topic]
-            print(f"Processing camera: {camera_name} (topic: {topic})")
+            if topic_frames is not None:
+                frame_paths[camera_name] = topic_frames.get(topic, [])
+                continue
 
+            print(f"Processing camera: {camera_name} (topic: {topic})")
             try:
-                frame_paths[camera_name] = self.extract_frames_python(bag_path, topic, camera_dir)
+                frame_paths[camera_name] = self.extract_frames_python(bag_path, topic, camera_dirs[topic])
             except Exception as e:
                 print(f" Frame extraction failed for {camera_name}: {e}")
                 frame_paths[camera_name] = []
 
         return frame_paths
 
+    def read_camera_streams(self, bag_path: str, sinks: Dict[str, object]) -> None:
+        """
+        Read the bag once, routing each camera topic's CompressedImage messages to its sink
+
+        With PHASE2_FRAME_CACHE enabled each sink is fronted by a FrameSampleSink
+        (kept in self.frame_samplers by topic) that captures Phase 3's sampled frames.
+        """
+        from rosbags.rosbag1 import Reader
+
+        frame_targets = get_frame_cache_targets()
+        self.frame_samplers = {}
+
+        with Reader(bag_path) as reader:
+            # Only CompressedImage connections of the requested camera topics are read
+            camera_connections = [connection for connection in reader.connections
+                                  if connection.topic in sinks and 'CompressedImage' in str(connection.msgtype)]
+
+            if frame_targets:
+                # Frame counts from the bag index fix the sample indices before the pass
+                topic_counts = {}
+                for connection in camera_connections:
+                    topic_counts[connection.topic] = topic_counts.get(connection.topic, 0) + connection.msgcount
+                self.frame_samplers = {
+                    topic: FrameSampleSink(topic, sinks[topic], frame_targets, count)
+                    for topic, count in topic_counts.items()
+                }
+                routes = {connection.id: self.frame_samplers[connection.topic] for connection in camera_connections}
+            else:
+                routes = {connection.id: sinks[connection.topic] for connection in camera_connections}
+
+            if camera_connections:
+                for connection, timestamp, rawdata in reader.messages(connections=camera_connections):
+                    routes[connection.id].write(timestamp, rawdata)
+
+    def extract_frames_single_pass(self, bag_path: str, camera_dirs: Dict[str, str]) -> Dict[str, List[str]]:
+        """Extract frames for all camera topics in one read of the bag, routing messages by topic"""
+        print(f" Single-pass extraction of {len(camera_dirs)} cameras")
+
+        sinks = {topic: CameraFrameSink(topic, camera_dir) for topic, camera_dir in camera_dirs.items()}
+        self.read_camera_streams(bag_path, sinks)
+
+        for sink in sinks.values():
+            sink.close()
+            print(f"   {sink.topic}: {sink.message_count} messages, {len(sink.frame_paths)} frames extracted")
+
+        return {topic: sink.frame_paths for topic, sink in sinks.items()}
+
+    def encode_videos_streaming(self, bag_path: str, videos_dir: str, scene_id: str, renditions: List[str],
+                                fps: int = 10, on_video_ready=None) -> Tuple[Dict[str, Dict[str, str]], Dict[str, int], List[str]]:
+        """
+        Encode every camera to H.264 in one bag pass by piping JPEG bytes straight into ffmpeg
+
+        All camera encoders run concurrently; x264 threads are bounded so together they
+        use about one thread per core. on_video_ready(camera_name, rendition, video_path)
+        is called for a camera's videos as soon as its own encoder succeeds.
+
+        Returns:
+            (camera name -> {rendition: local video path}, camera name -> frame count,
+            cameras whose encode failed and need the frame-extraction fallback);
+            raises, with no video handed off, if the bag pass itself fails
+        """
+        self.camera_topics = self.discover_camera_topics(bag_path)
+        if not self.camera_topics:
+            print(" No camera topics discovered in ROS bag")
+            return {}, {}, []
+
+        threads = max(1, (os.cpu_count() or 1) // (len(self.camera_topics) * len(renditions)))
+        print(f" Streaming {len(self.camera_topics)} cameras into ffmpeg ({', '.join(renditions)}, {threads} threads each)")
+
+        sinks = {}
+        try:
+            for topic in self.camera_topics:
+                camera_name = self.camera_name_from_topic(topic)
+                output_paths = {
+                    rendition: os.path.join(videos_dir, rendition, f"{camera_name}_scene_{scene_id}.mp4")
+                    for rendition in renditions
+                }
+                for output_path in output_paths.values():
+                    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                sinks[topic] = FFmpegPipeSink(topic, output_paths, fps, threads)
+
+            self.read_camera_streams(bag_path, sinks)
+        except Exception:
+            for sink in sinks.values():
+                sink.close()
+            raise
+
+        # Each camera is handed off as soon as its own encoder finishes. A failed camera is
+        # not handed off: the fallback re-encodes only that camera, into its own paths, once
+        # its ffmpeg process has exited, so no upload races an overwrite
+        video_paths = {}
+        frame_counts = {}
+        failed_cameras = []
+        with ThreadPoolExecutor(max_workers=len(sinks)) as pool:
+            closes = {pool.submit(sink.close): topic for topic, sink in sinks.items()}
+            for future in as_completed(closes):
+                sink = sinks[closes[future]]
+                camera_name = self.camera_name_from_topic(sink.topic)
+                frame_counts[camera_name] = sink.frame_count
+                try:
+                    encoded = future.result()
+                except Exception as e:
+                    sink.error = sink.error or str(e)
+                    encoded = False
+
+                if encoded:
+                    video_paths[camera_name] = sink.output_video_paths
+                    print(f" SUCCESS: {camera_name}: {sink.frame_count} frames encoded")
+                    if on_video_ready:
+                        for rendition, video_path in sink.output_video_paths.items():
+                            on_video_ready(camera_name, rendition, video_path)
+                elif sink.frame_count:
+                    print(f" Streaming encode failed for {camera_name}: {sink.error}")
+                    failed_cameras.append(camera_name)
+
+        return video_paths, frame_counts, failed_cameras
+
+    def encode_videos_from_frames(self, camera_frames: Dict[str, List[str]], videos_dir: str, scene_id: str,
+                                  renditions: List[str], on_video_ready=None) -> Dict[str, Dict[str, str]]:
+        """
+        Encode each camera/rendition from extracted frames in a bounded worker pool
+
+        Pool size is PHASE2_ENCODE_WORKERS (default: cores, at most one job per camera
+        and rendition). on_video_ready is called as each encode finishes.
+        """
+        jobs = []
+        for camera_name, frame_paths in camera_frames.items():
+            if not frame_paths:
+                continue
+            for rendition in renditions:
+                video_path = os.path.join(videos_dir, rendition, f"{camera_name}_scene_{scene_id}.mp4")
+                os.makedirs(os.path.dirname(video_path), exist_ok=True)
+                jobs.append((camera_name, rendition, frame_paths, video_path))
+
+        if not jobs:
+            return {}
+
+        workers = int(os.getenv('PHASE2_ENCODE_WORKERS', str(min(len(jobs), os.cpu_count() or 1))))
+        video_paths = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(self.create_video_from_frames, frame_paths, video_path, 10, rendition): (camera_name, rendition, video_path)
+                for camera_name, rendition, frame_paths, video_path in jobs
+            }
+            for future in as_completed(futures):
+                camera_name, rendition, video_path = futures[future]
+                if future.result():
+                    video_paths.setdefault(camera_name, {})[rendition] = video_path
+                    if on_video_ready:
+                        on_video_ready(camera_name, rendition, video_path)
+
+        return video_paths
+
+    def upload_video(self, scene_id: str, camera_name: str, rendition: str, video_path: str) -> Optional[str]:
+        """Upload one rendition to processed-videos/ and return its S3 URI (None on failure)"""
+        prefix = f"processed-videos/scene-{scene_id.zfill(4)}"
+        s3_key = f"{prefix}/{camera_name}.mp4" if rendition == 'web' else f"{prefix}/{rendition}/{camera_name}.mp4"
+        try:
+            self.s3_client.upload_file(video_path, self.bucket_name, s3_key)
+            print(f"Uploaded: {s3_key}")
+            return f"s3://{self.bucket_name}/{s3_key}"
+        except Exception as e:
+            print(f" Upload failed for {camera_name} ({rendition}): {e}")
+            return None
+
+    def upload_frame_cache(self, scene_id: str, frame_counts: Dict[str, int], output_dir: str) -> Dict[str, Dict[str, str]]:
+        """
+        Save and upload the pre-sampled frame arrays of the last bag pass
+
+        Cameras whose sampled frames are incomplete, or whose encoded frame count differs
+        from the bag index count used for sampling, are skipped (Phase 3 decodes their video).
+
+        Returns:
+            camera name -> {target name: S3 URI} of processed-videos/scene-XXXX/frames/{camera}_{target}.npy
+        """
+        cache_uris = {}
+        for topic, sampler in self.frame_samplers.items():
+            camera_name = self.camera_name_from_topic(topic)
+            if not sampler.is_complete(frame_counts.get(camera_name, 0)):
+                print(f" Frame cache skipped for {camera_name}: sampled frames don't match the encoded video")
+                continue
+
+            for target_name, local_path in sampler.save(output_dir, camera_name).items():
+                s3_key = f"processed-videos/scene-{scene_id.zfill(4)}/frames/{camera_name}_{target_name}.npy"
+                try:
+                    self.s3_client.upload_file(local_path, self.bucket_name, s3_key)
+                    cache_uris.setdefault(camera_name, {})[target_name] = f"s3://{self.bucket_name}/{s3_key}"
+                except Exception as e:
+                    print(f" Frame cache upload failed for {camera_name} ({target_name}): {e}")
+
+        if cache_uris:
+            print(f" Frame cache uploaded for {len(cache_uris)} cameras")
+        return cache_uris
+
     def extract_frames_python(self, bag_path: str, topic: str, output_dir: str) -> List[str]:
         """Extract frames using Python rosbag library"""
         # Try rosbag first (ROS1 library)
@@ -271,7 +777,8 @@ class ROSBagVideoReconstructor:
         print(f" Created {len(frame_paths)} test frames for {topic}")
         return frame_paths
 
-    def create_video_from_frames(self, frame_paths: List[str], output_video_path: str, fps: int = 10) -> bool:
+    def create_video_from_frames(self, frame_paths: List[str], output_video_path: str, fps: int = 10,
+                                 rendition: str = 'web') -> bool:
         """Create H.264 MP4 video from frame sequence for cross-browser compatibility"""
         if not frame_paths:
             print(" No frames to create video")
@@ -280,7 +787,7 @@ class ROSBagVideoReconstructor:
         print(f" Creating H.264 video: {output_video_path}")
 
         # Try FFmpeg H.264 method first (best cross-browser compatibility)
-        if self._create_video_ffmpeg_h264(frame_paths, output_video_path, fps):
+        if self._create_video_ffmpeg_h264(frame_paths, output_video_path, fps, rendition):
             return True
 
         print(" FFmpeg method failed, trying OpenCV H.264 fallback...")
@@ -288,7 +795,8 @@ class ROSBagVideoReconstructor:
         # Fallback to OpenCV with H.264 codec
         return self._create_video_opencv_h264(frame_paths, output_video_path, fps)
 
-    def _create_video_ffmpeg_h264(self, frame_paths: List[str], output_video_path: str, fps: int) -> bool:
+    def _create_video_ffmpeg_h264(self, frame_paths: List[str], output_video_path: str, fps: int,
+                                  rendition: str = 'web') -> bool:
         """Create H.264 video using FFmpeg for best browser compatibility"""
         try:
             # Get frame directory for FFmpeg glob pattern
@@ -302,11 +810,7 @@ class ROSBagVideoReconstructor:
                 '-framerate', str(fps),                  # Input framerate
                 '-pattern_type', 'glob',                 # Use glob pattern matching
                 '-i', os.path.join(temp_dir, '*.jpg'),   # Input pattern for all JPG frames
-                '-c:v', 'libx264',                       # H.264 codec (universal browser support)
-                '-pix_fmt', 'yuv420p',                   # Pixel format for web compatibility
-                '-movflags', '+faststart',               # Optimize for web streaming
-                '-preset', 'medium',                     # Balance encoding speed vs quality
-                '-crf', '23',                           # Constant rate factor for good quality
+                *h264_output_args(rendition),            # H.264 settings for this output purpose
                 output_video_path
             ]
 
@@ -415,33 +919,74 @@ class ROSBagVideoReconstructor:
             # Step 1: Download ROS bag
             bag_path = self.download_rosbag(scene_id)
 
-            # Step 2: Extract frames
-            frames_dir = os.path.join(output_base, "frames")
-            os.makedirs(frames_dir, exist_ok=True)
-
-            camera_frames = self.extract_camera_frames(bag_path, frames_dir)
-
-            # Step 3: Create videos for each camera
             videos_dir = os.path.join(output_base, "videos")
             os.makedirs(videos_dir, exist_ok=True)
+            renditions = get_encode_renditions()
 
-            video_paths = {}
-            for camera_name, frame_paths in camera_frames.items():
-                if frame_paths:
-                    video_path = os.path.join(videos_dir, f"{camera_name}_scene_{scene_id}.mp4")
-                    if self.create_video_from_frames(frame_paths, video_path):
-                        video_paths[camera_name] = video_path
-
-            # Step 4: Upload videos to S3
-            s3_video_paths = {}
-            for camera_name, video_path in video_paths.items():
-                s3_key = f"processed-videos/scene-{scene_id.zfill(4)}/{camera_name}.mp4"
-                try:
-                    self.s3_client.upload_file(video_path, self.bucket_name, s3_key)
-                    s3_video_paths[camera_name] = f"s3://{self.bucket_name}/{s3_key}"
-                    print(f"Uploaded: {s3_key}")
-                except Exception as e:
-                    print(f" Upload failed for {camera_name}: {e}")
+            # Step 4 overlaps steps 2-3: each video is uploaded as soon as its encode finishes
+            # (one upload slot per camera and rendition)
+            rendition_uris = {rendition: {} for rendition in renditions}
+            camera_count = max(1, len(self.discover_camera_topics(bag_path)))
+            uploader = ThreadPoolExecutor(max_workers=camera_count * len(renditions))
+            uploads = []
+
+            def on_video_ready(camera_name: str, rendition: str, video_path: str) -> None:
+                future = uploader.submit(self.upload_video, scene_id, camera_name, rendition, video_path)
+                uploads.append((camera_name, rendition, future))
+
+            try:
+                # Steps 2-3 (streaming): pipe JPEG bytes from the bag straight into ffmpeg
+                video_paths = None
+                frame_counts = {}
+                failed_cameras = []
+                if os.getenv('PHASE2_ENCODE_MODE', 'stream').lower() == 'stream':
+                    try:
+                        video_paths, frame_counts, failed_cameras = self.encode_videos_streaming(
+                            bag_path, videos_dir, scene_id, renditions, on_video_ready=on_video_ready
+                        )
+                    except Exception as e:
+                        print(f" Streaming encode failed, falling back to frame extraction: {e}")
+                        video_paths = None
+
+                if video_paths is None or failed_cameras:
+                    # Step 2: Extract frames (only for the cameras streaming did not encode)
+                    retry_cameras = failed_cameras if video_paths is not None else None
+                    if retry_cameras:
+                        print(f" Re-encoding {', '.join(retry_cameras)} from extracted frames")
+                    stream_samplers = self.frame_samplers if video_paths is not None else {}
+                    frames_dir = os.path.join(output_base, "frames")
+                    os.makedirs(frames_dir, exist_ok=True)
+
+                    camera_frames = self.extract_camera_frames(bag_path, frames_dir, cameras=retry_cameras)
+                    frame_counts.update({cam: len(frames) for cam, frames in camera_frames.items()})
+                    # The streaming pass already sampled model frames for every camera
+                    self.frame_samplers = {**self.frame_samplers, **stream_samplers}
+
+                    # Step 3: Create videos for each camera (bounded parallel encodes)
+                    video_paths = {
+                        **(video_paths or {}),
+                        **self.encode_videos_from_frames(
+                            camera_frames, videos_dir, scene_id, renditions, on_video_ready=on_video_ready
+                        )
+                    }
+
+                # Step 4: Collect uploads to S3
+                for camera_name, rendition, future in uploads:
+                    s3_uri = future.result()
+                    if s3_uri:
+                        rendition_uris[rendition][camera_name] = s3_uri
+            finally:
+                uploader.shutdown(wait=True)
+
+            s3_video_paths = rendition_uris['web']
+            self.proxy_video_paths = rendition_uris.get('proxy', {})
+
+            # Step 4b: Model-ready frame arrays (only for cameras whose web video uploaded)
+            self.frame_cache_paths = {
+                camera_name: uris
+                for camera_name, uris in self.upload_frame_cache(scene_id, frame_counts, os.path.join(output_base, "frame_cache")).items()
+                if camera_name in s3_video_paths
+            }
 
             # Step 5: Create metadata
             metadata = {
@@ -449,7 +994,9 @@ class ROSBagVideoReconstructor:
                 "processed_timestamp": datetime.now().isoformat(),
                 "cameras": list(s3_video_paths.keys()),
                 "video_paths": s3_video_paths,
-                "frame_counts": {cam: len(frames) for cam, frames in camera_frames.items()},
+                "model_video_paths": self.proxy_video_paths,
+                "frame_cache_paths": self.frame_cache_paths,
+                "frame_counts": frame_counts,
                 "status": "completed"
             }
 
@@ -517,6 +1064,13 @@ def main():
                 "video_paths": result,
                 "status": "SUCCESS"
             }
+            if reconstructor.proxy_video_paths:
+                # Fast proxy renditions for model input (same camera keys as video_paths)
+                phase2_output["model_video_paths"] = reconstructor.proxy_video_paths
+            if reconstructor.frame_cache_paths:
+                # Pre-sampled uint8 frame arrays for Phase 3 (same camera keys as video_paths)
+                phase2_output["frame_cache_paths"] = reconstructor.frame_cache_paths
+                phase2_output["frame_cache_config"] = get_frame_cache_targets()
 
             # Upload Phase 2 output JSON to S3
             output_json = json.dumps(phase2_output, indent=2)
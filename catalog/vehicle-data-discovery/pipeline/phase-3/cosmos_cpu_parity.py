@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Fleet Discovery Studio - Cosmos-Embed1 CPU Parity Check
+Compares CPU int8 (dynamic quantization) Cosmos-Embed1 video embeddings against FP32.
+
+Both models run on CPU over the same sampled frames, so the check needs no GPU.
+Exits non-zero if any video's cosine similarity falls below COSMOS_PARITY_MIN_COSINE.
+
+Usage:
+    COSMOS_PARITY_MIN_COSINE=0.99 python3 cosmos_cpu_parity.py video1.mp4 [video2.mp4 ...]
+"""
+
+import os
+import sys
+import time
+import logging
+
+import torch
+
+# Analyzer module creates AWS clients at import time
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-west-2')
+
+import internvideo25_behavioral_analyzer as analyzer
+
+logger = logging.getLogger(__name__)
+
+
+def embed_frames(label: str, model, processor, frames_by_video: dict) -> dict:
+    """Embed every video's frames with one model and report the mean time per video"""
+    embeddings = {}
+    start = time.perf_counter()
+    for video_path, frames in frames_by_video.items():
+        embeddings[video_path] = analyzer.cosmos_embed_video(video_path, frames=frames, model=model, processor=processor)
+    elapsed = (time.perf_counter() - start) / max(1, len(frames_by_video))
+    print(f"{label:<6} {elapsed:8.2f}s per video")
+    return embeddings
+
+
+def main():
+    video_paths = sys.argv[1:]
+    if not video_paths:
+        print(__doc__)
+        sys.exit(2)
+
+    min_cosine = float(os.getenv('COSMOS_PARITY_MIN_COSINE', '0.99'))
+    model_name = os.getenv('COSMOS_MODEL_PATH', 'nvidia/Cosmos-Embed1-448p')
+
+    # Keep the report free of the analyzer's per-video debug logging
+    logging.getLogger(analyzer.__name__).setLevel(logging.WARNING)
+
+    from transformers import AutoProcessor
+    processor = AutoProcessor.from_pretrained(model_name, trust_remote_code=True)
+
+    # Same 8-frame grid and 448x448 resize as the pipeline, decoded once per video
+    frames_by_video = {
+        video_path: analyzer.resize_cosmos_frames(
+            analyzer.decode_sampled_frames(video_path, {'cosmos': analyzer.get_cosmos_frame_indices})['cosmos']
+        )
+        for video_path in video_paths
+    }
+
+    reference = embed_frames('fp32', analyzer.build_cosmos_embed1_model(model_name, 'cpu'), processor, frames_by_video)
+    quantized = embed_frames('int8', analyzer.build_cosmos_embed1_model(model_name, 'cpu', 'int8'), processor, frames_by_video)
+
+    failures = 0
+    for video_path in video_paths:
+        if reference[video_path] is None or quantized[video_path] is None:
+            print(f"FAIL   {video_path}: embedding failed")
+            failures += 1
+            continue
+
+        cosine = torch.nn.functional.cosine_similarity(
+            reference[video_path].float(), quantized[video_path].float(), dim=0
+        ).item()
+        status = "OK" if cosine >= min_cosine else "FAIL"
+        failures += status == "FAIL"
+        print(f"{status:<6} {video_path}: cosine {cosine:.5f} (min {min_cosine})")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,18 +16,29 @@ import os
 import sys
 import json
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
 import logging
 import re
 import gc
+import glob
+import hashlib
+import resource
+import threading
+import time
 import torch
 import numpy as np
 import cv2
 import torchvision.transforms as T
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Callable, List, Optional, Tuple
 from decord import VideoReader, cpu
 from PIL import Image
-from transformers import AutoModel, AutoTokenizer, BitsAndBytesConfig
+from transformers import AutoModel, AutoTokenizer, BitsAndBytesConfig, StoppingCriteria, StoppingCriteriaList
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -48,14 +59,73 @@ except ImportError as e:
 _aws_region = os.environ.get('AWS_REGION', os.environ.get('AWS_DEFAULT_REGION', 'us-west-2'))
 s3_client = boto3.client('s3')
 sfn_client = boto3.client('stepfunctions')
+# get_activity_task holds the connection for up to 60s; AWS requires a read timeout of at least 65s
+sfn_activity_client = boto3.client('stepfunctions', config=Config(read_timeout=70))
 bedrock_client = boto3.client('bedrock-runtime', region_name=_aws_region)
 
 # Global Cosmos-Embed1 model (loaded after InternVideo2.5 unloaded for memory management)
 COSMOS_MODEL = None
 COSMOS_PROCESSOR = None
 
+# Global InternVideo2.5 model, only kept across scenes in worker mode (PHASE3_WORKER_MODE=true)
+INTERNVIDEO_MODEL = None
+INTERNVIDEO_TOKENIZER = None
+INTERNVIDEO_WARMED_UP = False
+
+def worker_mode_enabled() -> bool:
+    """Worker mode keeps both models resident and processes scene jobs until idle"""
+    return os.getenv('PHASE3_WORKER_MODE', 'false').lower() == 'true'
+
+def resolve_local_weights(model_path: str) -> str:
+    """
+    Local safetensors copy of a HuggingFace model under MODEL_WEIGHTS_DIR
+
+    The first call snapshots the safetensors shards, configs and remote code into
+    MODEL_WEIGHTS_DIR/<org>--<name>; later loads read that directory directly and
+    from_pretrained memory-maps the shards instead of resolving the hub cache each time.
+
+    Args:
+        model_path: HuggingFace id or local path
+    Returns:
+        Local model directory, or model_path unchanged when the cache is disabled or unusable
+    """
+    weights_root = os.getenv('MODEL_WEIGHTS_DIR', '')
+    if not weights_root or os.path.isdir(model_path):
+        return model_path
+
+    local_dir = os.path.join(weights_root, model_path.replace('/', '--'))
+    complete_marker = os.path.join(local_dir, '.complete')
+    if os.path.exists(complete_marker):
+        logger.info(f"Using local safetensors weights: {local_dir}")
+        return local_dir
+
+    try:
+        from huggingface_hub import snapshot_download
+        logger.info(f"Caching {model_path} safetensors weights in {local_dir}...")
+        snapshot_download(
+            repo_id=model_path,
+            local_dir=local_dir,
+            cache_dir=os.getenv('HUGGINGFACE_HUB_CACHE', '/opt/hf_cache'),
+            allow_patterns=['*.safetensors', '*.json', '*.py', '*.model', '*.txt', '*.tiktoken']
+        )
+        if not glob.glob(os.path.join(local_dir, '*.safetensors')):
+            logger.warning(f"{model_path} has no safetensors weights - loading from the hub cache")
+            return model_path
+
+        open(complete_marker, 'w').close()
+        return local_dir
+
+    except Exception as e:
+        logger.warning(f"Could not cache {model_path} weights locally ({e}) - loading from the hub cache")
+        return model_path
+
 def unload_internvideo25_model(model, tokenizer):
     """Explicitly unload InternVideo2.5 model to free GPU memory for Cosmos"""
+    global INTERNVIDEO_MODEL, INTERNVIDEO_TOKENIZER, INTERNVIDEO_WARMED_UP
+    INTERNVIDEO_MODEL = None
+    INTERNVIDEO_TOKENIZER = None
+    INTERNVIDEO_WARMED_UP = False
+
     try:
         if model is not None:
             # Move model to CPU and delete references
@@ -78,8 +148,43 @@ def unload_internvideo25_model(model, tokenizer):
     except Exception as e:
         logger.warning(f"Error during InternVideo2.5 cleanup: {str(e)}")
 
+def get_cosmos_device() -> str:
+    """Cosmos-Embed1 device from COSMOS_DEVICE: 'cuda', 'cpu' or 'auto' (default: cuda when available)"""
+    device = os.getenv('COSMOS_DEVICE', 'auto').lower()
+    if device == 'auto':
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    return device
+
+def build_cosmos_embed1_model(model_name: str, device: str, quantize: str = 'none'):
+    """
+    Load Cosmos-Embed1 for a device
+
+    Args:
+        model_name: HuggingFace id or local path
+        device: 'cuda' (BF16) or 'cpu' (FP32)
+        quantize: 'int8' applies dynamic int8 quantization to the Linear layers (CPU only)
+    Returns:
+        Model in eval mode
+    """
+    model = AutoModel.from_pretrained(model_name, trust_remote_code=True)
+    if device == 'cuda':
+        # Load model with proper CUDA/BF16 configuration
+        return model.to("cuda", dtype=torch.bfloat16).eval()
+
+    model = model.to("cpu", dtype=torch.float32).eval()
+    if quantize == 'int8':
+        # Weights stored as int8, activations quantized on the fly per batch
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
 def load_cosmos_embed1_model():
-    """Load NVIDIA Cosmos-Embed1-448p model (768-dim output, matches Cohere)"""
+    """
+    Load NVIDIA Cosmos-Embed1-448p model (768-dim output, matches Cohere)
+
+    Runs on GPU (BF16) when available. On CPU (COSMOS_DEVICE=cpu or no GPU) it runs in FP32 with
+    int8 dynamic quantization of the Linear layers unless COSMOS_CPU_QUANTIZE=none; see
+    cosmos_cpu_parity.py for the int8-vs-FP32 embedding check.
+    """
     global COSMOS_MODEL, COSMOS_PROCESSOR
 
     if not COSMOS_AVAILABLE:
@@ -91,9 +196,11 @@ def load_cosmos_embed1_model():
         return COSMOS_MODEL, COSMOS_PROCESSOR
 
     try:
-        logger.info("Loading NVIDIA Cosmos-Embed1-448p model (768-dim output)...")
+        device = get_cosmos_device()
+        quantize = os.getenv('COSMOS_CPU_QUANTIZE', 'int8').lower() if device == 'cpu' else 'none'
+        logger.info(f"Loading NVIDIA Cosmos-Embed1-448p model (768-dim output) on {device} (quantization: {quantize})...")
 
-        model_name = os.getenv('COSMOS_MODEL_PATH', 'nvidia/Cosmos-Embed1-448p')
+        model_name = resolve_local_weights(os.getenv('COSMOS_MODEL_PATH', 'nvidia/Cosmos-Embed1-448p'))
 
         # Load processor first
         from transformers import AutoProcessor
@@ -102,11 +209,7 @@ def load_cosmos_embed1_model():
             trust_remote_code=True
         )
 
-        # Load model with proper CUDA/BF16 configuration
-        COSMOS_MODEL = AutoModel.from_pretrained(
-            model_name,
-            trust_remote_code=True
-        ).to("cuda", dtype=torch.bfloat16)
+        COSMOS_MODEL = build_cosmos_embed1_model(model_name, device, quantize)
 
         logger.info("Cosmos-Embed1 model loaded successfully (768-dim output)")
         return COSMOS_MODEL, COSMOS_PROCESSOR
@@ -117,12 +220,15 @@ def load_cosmos_embed1_model():
         COSMOS_PROCESSOR = None
         return None, None
 
-def cosmos_embed_video(video_path: str) -> Optional[torch.Tensor]:
+def cosmos_embed_video(video_path: str, frames: Optional[np.ndarray] = None, model=None, processor=None) -> Optional[torch.Tensor]:
     """
     Generate video embedding using NVIDIA Cosmos-Embed1-448p
 
     Args:
         video_path: Path to video file
+        frames: 8x448x448x3 uint8 RGB frames already sampled from the video (skips decoding)
+        model: Cosmos-Embed1 model to use instead of the global one (e.g. for parity checks)
+        processor: Processor to use with model
 
     Returns:
         768-dimensional video embedding tensor (L2-normalized) or None if failed
@@ -132,36 +238,44 @@ def cosmos_embed_video(video_path: str) -> Optional[torch.Tensor]:
         return None
 
     try:
-        model, processor = load_cosmos_embed1_model()
+        if model is None or processor is None:
+            model, processor = load_cosmos_embed1_model()
         if model is None or processor is None:
             logger.warning("Cosmos model not available")
             return None
 
         logger.info(f"Generating Cosmos video embedding for: {video_path}")
 
-        # Read video and extract exactly 8 frames (Cosmos requirement)
-        cap = cv2.VideoCapture(video_path)
-        frames = []
+        if frames is not None:
+            # Shared with the InternVideo2.5 decode of the same video
+            frames = list(frames)
+        elif video_path.endswith('.npy'):
+            # Phase 2 frame cache: 8 evenly spaced frames already at 448x448 RGB
+            frames = list(load_frame_cache(video_path, 8, 448))
+        else:
+            # Read video and extract exactly 8 frames (Cosmos requirement)
+            cap = cv2.VideoCapture(video_path)
+            frames = []
 
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
 
-        # Extract exactly 8 frames evenly distributed
-        frame_indices = np.linspace(0, total_frames-1, 8, dtype=int)
+            # Extract exactly 8 frames evenly distributed
+            frame_indices = np.linspace(0, total_frames-1, 8, dtype=int)
 
-        for frame_idx in frame_indices:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-            ret, frame = cap.read()
-            if not ret:
-                break
+            for frame_idx in frame_indices:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+                ret, frame = cap.read()
+                if not ret:
+                    break
 
-            # Convert BGR to RGB and resize to 448x448
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame_resized = cv2.resize(frame_rgb, (448, 448), interpolation=cv2.INTER_CUBIC)
+                # Convert BGR to RGB and resize to 448x448
+                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                frame_resized = cv2.resize(frame_rgb, (448, 448), interpolation=cv2.INTER_CUBIC)
 
-            # Keep as numpy array for BTCHW tensor conversion (Cosmos expects [0-255] uint8)
-            frames.append(frame_resized)
+                # Keep as numpy array for BTCHW tensor conversion (Cosmos expects [0-255] uint8)
+                frames.append(frame_resized)
 
-        cap.release()
+            cap.release()
 
         if len(frames) != 8:
             logger.error(f"Expected 8 frames, got {len(frames)}")
@@ -256,8 +370,9 @@ def cosmos_embed_video(video_path: str) -> Optional[torch.Tensor]:
 
         logger.info(f"=== COSMOS PROCESSOR DEBUG END ===")
 
-        # Move pixel_values to device
-        pixel_values = pixel_values.to("cuda", dtype=torch.bfloat16)
+        # Move pixel_values to the model's device (CUDA/BF16, or CPU/FP32 for the CPU path)
+        model_parameter = next(model.parameters())
+        pixel_values = pixel_values.to(model_parameter.device, dtype=model_parameter.dtype)
 
         # Generate embedding using video input
         with torch.no_grad():
@@ -324,13 +439,18 @@ def extract_camera_name_from_uri(uri: str) -> str:
 
 # Discovery-Based architecture uses dense scene understanding instead of Rule-Based metrics
 
-def load_video(video_path: str, num_segments: int = None, input_size: int = None) -> Tuple[torch.Tensor, List[int]]:
+def load_video(video_path: str, num_segments: int = None, input_size: int = None,
+               shared_frames: Optional[Dict[str, np.ndarray]] = None,
+               timings: Optional[Dict[str, Any]] = None) -> Tuple[torch.Tensor, List[int]]:
     """
     Load video using InternVideo2.5 standard method - Returns pixel_values and num_patches_list
     Args:
         video_path: Path to video file
         num_segments: Number of frames to extract (from env var or default)
         input_size: Frame resize dimension (from env var or default)
+        shared_frames: If given, the Cosmos-Embed1 frames (8x448x448x3 uint8) are drawn from
+            the same decode and stored under 'cosmos', so the video is never decoded twice
+        timings: If given, 'decode' and 'preprocess' wall times are added to it
     Returns:
         Tuple of (pixel_values, num_patches_list) for InternVideo2.5
         ALWAYS returns a tuple even on failure to maintain contract
@@ -346,32 +466,38 @@ def load_video(video_path: str, num_segments: int = None, input_size: int = None
         if not os.path.exists(video_path):
             raise FileNotFoundError(f"Video file not found: {video_path}")
 
-        # InternVideo2.5 video loading
-        vr = VideoReader(video_path, ctx=cpu(0), num_threads=1)
-        num_frames = len(vr)
-        frame_indices = get_index(num_frames, num_segments)
-
-        logger.info(f"Video: {num_frames} frames, sampling {len(frame_indices)} segments")
-
-        if num_frames == 0:
-            raise ValueError(f"Video file has no frames: {video_path}")
-
         # InternVideo2.5 transforms
         mean = (0.485, 0.456, 0.406)
         std = (0.229, 0.224, 0.225)
-        transform = T.Compose([
-            T.Lambda(lambda x: x.float().div(255.0)),
-            T.Resize(resolution, interpolation=T.InterpolationMode.BICUBIC),
-            T.CenterCrop(resolution),
-            T.Normalize(mean, std)
-        ])
-
-        # InternVideo2.5 batch processing with Decord compatibility
-        raw_frames = vr.get_batch(frame_indices)
-        frames = raw_frames.asnumpy()  # Convert NDArray → np.ndarray
-        frames = torch.from_numpy(frames)                # Convert np.ndarray → torch.Tensor
-        frames = frames.permute(0, 3, 1, 2)   # NHWC -> NCHW (now works on tensor)
+
+        decode_start = time.perf_counter()
+        if video_path.endswith('.npy'):
+            # Phase 2 frame cache: frames already sampled with get_index, resized and center-cropped
+            frames = torch.from_numpy(load_frame_cache(video_path, num_segments, resolution)).permute(0, 3, 1, 2)
+            logger.info(f"Frame cache: {len(frames)} pre-sampled frames at {resolution}x{resolution}")
+            transform = T.Compose([
+                T.Lambda(lambda x: x.float().div(255.0)),
+                T.Normalize(mean, std)
+            ])
+        else:
+            # InternVideo2.5 video loading: sampled frames decoded in parallel (one decode for both models)
+            sampling_grids = {'internvideo': lambda num_frames: get_index(num_frames, num_segments)}
+            if shared_frames is not None and COSMOS_AVAILABLE:
+                sampling_grids['cosmos'] = get_cosmos_frame_indices
+            decoded = decode_sampled_frames(video_path, sampling_grids)
+            if 'cosmos' in decoded:
+                shared_frames['cosmos'] = resize_cosmos_frames(decoded['cosmos'])
+            # Same resize Phase 2 applies to its frame cache, so both inputs match
+            frames = torch.from_numpy(resize_internvideo_frames(decoded['internvideo'], resolution)).permute(0, 3, 1, 2)  # NHWC -> NCHW
+            transform = T.Compose([
+                T.Lambda(lambda x: x.float().div(255.0)),
+                T.Normalize(mean, std)
+            ])
+        add_timing(timings, 'decode', time.perf_counter() - decode_start)
+
+        preprocess_start = time.perf_counter()
         pixel_values = transform(frames)      # Apply transforms to entire batch
+        add_timing(timings, 'preprocess', time.perf_counter() - preprocess_start)
 
         # Each frame is one patch in InternVideo2.5
         num_patches_list = [1] * num_segments
@@ -390,6 +516,123 @@ def load_video(video_path: str, num_segments: int = None, input_size: int = None
         logger.warning("Returning empty tensor/patches due to video loading failure")
         return empty_tensor, empty_patches
 
+def decode_sampled_frames(video_path: str, sampling_grids: Dict[str, Callable[[int], List[int]]]) -> Dict[str, np.ndarray]:
+    """
+    Decode the sampled frames of a video once, using all cores
+
+    Every sampling grid maps the video's frame count to frame indices; the union of
+    all grids is decoded in one pass and each grid gets its frames back. The indices
+    are split into contiguous chunks, each decoded by its own decord VideoReader on a
+    thread pool (decord releases the GIL while decoding), and every reader runs
+    several decoder threads. INTERNVIDEO_DECODE_WORKERS sets the number of chunks
+    (default: up to 4) and INTERNVIDEO_DECODE_THREADS the threads per reader
+    (default: cores shared by the workers of INTERNVIDEO_PREFETCH concurrently
+    decoding cameras).
+
+    Args:
+        video_path: Path to video file
+        sampling_grids: Grid name -> function(num_frames) returning frame indices
+    Returns:
+        Grid name -> (len(indices), H, W, 3) uint8 RGB array in sampling order
+    """
+    workers = max(1, int(os.getenv('INTERNVIDEO_DECODE_WORKERS', '4')))
+    concurrent_cameras = max(1, int(os.getenv('INTERNVIDEO_PREFETCH', '2')))
+    threads = int(os.getenv('INTERNVIDEO_DECODE_THREADS', '0')) or max(1, (os.cpu_count() or 1) // (workers * concurrent_cameras))
+
+    vr = VideoReader(video_path, ctx=cpu(0), num_threads=threads)
+    num_frames = len(vr)
+    if num_frames == 0:
+        raise ValueError(f"Video file has no frames: {video_path}")
+
+    grid_indices = {name: [int(index) for index in grid(num_frames)] for name, grid in sampling_grids.items()}
+    unique_indices = sorted(set(index for indices in grid_indices.values() for index in indices))
+    logger.info(f"Video: {num_frames} frames, decoding {len(unique_indices)} sampled frames for {list(grid_indices)} "
+                f"({min(workers, len(unique_indices))} workers x {threads} threads)")
+
+    chunks = [chunk.tolist() for chunk in np.array_split(np.array(unique_indices), min(workers, len(unique_indices))) if len(chunk)]
+    if len(chunks) == 1:
+        frames = vr.get_batch(unique_indices).asnumpy()
+    else:
+        def decode_chunk(chunk: List[int], reader=None) -> np.ndarray:
+            reader = reader or VideoReader(video_path, ctx=cpu(0), num_threads=threads)
+            return reader.get_batch(chunk).asnumpy()
+
+        with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+            # The reader opened for the frame count decodes the first chunk
+            futures = [pool.submit(decode_chunk, chunks[0], vr)] + [pool.submit(decode_chunk, chunk) for chunk in chunks[1:]]
+            frames = np.concatenate([future.result() for future in futures])
+
+    position = {index: i for i, index in enumerate(unique_indices)}
+    return {name: frames[[position[index] for index in indices]] for name, indices in grid_indices.items()}
+
+def get_cosmos_frame_indices(num_frames: int) -> List[int]:
+    """Cosmos-Embed1 sampling grid: exactly 8 evenly distributed frames"""
+    return np.linspace(0, num_frames - 1, 8, dtype=int).tolist()
+
+def resize_internvideo_frames(frames: np.ndarray, size: int) -> np.ndarray:
+    """
+    InternVideo2.5 resize of RGB uint8 frames: shorter side to size with PIL bicubic
+    (antialiased, as the official loader's T.Resize on PIL images), then center crop
+    """
+    height, width = frames.shape[1:3]
+    if height <= width:
+        new_height, new_width = size, int(size * width / height)
+    else:
+        new_height, new_width = int(size * height / width), size
+    top = int(round((new_height - size) / 2.0))
+    left = int(round((new_width - size) / 2.0))
+    return np.stack([
+        np.asarray(Image.fromarray(frame).resize((new_width, new_height), Image.Resampling.BICUBIC))[top:top + size, left:left + size]
+        for frame in frames
+    ])
+
+def resize_cosmos_frames(frames: np.ndarray) -> np.ndarray:
+    """Resize RGB frames to Cosmos-Embed1's 448x448 input (uint8, [0-255])"""
+    return np.stack([cv2.resize(frame, (448, 448), interpolation=cv2.INTER_CUBIC) for frame in frames])
+
+def load_frame_cache(npy_path: str, num_frames: int, input_size: int) -> np.ndarray:
+    """
+    Load a Phase 2 pre-sampled frame array ((num_frames, input_size, input_size, 3) uint8 RGB)
+
+    Args:
+        npy_path: Path to the .npy file written by Phase 2 (PHASE2_FRAME_CACHE)
+        num_frames: Expected number of sampled frames
+        input_size: Expected frame height/width
+    Returns:
+        Writable uint8 array copied out of the memory-mapped file
+    """
+    frames = np.load(npy_path, mmap_mode='r')
+    expected_shape = (num_frames, input_size, input_size, 3)
+    if frames.shape != expected_shape or frames.dtype != np.uint8:
+        raise ValueError(f"Frame cache {npy_path} has shape {frames.shape} {frames.dtype}, expected {expected_shape} uint8")
+    return np.array(frames)
+
+# Resize method per frame cache target, as recorded by Phase 2 (get_frame_cache_targets)
+FRAME_CACHE_RESIZE = {'internvideo': 'pil_bicubic', 'cosmos': 'cv2_bicubic'}
+
+def get_frame_cache_uris(phase2_data: Dict[str, Any], target_name: str, num_frames: int, input_size: int) -> Dict[str, str]:
+    """
+    Map web video URI -> Phase 2 frame cache URI for one model target
+
+    Only used when Phase 2 sampled with the same frame count, resolution and resize
+    method this run uses (resize_internvideo_frames / resize_cosmos_frames); otherwise
+    videos are decoded as usual.
+    """
+    target_config = (phase2_data.get('frame_cache_config') or {}).get(target_name) or {}
+    if (target_config.get('num_frames') != num_frames or target_config.get('input_size') != input_size
+            or target_config.get('resize') != FRAME_CACHE_RESIZE[target_name]):
+        if phase2_data.get('frame_cache_paths'):
+            logger.info(f"Phase 2 {target_name} frame cache config {target_config} doesn't match "
+                        f"{num_frames}x{input_size} ({FRAME_CACHE_RESIZE[target_name]}), decoding videos")
+        return {}
+
+    cache_paths = phase2_data.get('frame_cache_paths') or {}
+    return {
+        video_uri: cache_paths[camera_name][target_name]
+        for camera_name, video_uri in (phase2_data.get('video_paths') or {}).items()
+        if target_name in cache_paths.get(camera_name, {})
+    }
+
 def dynamic_preprocess(image, image_size=448, use_thumbnail=True, max_num=1):
     """
     Dynamic preprocessing for image tiling - InternVideo2.5 compatible
@@ -475,6 +718,11 @@ def _diagnostic_check():
 
 def load_internvideo25_model():
     """Load InternVideo2.5 model using CORRECT pattern from HuggingFace"""
+    global INTERNVIDEO_MODEL, INTERNVIDEO_TOKENIZER
+
+    if INTERNVIDEO_MODEL is not None:
+        logger.info("InternVideo2.5 model already loaded")
+        return INTERNVIDEO_MODEL, INTERNVIDEO_TOKENIZER
 
     # Run comprehensive diagnostics first
     _diagnostic_check()
@@ -500,6 +748,9 @@ def load_internvideo25_model():
         os.makedirs(cache_dir, exist_ok=True)
         logger.info(f"Using HuggingFace cache directory: {cache_dir}")
 
+        # Memory-mapped safetensors from MODEL_WEIGHTS_DIR when configured
+        model_path = resolve_local_weights(model_path)
+
         # Requires GPU with >=20GB VRAM (A10G, A100, etc.) - no quantization for best quality
         gpu_name = torch.cuda.get_device_name(0) if torch.cuda.is_available() else "Unknown"
         gpu_memory_gb = torch.cuda.get_device_properties(0).total_memory / (1024**3) if torch.cuda.is_available() else 0
@@ -530,6 +781,9 @@ def load_internvideo25_model():
         model.eval()
         logger.info("Model set to evaluation mode for inference")
 
+        if worker_mode_enabled():
+            INTERNVIDEO_MODEL, INTERNVIDEO_TOKENIZER = model, tokenizer
+
         return model, tokenizer
 
     except Exception as e:
@@ -575,6 +829,13 @@ def load_internvideo25_model():
         # Fallback to backup mode if model loading fails
         return None, None
 
+# Ranged multipart GETs per object (PHASE3_DOWNLOAD_PART_MB parts, PHASE3_DOWNLOAD_PART_THREADS at a time)
+DOWNLOAD_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=int(os.getenv('PHASE3_DOWNLOAD_PART_MB', '8')) * 1024 * 1024,
+    multipart_chunksize=int(os.getenv('PHASE3_DOWNLOAD_PART_MB', '8')) * 1024 * 1024,
+    max_concurrency=int(os.getenv('PHASE3_DOWNLOAD_PART_THREADS', '8'))
+)
+
 def load_video_from_s3(s3_uri: str, local_path: str) -> str:
     """Download video from S3 to local path"""
     try:
@@ -583,7 +844,7 @@ def load_video_from_s3(s3_uri: str, local_path: str) -> str:
         key_name = '/'.join(s3_uri.split('/')[3:])
 
         # Download video
-        s3_client.download_file(bucket_name, key_name, local_path)
+        s3_client.download_file(bucket_name, key_name, local_path, Config=DOWNLOAD_TRANSFER_CONFIG)
         logger.info(f"Downloaded video from {s3_uri} to {local_path}")
         return local_path
 
@@ -624,8 +885,34 @@ def get_automotive_prompts() -> List[str]:
         Provide a rich, descriptive paragraph that captures the complete behavioral context visible across all camera angles. Focus on what you can actually observe rather than inferring precise measurements."""
     ]
 
-def analyze_video_with_internvideo25(model, tokenizer, video_path: str, prompts: List[str]) -> Dict[str, Any]:
-    """Analyze video using InternVideo2.5 with error handling and output capture"""
+def get_analysis_generation_config(tokenizer) -> Dict[str, Any]:
+    """Generation settings for the dense scene-description prompts"""
+    # FINE-TUNED: Conservative adjustments on top of major inference fixes
+    # Major fixes: model.eval() + torch.no_grad() should resolve gibberish
+    return dict(
+        do_sample=True,           # Keep sampling enabled
+        temperature=0.45,         # ADJUSTED: More creative, less likely to repeat garbage tokens (was 0.2)
+        max_new_tokens=1024,      # Keep existing token limit
+        top_p=0.9,                # Keep nucleus sampling
+        num_beams=1,              # Keep beam search disabled for speed
+        repetition_penalty=1.05,  # ADJUSTED: Less restrictive, helps flow (was 1.1)
+        eos_token_id=tokenizer.eos_token_id,  # Keep natural stopping
+    )
+
+def analyze_video_with_internvideo25(model, tokenizer, video_path: str, prompts: List[str],
+                                     video_inputs: Optional[Tuple[torch.Tensor, List[int]]] = None,
+                                     timings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Analyze video using InternVideo2.5 with error handling and output capture
+
+    Args:
+        model: InternVideo2.5 model (None falls back to an uncertainty report)
+        tokenizer: Matching tokenizer
+        video_path: Local video (or Phase 2 frame cache .npy) path
+        prompts: Analysis prompts
+        video_inputs: (pixel_values, num_patches_list) already produced by load_video, e.g. by the prefetcher
+        timings: If given, stage wall times and generated tokens are added to it (see add_timing)
+    """
 
     if model is None or tokenizer is None:
         logger.warning("InternVideo2.5 model not available, using uncertainty report")
@@ -633,7 +920,9 @@ def analyze_video_with_internvideo25(model, tokenizer, video_path: str, prompts:
 
     try:
         # Load video with environment-configured parameters (32 frames, 448x448)
-        pixel_values, num_patches_list = load_video(video_path)  # Use INTERNVIDEO_NUM_FRAMES=32, INTERNVIDEO_INPUT_SIZE=448
+        if video_inputs is None:
+            video_inputs = load_video(video_path, timings=timings)  # Use INTERNVIDEO_NUM_FRAMES=32, INTERNVIDEO_INPUT_SIZE=448
+        pixel_values, num_patches_list = video_inputs
         logger.info(f"Video loaded: tensor shape {pixel_values.shape}, patches {num_patches_list}")
 
         # Check if video loading failed (empty tensor)
@@ -652,23 +941,45 @@ def analyze_video_with_internvideo25(model, tokenizer, video_path: str, prompts:
         logger.info(f"Tensors moved to device: {device}, model_dtype: {model_dtype}, pixel_values_dtype: {pixel_values.dtype}, final shape: {pixel_values.shape}")
         logger.info(f"Assertion check: len(pixel_values)={len(pixel_values)} == sum(num_patches_list)={sum(num_patches_list)}")
 
-        # FINE-TUNED: Conservative adjustments on top of major inference fixes
-        # Major fixes: model.eval() + torch.no_grad() should resolve gibberish
-        generation_config = dict(
-            do_sample=True,           # Keep sampling enabled
-            temperature=0.45,         # ADJUSTED: More creative, less likely to repeat garbage tokens (was 0.2)
-            max_new_tokens=1024,      # Keep existing token limit
-            top_p=0.9,                # Keep nucleus sampling
-            num_beams=1,              # Keep beam search disabled for speed
-            repetition_penalty=1.05,  # ADJUSTED: Less restrictive, helps flow (was 1.1)
-            eos_token_id=tokenizer.eos_token_id,  # Keep natural stopping
-        )
+        generation_config = get_analysis_generation_config(tokenizer)
         logger.info(f"Generation config: {generation_config}")
 
         results = {}
         model_outputs = {}  # Store raw model outputs
+        sequential_prompts = prompts
+
+        # Batched mode: encode the video once and answer every prompt in one generate call
+        if len(prompts) > 1 and os.getenv('INTERNVIDEO_PROMPT_MODE', 'batched').lower() == 'batched':
+            try:
+                video_prefix = "".join([f"Frame{i+1}: <image>\n" for i in range(len(num_patches_list))])
+                questions = [video_prefix + prompt for prompt in prompts]
+                logger.info(f"Answering {len(prompts)} prompts in one batched call (frames: {len(num_patches_list)})")
 
-        for i, prompt in enumerate(prompts):
+                with torch.no_grad():
+                    outputs = batch_chat_videos(
+                        model, tokenizer, [(pixel_values, num_patches_list)], [questions], dict(generation_config),
+                        timings=timings
+                    )[0]
+
+                for i, (prompt, question, output) in enumerate(zip(prompts, questions, outputs)):
+                    logger.info(f"Prompt {i+1} completed, output length: {len(str(output))}")
+                    results[prompt] = output
+                    model_outputs[f"prompt_{i+1}"] = {
+                        "prompt": prompt,
+                        "output": output,
+                        "chat_history": [(question, output)]
+                    }
+                sequential_prompts = []
+
+            except Exception as batch_error:
+                # e.g. OOM with many long prompts - one model.chat() per prompt still works
+                logger.warning(f"Batched prompt generation failed, falling back to one call per prompt: {type(batch_error).__name__}: {batch_error}")
+                results = {}
+                model_outputs = {}
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+
+        for i, prompt in enumerate(sequential_prompts):
             logger.info(f"Analyzing prompt {i+1}/{len(prompts)}: {prompt[:50]}...")
 
             try:
@@ -684,6 +995,7 @@ def analyze_video_with_internvideo25(model, tokenizer, video_path: str, prompts:
                 logger.info(f"   - device: {pixel_values.device}")
 
                 # CRITICAL FIX: Wrap inference in torch.no_grad() to prevent gradient computation
+                chat_start = time.perf_counter()
                 with torch.no_grad():
                     output, chat_history = model.chat(
                         tokenizer,
@@ -694,6 +1006,9 @@ def analyze_video_with_internvideo25(model, tokenizer, video_path: str, prompts:
                         history=None,
                         return_history=True
                     )
+                # model.chat() re-encodes the video inside, so its vision time is part of 'generation' here
+                if timings is not None:
+                    add_timing(timings, 'generation', time.perf_counter() - chat_start, [len(tokenizer(output).input_ids)])
 
                 logger.info(f"Prompt {i+1} completed, output length: {len(str(output))}")
                 results[prompt] = output
@@ -719,12 +1034,15 @@ def analyze_video_with_internvideo25(model, tokenizer, video_path: str, prompts:
                 }
 
         logger.info("InternVideo2.5 analysis completed")
-        return {
+        analysis = {
             "results": results,
             "model_outputs": model_outputs,
             "analysis_method": "internvideo25",
             "generation_config": generation_config
         }
+        if metrics_profile_enabled():
+            analysis["structured_metrics"] = generate_structured_metrics(model, tokenizer, [(pixel_values, num_patches_list)], timings)[0]
+        return analysis
 
     except Exception as e:
         # Comprehensive error logging
@@ -740,6 +1058,548 @@ def analyze_video_with_internvideo25(model, tokenizer, video_path: str, prompts:
             "error_type": type(e).__name__
         }
 
+def batch_chat_videos(model, tokenizer, videos: List[Tuple[torch.Tensor, List[int]]],
+                      questions: List[List[str]], generation_config: Dict[str, Any],
+                      stopping_criteria: Optional[StoppingCriteriaList] = None,
+                      timings: Optional[Dict[str, Any]] = None) -> List[List[str]]:
+    """
+    Answer several questions about one or more videos in one batched generate call
+
+    Same prompt construction as model.chat(), but the vision tower runs once over all
+    videos' frames: each video's embeddings are written into every batch row that asks
+    about it instead of re-encoding pixel_values per question. Decoding of all answers
+    then proceeds in parallel.
+
+    Args:
+        model: InternVideo2.5 chat model (trust_remote_code)
+        tokenizer: Matching tokenizer
+        videos: (pixel_values, num_patches_list) per video, already on the model device/dtype
+        questions: Questions per video, each containing one <image> per frame
+        generation_config: Generation kwargs (eos_token_id is set from the chat template)
+        stopping_criteria: Extra per-row stop conditions (e.g. JsonObjectStoppingCriteria)
+        timings: If given, 'vision_encoding' and 'generation' wall times and per-video
+            'generated_tokens' are added to it
+    Returns:
+        Answers per video, in the order of questions
+    """
+    IMG_START_TOKEN, IMG_END_TOKEN, IMG_CONTEXT_TOKEN = '<img>', '</img>', '<IMG_CONTEXT>'
+
+    # The chat template helper lives in the model's remote-code module
+    get_conv_template = sys.modules[type(model).__module__].get_conv_template
+
+    img_context_token_id = tokenizer.convert_tokens_to_ids(IMG_CONTEXT_TOKEN)
+    model.img_context_token_id = img_context_token_id
+
+    # Vision encoding once for all videos: (total patches, tokens per patch, hidden)
+    vision_start = time.perf_counter()
+    vit_embeds = model.extract_feature(torch.cat([pixel_values for pixel_values, _ in videos]))
+    if timings is not None and torch.cuda.is_available():
+        torch.cuda.synchronize()  # Kernels are async; wait so the vision time is not billed to generation
+    add_timing(timings, 'vision_encoding', time.perf_counter() - vision_start)
+    tokens_per_patch = vit_embeds.shape[1]
+    video_embeds = torch.split(vit_embeds, [sum(num_patches_list) for _, num_patches_list in videos])
+
+    queries = []
+    row_embeds = []
+    for (_, num_patches_list), video_questions, embeds in zip(videos, questions, video_embeds):
+        for question in video_questions:
+            template = get_conv_template(model.template)
+            template.system_message = model.system_message
+            template.append_message(template.roles[0], question)
+            template.append_message(template.roles[1], None)
+            query = template.get_prompt()
+            for num_patches in num_patches_list:
+                image_tokens = IMG_START_TOKEN + IMG_CONTEXT_TOKEN * tokens_per_patch * num_patches + IMG_END_TOKEN
+                query = query.replace('<image>', image_tokens, 1)
+            queries.append(query)
+            row_embeds.append(embeds)
+
+    # Left padding for the batched prompts only: the tokenizer is shared (and stays resident
+    # in worker mode), so model.chat() calls must still see its own settings
+    padding_side, pad_token = tokenizer.padding_side, tokenizer.pad_token
+    try:
+        tokenizer.padding_side = 'left'
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        generation_config.setdefault('pad_token_id', tokenizer.pad_token_id)
+        model_inputs = tokenizer(queries, return_tensors='pt', padding=True)
+    finally:
+        tokenizer.padding_side = padding_side
+        tokenizer.pad_token = pad_token
+    input_ids = model_inputs['input_ids'].to(vit_embeds.device)
+    attention_mask = model_inputs['attention_mask'].to(vit_embeds.device)
+
+    # Scatter each row's video embeddings into its <IMG_CONTEXT> slots
+    input_embeds = model.language_model.get_input_embeddings()(input_ids)
+    batch_size, seq_len, hidden = input_embeds.shape
+    input_embeds = input_embeds.reshape(batch_size * seq_len, hidden)
+    selected = input_ids.reshape(batch_size * seq_len) == img_context_token_id
+    input_embeds[selected] = torch.cat([embeds.reshape(-1, hidden) for embeds in row_embeds]).to(input_embeds.dtype)
+    input_embeds = input_embeds.reshape(batch_size, seq_len, hidden)
+
+    separator = template.sep.strip()
+    generation_config['eos_token_id'] = tokenizer.convert_tokens_to_ids(separator)
+    generation_start = time.perf_counter()
+    generation_output = model.language_model.generate(
+        inputs_embeds=input_embeds,
+        attention_mask=attention_mask,
+        use_cache=True,
+        stopping_criteria=stopping_criteria,
+        **generation_config
+    )
+    if timings is not None:
+        # Output holds only new tokens (inputs_embeds prompt); padding after each row's stop is not counted
+        row_tokens = (generation_output != generation_config['pad_token_id']).sum(dim=1).tolist()
+        video_tokens = []
+        for video_questions in questions:
+            video_tokens.append(sum(row_tokens[:len(video_questions)]))
+            row_tokens = row_tokens[len(video_questions):]
+        add_timing(timings, 'generation', time.perf_counter() - generation_start, video_tokens)
+
+    responses = [response.split(separator)[0].strip()
+                 for response in tokenizer.batch_decode(generation_output, skip_special_tokens=True)]
+    answers = []
+    for video_questions in questions:
+        answers.append(responses[:len(video_questions)])
+        responses = responses[len(video_questions):]
+    return answers
+
+def estimate_camera_batch_size(model, pixel_values: torch.Tensor, num_prompts: int, max_new_tokens: int) -> int:
+    """
+    How many cameras fit into one batched generate call (INTERNVIDEO_CAMERA_BATCH)
+
+    "auto" sizes the batch from free device memory: per batch row the KV cache over
+    prompt + answer tokens plus the prefill logits, with 50% headroom. Any integer
+    value is used as-is; 1 disables cross-camera batching.
+    """
+    setting = os.getenv('INTERNVIDEO_CAMERA_BATCH', 'auto').lower()
+    if setting != 'auto':
+        return max(1, int(setting))
+    if model is None or not torch.cuda.is_available():
+        return 1
+
+    try:
+        config = model.language_model.config
+        num_heads = config.num_attention_heads
+        head_dim = config.hidden_size // num_heads
+        kv_heads = getattr(config, 'num_key_value_heads', num_heads)
+
+        # Prompt length: image tokens per frame (num_image_token) plus ~512 text tokens
+        seq_len = getattr(model, 'num_image_token', 256) * len(pixel_values) + 512 + max_new_tokens
+        kv_bytes = 2 * config.num_hidden_layers * kv_heads * head_dim * seq_len * 2
+        logits_bytes = seq_len * config.vocab_size * 4
+        bytes_per_camera = (kv_bytes + logits_bytes) * num_prompts * 1.5
+
+        free_bytes, _ = torch.cuda.mem_get_info()
+        batch_size = max(1, min(int(free_bytes // bytes_per_camera), int(os.getenv('INTERNVIDEO_MAX_CAMERA_BATCH', '6'))))
+        logger.info(f"Camera batch size {batch_size} ({free_bytes / 1024**3:.1f}GB free, ~{bytes_per_camera / 1024**3:.1f}GB per camera)")
+        return batch_size
+    except Exception as e:
+        logger.warning(f"Could not size camera batch ({e}), analyzing one camera at a time")
+        return 1
+
+def analyze_videos_with_internvideo25(model, tokenizer, cameras: List[Dict[str, Any]], prompts: List[str],
+                                      metrics: Optional[StageMetrics] = None) -> List[Dict[str, Any]]:
+    """
+    Analyze several cameras' videos in one batched generate call
+
+    Args:
+        cameras: Prepared cameras from prepare_camera_video ('local_video_path', 'pixel_values', 'num_patches_list')
+        prompts: Analysis prompts (asked of every camera)
+        metrics: Scene StageMetrics to record vision/generation/parsing time and tokens into
+    Returns:
+        One analyze_video_with_internvideo25-style result per camera, in order. Falls back
+        to one camera at a time if the batched call fails (e.g. OOM).
+    """
+    analyses = [None] * len(cameras)
+    # Cameras whose video failed to load get their uncertainty report from the single-camera path
+    batchable = [i for i, camera in enumerate(cameras) if camera['pixel_values'].numel() > 0]
+
+    if len(batchable) > 1 and model is not None and tokenizer is not None:
+        try:
+            device = next(model.parameters()).device
+            model_dtype = next(model.parameters()).dtype
+            target_dtype = torch.bfloat16 if model_dtype == torch.bfloat16 else model_dtype
+
+            videos = [(cameras[i]['pixel_values'].to(target_dtype).to(device), cameras[i]['num_patches_list']) for i in batchable]
+            questions = [
+                ["".join([f"Frame{i+1}: <image>\n" for i in range(len(num_patches_list))]) + prompt for prompt in prompts]
+                for _, num_patches_list in videos
+            ]
+            generation_config = get_analysis_generation_config(tokenizer)
+            logger.info(f"Analyzing {len(videos)} cameras x {len(prompts)} prompts in one batched call")
+
+            batch_timings = {} if metrics is not None else None
+            with torch.no_grad():
+                answers = batch_chat_videos(model, tokenizer, videos, questions, dict(generation_config), timings=batch_timings)
+
+            structured = generate_structured_metrics(model, tokenizer, videos, batch_timings) if metrics_profile_enabled() else [None] * len(videos)
+
+            for camera_index, video_questions, video_answers, video_metrics in zip(batchable, questions, answers, structured):
+                analyses[camera_index] = {
+                    "results": dict(zip(prompts, video_answers)),
+                    "model_outputs": {
+                        f"prompt_{i+1}": {"prompt": prompt, "output": output, "chat_history": [(question, output)]}
+                        for i, (prompt, question, output) in enumerate(zip(prompts, video_questions, video_answers))
+                    },
+                    "analysis_method": "internvideo25",
+                    "generation_config": generation_config
+                }
+                if video_metrics is not None:
+                    analyses[camera_index]["structured_metrics"] = video_metrics
+
+            if metrics is not None:
+                for position, camera_index in enumerate(batchable):
+                    metrics.add_timings(cameras[camera_index]['video_uri'], batch_timings, position, len(batchable))
+
+        except Exception as e:
+            logger.warning(f"Cross-camera batch failed, analyzing cameras one at a time: {type(e).__name__}: {e}")
+            analyses = [None] * len(cameras)
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+    for i, camera in enumerate(cameras):
+        if analyses[i] is None:
+            camera_timings = {} if metrics is not None else None
+            analyses[i] = analyze_video_with_internvideo25(
+                model, tokenizer, camera['local_video_path'], prompts,
+                video_inputs=(camera['pixel_values'], camera['num_patches_list']),
+                timings=camera_timings
+            )
+            if metrics is not None:
+                metrics.add_timings(camera['video_uri'], camera_timings)
+    return analyses
+
+def get_camera_local_path(scene_id: str, index: int, source_uri: str) -> str:
+    """Local download path for a camera's model input"""
+    suffix = '.npy' if source_uri.endswith('.npy') else '.mp4'
+    return f"/tmp/{scene_id}_video_{index}{suffix}"
+
+def start_camera_downloads(scene_id: str, camera_sources: List[Tuple[int, str, str]], pool: ThreadPoolExecutor,
+                           metrics: Optional[StageMetrics] = None) -> Dict[int, Any]:
+    """
+    Start every camera's download at once (each itself a ranged multipart download)
+
+    Args:
+        camera_sources: (camera index, video URI, source URI) triples
+        pool: Executor sized for the number of concurrent camera downloads
+        metrics: Scene StageMetrics to record each camera's 'download' time into
+    Returns:
+        Camera index -> download future (resolves to the local path)
+    """
+    def download(index: int, video_uri: str, source_uri: str) -> str:
+        with StageMetrics.timed(metrics, video_uri, 'download'):
+            return load_video_from_s3(source_uri, get_camera_local_path(scene_id, index, source_uri))
+
+    return {index: pool.submit(download, index, video_uri, source_uri) for index, video_uri, source_uri in camera_sources}
+
+def prepare_camera_video(scene_id: str, index: int, video_uri: str, source_uri: str, download=None,
+                         metrics: Optional[StageMetrics] = None) -> Dict[str, Any]:
+    """
+    CPU-side camera preparation for the prefetcher: download and load_video
+
+    Args:
+        source_uri: What to download for video_uri (proxy rendition or Phase 2 frame cache .npy)
+        download: Future from start_camera_downloads; waited on instead of downloading here
+        metrics: Scene StageMetrics to record 'download', 'decode' and 'preprocess' times into
+    Returns:
+        Dict with index, video_uri, local_video_path, pixel_values, num_patches_list,
+        cosmos_frames (from the same decode, None for frame-cache inputs) and error
+        (set if the download failed)
+    """
+    camera = {"index": index, "video_uri": video_uri, "local_video_path": get_camera_local_path(scene_id, index, source_uri), "error": None}
+    try:
+        if download is not None:
+            download.result()
+        else:
+            with StageMetrics.timed(metrics, video_uri, 'download'):
+                load_video_from_s3(source_uri, camera["local_video_path"])
+        shared_frames = {}
+        timings = {} if metrics is not None else None
+        camera["pixel_values"], camera["num_patches_list"] = load_video(camera["local_video_path"], shared_frames=shared_frames, timings=timings)
+        camera["cosmos_frames"] = shared_frames.get('cosmos')
+        if metrics is not None:
+            metrics.add_timings(video_uri, timings)
+    except Exception as e:
+        camera["error"] = e
+    return camera
+
+def result_cache_enabled() -> bool:
+    """Per-camera result cache (PHASE3_RESULT_CACHE, default on)"""
+    return os.getenv('PHASE3_RESULT_CACHE', 'true').lower() == 'true'
+
+def get_s3_content_hash(s3_uri: str) -> Optional[str]:
+    """
+    Content fingerprint of an S3 object without downloading it
+
+    Uses the object's SHA-256 checksum when it was uploaded with one, otherwise its ETag
+    (MD5-based, stable for identical bytes uploaded the same way), plus the size.
+
+    Returns:
+        Fingerprint string, or None if the object cannot be inspected
+    """
+    try:
+        head = s3_client.head_object(Bucket=s3_uri.split('/')[2], Key='/'.join(s3_uri.split('/')[3:]), ChecksumMode='ENABLED')
+        checksum = head.get('ChecksumSHA256') or head.get('ETag', '').strip('"')
+        return f"{checksum}:{head['ContentLength']}" if checksum else None
+    except Exception as e:
+        logger.warning(f"Could not fingerprint {s3_uri} for the result cache: {e}")
+        return None
+
+def get_internvideo_cache_config(tokenizer, prompts: List[str]) -> Dict[str, Any]:
+    """Everything besides the video bytes that determines a camera's InternVideo2.5 analysis"""
+    config = {
+        "stage": "internvideo",
+        "model": os.getenv('INTERNVIDEO_MODEL_PATH', 'OpenGVLab/InternVideo2_5_Chat_8B'),
+        "prompts_sha256": hashlib.sha256(json.dumps(prompts).encode()).hexdigest(),
+        "sampling": {
+            "num_frames": int(os.getenv('INTERNVIDEO_NUM_FRAMES', '8')),
+            "input_size": int(os.getenv('INTERNVIDEO_INPUT_SIZE', '224')),
+            "prompt_mode": os.getenv('INTERNVIDEO_PROMPT_MODE', 'batched').lower(),
+            "generation": get_analysis_generation_config(tokenizer),
+        },
+    }
+    if metrics_profile_enabled():
+        config["metrics_profile"] = {
+            "prompt_sha256": hashlib.sha256(get_metrics_prompt().encode()).hexdigest(),
+            "generation": get_metrics_generation_config(tokenizer),
+        }
+    return config
+
+def get_cosmos_cache_config() -> Dict[str, Any]:
+    """Everything besides the video bytes that determines a camera's Cosmos-Embed1 embedding"""
+    device = get_cosmos_device()
+    return {
+        "stage": "cosmos",
+        "model": os.getenv('COSMOS_MODEL_PATH', 'nvidia/Cosmos-Embed1-448p'),
+        "sampling": {"num_frames": 8, "input_size": 448},
+        "precision": os.getenv('COSMOS_CPU_QUANTIZE', 'int8').lower() if device == 'cpu' else 'bf16',
+    }
+
+def result_cache_key(content_hash: str, config: Dict[str, Any]) -> str:
+    """SHA-256 over the video fingerprint and the stage config"""
+    return hashlib.sha256(json.dumps({"content": content_hash, **config}, sort_keys=True).encode()).hexdigest()
+
+def get_result_cache_locations(stage: str, key: str) -> Tuple[str, Optional[str]]:
+    """
+    Local path and S3 key of a cached per-camera result
+
+    Local entries live under PHASE3_RESULT_CACHE_DIR; the S3 tier (shared across containers)
+    under PHASE3_RESULT_CACHE_PREFIX in S3_BUCKET.
+    """
+    local_path = os.path.join(os.getenv('PHASE3_RESULT_CACHE_DIR', '/opt/phase3_result_cache'), stage, f"{key}.json")
+    s3_key = f"{os.getenv('PHASE3_RESULT_CACHE_PREFIX', 'phase3-result-cache')}/{stage}/{key}.json" if os.getenv('S3_BUCKET') else None
+    return local_path, s3_key
+
+def read_cached_result(stage: str, key: str) -> Optional[Dict[str, Any]]:
+    """Cached result from the local tier, then S3 (copied locally on hit); None on miss"""
+    local_path, s3_key = get_result_cache_locations(stage, key)
+    try:
+        if os.path.exists(local_path):
+            with open(local_path) as f:
+                return json.load(f)
+
+        if s3_key:
+            try:
+                body = s3_client.get_object(Bucket=os.getenv('S3_BUCKET'), Key=s3_key)['Body'].read()
+            except s3_client.exceptions.NoSuchKey:
+                return None
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            with open(local_path, 'wb') as f:
+                f.write(body)
+            return json.loads(body)
+
+    except Exception as e:
+        logger.warning(f"Result cache read failed for {stage}/{key}: {e}")
+    return None
+
+def write_cached_result(stage: str, key: str, result: Dict[str, Any]):
+    """Store a per-camera result in the local tier and S3 (best effort)"""
+    local_path, s3_key = get_result_cache_locations(stage, key)
+    body = json.dumps(result)
+    try:
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        with open(f"{local_path}.tmp", 'w') as f:
+            f.write(body)
+        os.replace(f"{local_path}.tmp", local_path)
+
+        if s3_key:
+            s3_client.put_object(Bucket=os.getenv('S3_BUCKET'), Key=s3_key, Body=body, ContentType='application/json')
+    except Exception as e:
+        logger.warning(f"Result cache write failed for {stage}/{key}: {e}")
+
+# "metrics" generation profile: fixed JSON schema for the quantified fields, decoded greedily
+METRICS_SCORE_FIELDS = [
+    "speed_compliance", "risk_score", "safety_score",
+    "behavioral_complexity_score", "lane_positioning_quality", "confidence_score"
+]
+METRICS_CATEGORY_FIELDS = {
+    "environment_type": ["urban", "highway", "suburban", "rural", "construction_zone", "parking_lot"],
+    "weather_condition": ["clear", "rain", "fog", "snow", "night", "dawn_dusk"],
+    "scenario_type": ["intersection", "lane_change", "merge", "parking", "traffic_jam", "emergency_stop",
+                      "pedestrian_interaction", "construction"],
+    "safety_criticality": ["low", "medium", "high", "critical"]
+}
+
+def metrics_profile_enabled() -> bool:
+    """Structured metrics are generated per camera only when INTERNVIDEO_METRICS_PROFILE=true (opt-in)"""
+    return os.getenv('INTERNVIDEO_METRICS_PROFILE', 'false').lower() == 'true'
+
+def get_metrics_prompt() -> str:
+    """Prompt for the metrics profile - asks for exactly one JSON object in the fixed schema"""
+    fields = [f'"{field}": <number 0.0-1.0>' for field in METRICS_SCORE_FIELDS]
+    fields += [f'"{field}": <one of {" | ".join(choices)}>' for field, choices in METRICS_CATEGORY_FIELDS.items()]
+    fields.append('"visual_evidence_summary": <at most 20 words>')
+    return (
+        "Rate the ego-vehicle driving behavior in this scene from what is visible in the frames. "
+        "Answer with a single JSON object and nothing else, using exactly these keys:\n{" + ", ".join(fields) + "}"
+    )
+
+def get_metrics_generation_config(tokenizer) -> Dict[str, Any]:
+    """Greedy, short-budget decoding for the metrics profile (deterministic per input)"""
+    return dict(
+        do_sample=False,
+        num_beams=1,
+        max_new_tokens=int(os.getenv('INTERNVIDEO_METRICS_MAX_TOKENS', '160')),
+        repetition_penalty=1.0,
+        eos_token_id=tokenizer.eos_token_id,
+    )
+
+def extract_json_object(text: str) -> Optional[str]:
+    """Return the first complete top-level {...} in text (string-aware brace matching), or None"""
+    start = text.find('{')
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for position in range(start, len(text)):
+        char = text[position]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:position + 1]
+    return None
+
+class JsonObjectStoppingCriteria(StoppingCriteria):
+    """Stop each batch row as soon as its first top-level JSON object closes"""
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        # With inputs_embeds generation, input_ids holds only the generated tokens
+        texts = self.tokenizer.batch_decode(input_ids, skip_special_tokens=True)
+        return torch.tensor([extract_json_object(text) is not None for text in texts], dtype=torch.bool, device=input_ids.device)
+
+def parse_structured_metrics(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Validate a metrics-profile answer against the schema
+
+    Returns:
+        Metrics in the extract_quantified_metrics_from_scene_description layout (scores clamped
+        to [0, 1], categories in business_intelligence), or None if any field is missing or invalid
+    """
+    json_str = extract_json_object(text or '')
+    if json_str is None:
+        return None
+    try:
+        raw = json.loads(json_str)
+        metrics = {field: min(1.0, max(0.0, float(raw[field]))) for field in METRICS_SCORE_FIELDS}
+        business_intelligence = {}
+        for field, choices in METRICS_CATEGORY_FIELDS.items():
+            value = str(raw[field]).strip().lower()
+            if value not in choices:
+                return None
+            business_intelligence[field] = value
+    except (ValueError, KeyError, TypeError):
+        return None
+
+    metrics["visual_evidence_summary"] = str(raw.get("visual_evidence_summary", "")).strip()
+    metrics["business_intelligence"] = business_intelligence
+    return metrics
+
+def generate_structured_metrics(model, tokenizer, videos: List[Tuple[torch.Tensor, List[int]]],
+                                timings: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Run the metrics profile for one or more videos in one batched, greedy generate call
+    (its vision, generation and 'parsing' times are added to timings when given)
+
+    Returns:
+        Per video: {"metrics": parsed metrics or None, "raw_output": model text}
+    """
+    try:
+        prompt = get_metrics_prompt()
+        questions = [["".join([f"Frame{i+1}: <image>\n" for i in range(len(num_patches_list))]) + prompt]
+                     for _, num_patches_list in videos]
+
+        with torch.no_grad():
+            answers = batch_chat_videos(
+                model, tokenizer, videos, questions, get_metrics_generation_config(tokenizer),
+                stopping_criteria=StoppingCriteriaList([JsonObjectStoppingCriteria(tokenizer)]),
+                timings=timings
+            )
+
+        parsing_start = time.perf_counter()
+        structured = [{"metrics": parse_structured_metrics(video_answers[0]), "raw_output": video_answers[0]}
+                      for video_answers in answers]
+        add_timing(timings, 'parsing', time.perf_counter() - parsing_start)
+        logger.info(f"Structured metrics parsed for {sum(1 for item in structured if item['metrics'])}/{len(structured)} videos")
+        return structured
+
+    except Exception as e:
+        logger.warning(f"Structured metrics generation failed: {type(e).__name__}: {e}")
+        return [{"metrics": None, "raw_output": None, "error": str(e)} for _ in videos]
+
+def aggregate_structured_metrics(all_video_analysis: Dict[str, Any], video_s3_uris: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Combine per-camera structured metrics into scene-level quantified metrics
+
+    Scores are averaged across cameras, safety_criticality takes the most severe camera,
+    and the other categories come from the highest-priority camera (CAM_FRONT first).
+
+    Returns:
+        Quantified metrics, or None if no camera produced valid structured metrics
+    """
+    camera_metrics = []
+    for uri in video_s3_uris:
+        metrics = ((all_video_analysis.get(uri) or {}).get("structured_metrics") or {}).get("metrics")
+        if metrics:
+            camera_metrics.append((extract_camera_name_from_uri(uri), metrics))
+    if not camera_metrics:
+        return None
+
+    primary_name = extract_camera_name_from_uri(get_primary_camera_uri(video_s3_uris) or "")
+    camera_metrics.sort(key=lambda item: item[0] != primary_name)
+
+    aggregated = {field: round(float(np.mean([metrics[field] for _, metrics in camera_metrics])), 3)
+                  for field in METRICS_SCORE_FIELDS}
+    severity = METRICS_CATEGORY_FIELDS["safety_criticality"]
+    business_intelligence = dict(camera_metrics[0][1]["business_intelligence"])
+    business_intelligence["safety_criticality"] = max(
+        (metrics["business_intelligence"]["safety_criticality"] for _, metrics in camera_metrics), key=severity.index
+    )
+
+    aggregated["visual_evidence_summary"] = " | ".join(
+        f"[{camera_name}]: {metrics['visual_evidence_summary']}" for camera_name, metrics in camera_metrics if metrics['visual_evidence_summary']
+    )
+    aggregated["business_intelligence"] = business_intelligence
+    aggregated["extraction_method"] = "internvideo25_structured_greedy"
+    aggregated["cameras_used"] = len(camera_metrics)
+    return aggregated
+
 def generate_uncertainty_report(video_path: str, reason: str) -> Dict[str, str]:
     """
     Fallback for Dense Captioning.
@@ -980,27 +1840,173 @@ def create_multi_camera_results(all_video_analysis: Dict[str, Any], video_s3_uri
     logger.info(f"Multi-camera fusion complete for {len(multi_camera_results)} prompts")
     return multi_camera_results
 
+def add_timing(timings: Optional[Dict[str, Any]], stage: str, seconds: float, tokens: Optional[List[int]] = None):
+    """
+    Add a stage's wall time to a timings dict (no-op when timings is None)
+
+    Args:
+        tokens: Tokens generated per video by this call, summed element-wise into 'generated_tokens'
+    """
+    if timings is None:
+        return
+    timings[stage] = timings.get(stage, 0.0) + seconds
+    if tokens is not None:
+        previous = timings.get('generated_tokens') or [0] * len(tokens)
+        timings['generated_tokens'] = [a + b for a, b in zip(previous, tokens)]
+
+def current_rss_mb() -> Optional[float]:
+    """Current resident set size from /proc/self/statm (None where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / 1024**2
+    except (OSError, ValueError, IndexError):
+        return None
+
+class StageMetrics:
+    """
+    Per-camera stage wall times, generated tokens and memory for one scene
+
+    Camera stages: download, decode, preprocess, vision_encoding, generation, parsing, cosmos.
+    Batched calls report the batch's wall time for every camera in the batch (with batch_size);
+    scene-level generation time counts each batch once. Thread-safe, since downloads and
+    decodes are recorded from the prefetch threads.
+    """
+
+    def __init__(self, scene_id: str):
+        self.scene_id = scene_id
+        self.started = time.time()
+        self.cameras: Dict[str, Dict[str, Any]] = {}
+        self.scene_stages: Dict[str, float] = {}
+        self.generated_tokens = 0
+        self.generation_seconds = 0.0
+        self.peak_device_mb = None
+        self.peak_sampled_rss_mb = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    @contextmanager
+    def timed(metrics: Optional[StageMetrics], video_uri: Optional[str], stage: str):
+        """Time a block as a camera stage (or scene stage when video_uri is None); no-op without metrics"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if metrics is not None:
+                metrics.add_stage(video_uri, stage, time.perf_counter() - start)
+
+    def _camera(self, video_uri: str) -> Dict[str, Any]:
+        return self.cameras.setdefault(video_uri, {"stages": {}, "generated_tokens": 0, "batch_size": 1})
+
+    def add_stage(self, video_uri: Optional[str], stage: str, seconds: float):
+        with self._lock:
+            stages = self._camera(video_uri)["stages"] if video_uri else self.scene_stages
+            stages[stage] = stages.get(stage, 0.0) + seconds
+
+    def add_timings(self, video_uri: str, timings: Dict[str, Any], position: int = 0, batch_size: int = 1):
+        """
+        Merge a timings dict filled by load_video / batch_chat_videos into one camera
+
+        Args:
+            position: This camera's index among the videos of the call that filled timings
+            batch_size: Number of cameras that shared the call
+        """
+        with self._lock:
+            camera = self._camera(video_uri)
+            camera["batch_size"] = max(camera["batch_size"], batch_size)
+            for stage, value in timings.items():
+                if stage == 'generated_tokens':
+                    camera["generated_tokens"] += value[position]
+                    self.generated_tokens += value[position]
+                else:
+                    camera["stages"][stage] = camera["stages"].get(stage, 0.0) + value
+            if position == 0:
+                self.generation_seconds += timings.get('generation', 0.0)
+
+    def record_memory(self, video_uris: List[str]):
+        """
+        Current RSS right after the batch and device peak since the last reset_device_peak()
+
+        RSS is sampled rather than taken from ru_maxrss, which is the process high-water
+        mark (dominated by model load) and never attributable to one camera.
+        """
+        rss_mb = current_rss_mb()
+        peak_device_mb = torch.cuda.max_memory_allocated() / 1024**2 if torch.cuda.is_available() else None
+        with self._lock:
+            if rss_mb is not None:
+                self.peak_sampled_rss_mb = max(self.peak_sampled_rss_mb or 0.0, rss_mb)
+            for video_uri in video_uris:
+                camera = self._camera(video_uri)
+                if rss_mb is not None:
+                    camera["rss_mb"] = round(rss_mb, 1)
+                if peak_device_mb is not None:
+                    camera["peak_device_memory_mb"] = round(max(camera.get("peak_device_memory_mb", 0.0), peak_device_mb), 1)
+            if peak_device_mb is not None:
+                self.peak_device_mb = max(self.peak_device_mb or 0.0, peak_device_mb)
+
+    @staticmethod
+    def reset_device_peak():
+        if torch.cuda.is_available():
+            torch.cuda.reset_peak_memory_stats()
+
+    def mark_cached(self, video_uri: str, stage: str):
+        """Record that a camera's stage result came from the result cache"""
+        with self._lock:
+            self._camera(video_uri).setdefault("cached_stages", []).append(stage)
+
+    def to_dict(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """JSON record for the scene, with the model/prompt/sampling config it was measured under"""
+        with self._lock:
+            cameras = {}
+            for video_uri, camera in self.cameras.items():
+                generation = camera["stages"].get("generation")
+                cameras[video_uri] = {
+                    **camera,
+                    "stages": {stage: round(seconds, 3) for stage, seconds in camera["stages"].items()},
+                    "tokens_per_sec": round(camera["generated_tokens"] / generation, 1) if generation and camera["generated_tokens"] else None
+                }
+
+            return {
+                "scene_id": self.scene_id,
+                "recorded_at": datetime.utcnow().isoformat(),
+                "config": config,
+                "scene": {
+                    "wall_seconds": round(time.time() - self.started, 3),
+                    "stages": {stage: round(seconds, 3) for stage, seconds in self.scene_stages.items()},
+                    "generated_tokens": self.generated_tokens,
+                    "generation_seconds": round(self.generation_seconds, 3),
+                    "tokens_per_sec": round(self.generated_tokens / self.generation_seconds, 1) if self.generation_seconds else None,
+                    "peak_sampled_rss_mb": round(self.peak_sampled_rss_mb, 1) if self.peak_sampled_rss_mb is not None else None,
+                    "process_peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),  # KB on Linux, includes model load
+                    "peak_device_memory_mb": round(self.peak_device_mb, 1) if self.peak_device_mb is not None else None,
+                },
+                "cameras": cameras
+            }
+
 def main():
     """
     AWS orchestration for Phase 3 script
     Only the analysis logic changes - interface stays identical
     """
+    global INTERNVIDEO_WARMED_UP
     task_token = None
 
     try:
         # IDENTICAL Step Functions integration
         task_token = os.getenv('STEP_FUNCTIONS_TASK_TOKEN')
-        if not task_token:
+        # Jobs from a local job directory (PHASE3_JOB_SOURCE=directory) have no Step Functions callback
+        local_job = os.getenv('PHASE3_JOB_SOURCE') == 'directory'
+        if not task_token and not local_job:
             raise ValueError("STEP_FUNCTIONS_TASK_TOKEN environment variable is required")
 
         # Validate token is still valid before starting work
-        sfn_client = boto3.client('stepfunctions')
-        try:
-            sfn_client.send_task_heartbeat(taskToken=task_token)
-            logger.info("Task token validated successfully")
-        except Exception as e:
-            logger.error(f"Task token invalid or expired: {e}")
-            raise ValueError(f"Task token invalid - execution may have been aborted: {e}")
+        if task_token:
+            try:
+                sfn_client.send_task_heartbeat(taskToken=task_token)
+                logger.info("Task token validated successfully")
+            except Exception as e:
+                logger.error(f"Task token invalid or expired: {e}")
+                raise ValueError(f"Task token invalid - execution may have been aborted: {e}")
 
         # IDENTICAL environment variable handling
         scene_id = os.getenv('SCENE_ID')
@@ -1012,6 +2018,7 @@ def main():
             raise ValueError("Required environment variables: SCENE_ID, INPUT_S3_KEY, OUTPUT_S3_KEY")
 
         logger.info(f"Starting InternVideo2.5 behavioral analysis for scene: {scene_id}")
+        stage_metrics = StageMetrics(scene_id)
 
         # Load InternVideo2.5 model
         model, tokenizer = load_internvideo25_model()
@@ -1046,6 +2053,22 @@ def main():
 
         logger.info(f"Found {len(video_s3_uris)} videos for InternVideo2.5 analysis")
 
+        # Phase 2 proxy renditions (fast encode for model input) replace the web video for download only
+        model_video_uris = {}
+        model_video_paths = phase2_data.get('model_video_paths') or {}
+        for camera_name, video_uri in (phase2_data.get('video_paths') or {}).items():
+            if camera_name in model_video_paths:
+                model_video_uris[video_uri] = model_video_paths[camera_name]
+
+        # Phase 2 pre-sampled frame arrays (PHASE2_FRAME_CACHE) skip video decoding entirely
+        internvideo_cache_uris = get_frame_cache_uris(
+            phase2_data, 'internvideo',
+            int(os.getenv('INTERNVIDEO_NUM_FRAMES', '8')), int(os.getenv('INTERNVIDEO_INPUT_SIZE', '224'))
+        )
+        cosmos_cache_uris = get_frame_cache_uris(phase2_data, 'cosmos', 8, 448)
+        if internvideo_cache_uris or cosmos_cache_uris:
+            logger.info(f"Using Phase 2 frame cache: {len(internvideo_cache_uris)} InternVideo2.5, {len(cosmos_cache_uris)} Cosmos cameras")
+
         # NEW: Real video analysis with InternVideo2.5
         all_video_analysis = {}
 
@@ -1066,93 +2089,169 @@ def main():
         videos_to_analyze = len(reordered_videos)
         logger.info(f"Analyzing all {videos_to_analyze} cameras in optimized order: {[uri.split('/')[-1].replace('.mp4','') for uri in reordered_videos]}")
 
-        # FIXED: Add model warmup to prevent initialization issues
-        logger.info("Performing model warmup inference to ensure proper initialization...")
-        try:
-            # Get device and dtype from model (fix for undefined 'device' variable)
-            model_device = next(model.parameters()).device
-            model_dtype = next(model.parameters()).dtype
-            target_dtype = torch.bfloat16 if model_dtype == torch.bfloat16 else model_dtype
-
-            # Define generation config (fix for undefined 'generation_config' variable)
-            warmup_generation_config = dict(
-                do_sample=True,
-                temperature=0.3,
-                max_new_tokens=1024,
-                min_length=100,
-                top_p=0.9,
-                num_beams=1,
-                repetition_penalty=1.2,
-                pad_token_id=tokenizer.eos_token_id,
-            )
-
-            # Create dummy tensors matching expected input format
-            dummy_frames = torch.randn(8, 3, 448, 448, dtype=target_dtype, device=model_device)
-            dummy_patches = [1] * 8
-            dummy_question = "Frame1: <image>\nFrame2: <image>\nFrame3: <image>\nFrame4: <image>\nFrame5: <image>\nFrame6: <image>\nFrame7: <image>\nFrame8: <image>\nDescribe this test scene briefly."
-
-            # Warmup inference (output discarded) - wrapped in torch.no_grad()
-            with torch.no_grad():
-                _, _ = model.chat(tokenizer, dummy_frames, dummy_question, warmup_generation_config,
-                                num_patches_list=dummy_patches, history=None, return_history=True)
-            logger.info("Model warmup completed successfully - ready for real processing")
-        except Exception as warmup_error:
-            logger.warning(f"Model warmup failed (continuing anyway): {warmup_error}")
-
-        # Process ALL cameras with retry mechanism for reliability
-        failed_cameras = []
-
-        for i, video_uri in enumerate(reordered_videos[:videos_to_analyze]):
-            logger.info(f"Analyzing video {i+1}/{videos_to_analyze}: {video_uri}")
+        # Per-camera result cache: cameras whose (video content, model, prompt set, sampling) key
+        # already has a result are not re-analyzed, so a re-run resumes at camera granularity
+        content_hashes = {}          # source URI -> content fingerprint
+        internvideo_cache_keys = {}  # video URI -> InternVideo2.5 result cache key
+        if result_cache_enabled() and tokenizer is not None:
+            internvideo_cache_config = get_internvideo_cache_config(tokenizer, automotive_prompts)
+            for video_uri in reordered_videos:
+                source_uri = internvideo_cache_uris.get(video_uri) or model_video_uris.get(video_uri, video_uri)
+                content_hashes[source_uri] = get_s3_content_hash(source_uri)
+                if content_hashes[source_uri] is None:
+                    continue
+
+                internvideo_cache_keys[video_uri] = result_cache_key(content_hashes[source_uri], internvideo_cache_config)
+                cached_analysis = read_cached_result('internvideo', internvideo_cache_keys[video_uri])
+                if cached_analysis is not None:
+                    all_video_analysis[video_uri] = cached_analysis
+                    stage_metrics.mark_cached(video_uri, 'internvideo')
+            logger.info(f"Result cache: {len(all_video_analysis)}/{videos_to_analyze} cameras already analyzed")
 
+        # FIXED: Add model warmup to prevent initialization issues
+        # (once per process - a worker's resident model is already warm)
+        if INTERNVIDEO_WARMED_UP:
+            logger.info("Model already warm - skipping warmup inference")
+        else:
+            logger.info("Performing model warmup inference to ensure proper initialization...")
             try:
-                # Download video locally
-                local_video_path = f"/tmp/{scene_id}_video_{i}.mp4"
-                load_video_from_s3(video_uri, local_video_path)
-
-                # Analyze with InternVideo2.5
-                video_analysis = analyze_video_with_internvideo25(
-                    model, tokenizer, local_video_path, automotive_prompts
+                # Get device and dtype from model (fix for undefined 'device' variable)
+                model_device = next(model.parameters()).device
+                model_dtype = next(model.parameters()).dtype
+                target_dtype = torch.bfloat16 if model_dtype == torch.bfloat16 else model_dtype
+
+                # Define generation config (fix for undefined 'generation_config' variable)
+                warmup_generation_config = dict(
+                    do_sample=True,
+                    temperature=0.3,
+                    max_new_tokens=1024,
+                    min_length=100,
+                    top_p=0.9,
+                    num_beams=1,
+                    repetition_penalty=1.2,
+                    pad_token_id=tokenizer.eos_token_id,
                 )
 
-                # Check if output is valid (not garbage)
-                output_text = str(video_analysis.get('results', {}).get(automotive_prompts[0], ''))
-                if len(output_text) < 50 or '<track_begin>' in output_text or '<tracking>' in output_text:
-                    logger.warning(f"Camera {video_uri} produced short/garbage output ({len(output_text)} chars), marking for retry")
-                    failed_cameras.append((i, video_uri, local_video_path))
-                else:
-                    logger.info(f"Camera {video_uri} processed successfully ({len(output_text)} chars)")
-
-                all_video_analysis[video_uri] = video_analysis
+                # Create dummy tensors matching expected input format
+                dummy_frames = torch.randn(8, 3, 448, 448, dtype=target_dtype, device=model_device)
+                dummy_patches = [1] * 8
+                dummy_question = "Frame1: <image>\nFrame2: <image>\nFrame3: <image>\nFrame4: <image>\nFrame5: <image>\nFrame6: <image>\nFrame7: <image>\nFrame8: <image>\nDescribe this test scene briefly."
 
-            except Exception as camera_error:
-                logger.error(f"Camera {video_uri} failed: {camera_error}")
-                failed_cameras.append((i, video_uri, None))
-                # Continue processing other cameras
-
-            # Clean up local video file
-            if os.path.exists(local_video_path):
-                os.remove(local_video_path)
+                # Warmup inference (output discarded) - wrapped in torch.no_grad()
+                with torch.no_grad():
+                    _, _ = model.chat(tokenizer, dummy_frames, dummy_question, warmup_generation_config,
+                                    num_patches_list=dummy_patches, history=None, return_history=True)
+                logger.info("Model warmup completed successfully - ready for real processing")
+                INTERNVIDEO_WARMED_UP = worker_mode_enabled()
+            except Exception as warmup_error:
+                logger.warning(f"Model warmup failed (continuing anyway): {warmup_error}")
 
-            # ---------------------------------------------------------
-            # Aggressive GPU Memory Management
-            # ---------------------------------------------------------
-            # The InternVideo2.5 model with INT4 quantization creates large KV caches
-            # for each video. Without cleanup, GPU memory fragments and causes
-            # hallucination artifacts like "<track_begin> <tracking> answer."
+        # Process ALL cameras with retry mechanism for reliability
+        failed_cameras = []
+        shared_cosmos_frames = {}  # video URI -> 8x448x448x3 uint8 frames sampled during the InternVideo2.5 decode
+
+        # Scheduler: CPU threads download and decode the next cameras (INTERNVIDEO_PREFETCH)
+        # while the current batch of cameras is on the accelerator
+        camera_jobs = [(i, video_uri) for i, video_uri in enumerate(reordered_videos[:videos_to_analyze]) if video_uri not in all_video_analysis]
+        prefetch_depth = max(1, int(os.getenv('INTERNVIDEO_PREFETCH', '2')))
+        camera_batch_size = None  # Sized from free device memory once the first camera is decoded
+        prefetch_pool = ThreadPoolExecutor(max_workers=prefetch_depth)
+        pending = deque()
+
+        # All camera downloads start now (PHASE3_DOWNLOAD_CONCURRENCY at a time); each camera's
+        # decode starts once its file is complete while the rest keep downloading
+        camera_sources = {i: internvideo_cache_uris.get(video_uri) or model_video_uris.get(video_uri, video_uri) for i, video_uri in camera_jobs}
+        download_pool = ThreadPoolExecutor(max_workers=max(1, int(os.getenv('PHASE3_DOWNLOAD_CONCURRENCY', '6'))))
+        camera_downloads = start_camera_downloads(
+            scene_id, [(i, video_uri, camera_sources[i]) for i, video_uri in camera_jobs], download_pool, stage_metrics
+        )
+        remaining_jobs = deque(camera_jobs)
 
-            # Delete heavy objects holding GPU tensors
-            del video_analysis
+        try:
+            while remaining_jobs or pending:
+                # Keep enough cameras in flight to fill the next batch plus the prefetch depth,
+                # preferring cameras whose download has already finished
+                while remaining_jobs and len(pending) < prefetch_depth + (camera_batch_size or 1):
+                    next_job = next((job for job in remaining_jobs if camera_downloads[job[0]].done()), remaining_jobs[0])
+                    remaining_jobs.remove(next_job)
+                    i, video_uri = next_job
+                    pending.append(prefetch_pool.submit(
+                        prepare_camera_video, scene_id, i, video_uri, camera_sources[i], camera_downloads[i], stage_metrics
+                    ))
+
+                batch = [pending.popleft().result()]
+                if camera_batch_size is None and batch[0]['error'] is None:
+                    camera_batch_size = estimate_camera_batch_size(
+                        model, batch[0]['pixel_values'], len(automotive_prompts),
+                        get_analysis_generation_config(tokenizer)['max_new_tokens'] if tokenizer is not None else 0
+                    )
+                while pending and len(batch) < (camera_batch_size or 1):
+                    batch.append(pending.popleft().result())
+
+                ready = []
+                for camera in batch:
+                    logger.info(f"Analyzing video {camera['index']+1}/{videos_to_analyze}: {camera['video_uri']}")
+                    if camera['error'] is not None:
+                        logger.error(f"Camera {camera['video_uri']} failed: {camera['error']}")
+                        failed_cameras.append((camera['index'], camera['video_uri'], None))
+                    else:
+                        ready.append(camera)
+                        if camera.get('cosmos_frames') is not None:
+                            # Cosmos-Embed1 frames from the same decode, kept on CPU until the Cosmos stage
+                            shared_cosmos_frames[camera['video_uri']] = camera['cosmos_frames']
 
-            # Force Python to release memory references
-            gc.collect()
+                # Analyze with InternVideo2.5 (one batched call when several cameras are ready)
+                StageMetrics.reset_device_peak()
+                analyses = analyze_videos_with_internvideo25(model, tokenizer, ready, automotive_prompts, stage_metrics) if ready else []
+                stage_metrics.record_memory([camera['video_uri'] for camera in ready])
 
-            # Force PyTorch to defragment GPU memory pools
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
+                for camera, video_analysis in zip(ready, analyses):
+                    video_uri = camera['video_uri']
 
-            logger.info(f"GPU Memory cleared after video {i+1}")
-            # ---------------------------------------------------------
+                    # Check if output is valid (not garbage)
+                    output_text = str(video_analysis.get('results', {}).get(automotive_prompts[0], ''))
+                    if len(output_text) < 50 or '<track_begin>' in output_text or '<tracking>' in output_text:
+                        logger.warning(f"Camera {video_uri} produced short/garbage output ({len(output_text)} chars), marking for retry")
+                        failed_cameras.append((camera['index'], video_uri, camera['local_video_path']))
+                    else:
+                        logger.info(f"Camera {video_uri} processed successfully ({len(output_text)} chars)")
+                        if video_uri in internvideo_cache_keys and video_analysis.get('analysis_method') == 'internvideo25':
+                            write_cached_result('internvideo', internvideo_cache_keys[video_uri], video_analysis)
+
+                    all_video_analysis[video_uri] = video_analysis
+
+                # Clean up local video files
+                for camera in batch:
+                    if os.path.exists(camera['local_video_path']):
+                        os.remove(camera['local_video_path'])
+
+                # ---------------------------------------------------------
+                # Aggressive GPU Memory Management
+                # ---------------------------------------------------------
+                # The InternVideo2.5 model with INT4 quantization creates large KV caches
+                # for each video. Without cleanup, GPU memory fragments and causes
+                # hallucination artifacts like "<track_begin> <tracking> answer."
+
+                # Delete heavy objects holding GPU tensors
+                del batch, ready, analyses
+
+                # Force Python to release memory references
+                gc.collect()
+
+                # Force PyTorch to defragment GPU memory pools
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+
+                logger.info("GPU Memory cleared after video batch")
+                # ---------------------------------------------------------
+        finally:
+            prefetch_pool.shutdown(wait=True, cancel_futures=True)
+            download_pool.shutdown(wait=True, cancel_futures=True)
+            # Downloads never handed to a batch (e.g. after an error) are removed here
+            for i, source_uri in camera_sources.items():
+                local_video_path = get_camera_local_path(scene_id, i, source_uri)
+                if os.path.exists(local_video_path):
+                    os.remove(local_video_path)
 
         # Retry failed cameras after model warmup from successful ones
         if failed_cameras:
@@ -1170,18 +2269,25 @@ def main():
 
                     # Download fresh copy for retry
                     logger.info(f"Re-downloading video for retry: {video_uri} -> {retry_video_path}")
-                    load_video_from_s3(video_uri, retry_video_path)
+                    with StageMetrics.timed(stage_metrics, video_uri, 'download'):
+                        load_video_from_s3(video_uri, retry_video_path)
 
                     # Retry analysis with warmed-up model using the fresh path
+                    retry_timings = {}
+                    StageMetrics.reset_device_peak()
                     video_analysis = analyze_video_with_internvideo25(
-                        model, tokenizer, retry_video_path, automotive_prompts
+                        model, tokenizer, retry_video_path, automotive_prompts, timings=retry_timings
                     )
+                    stage_metrics.add_timings(video_uri, retry_timings)
+                    stage_metrics.record_memory([video_uri])
 
                     # Check retry result
                     output_text = str(video_analysis.get('results', {}).get(automotive_prompts[0], ''))
                     if len(output_text) >= 50 and '<track_begin>' not in output_text:
                         logger.info(f"RETRY SUCCESS: {video_uri} now works ({len(output_text)} chars)")
                         all_video_analysis[video_uri] = video_analysis
+                        if video_uri in internvideo_cache_keys and video_analysis.get('analysis_method') == 'internvideo25':
+                            write_cached_result('internvideo', internvideo_cache_keys[video_uri], video_analysis)
                     else:
                         logger.warning(f"RETRY FAILED: {video_uri} still produces garbage ({len(output_text)} chars)")
 
@@ -1196,11 +2302,15 @@ def main():
         # ============================================================================
         # CRITICAL: Unload InternVideo2.5 Model Before Loading Cosmos
         # ============================================================================
-        logger.info("InternVideo2.5 analysis complete. Unloading model to free GPU memory for Cosmos...")
-        unload_internvideo25_model(model, tokenizer)
+        # (worker mode keeps both models resident for the next scene)
+        if worker_mode_enabled():
+            logger.info("InternVideo2.5 analysis complete. Worker mode - keeping model loaded")
+        else:
+            logger.info("InternVideo2.5 analysis complete. Unloading model to free GPU memory for Cosmos...")
+            unload_internvideo25_model(model, tokenizer)
+            logger.info("InternVideo2.5 model unloaded successfully")
         model = None      # Safety: ensure references are gone
         tokenizer = None
-        logger.info("InternVideo2.5 model unloaded successfully")
         # ============================================================================
 
         # ============================================================================
@@ -1214,12 +2324,54 @@ def main():
         for i, video_uri in enumerate(video_s3_uris):
             logger.info(f"Generating Cosmos embedding for video {i+1}/{len(video_s3_uris)}")
 
-            # Download video locally for Cosmos processing
-            local_video_path = f"/tmp/{scene_id}_cosmos_video_{i}.mp4"
-            load_video_from_s3(video_uri, local_video_path)
+            # One Cosmos source per camera, whatever the InternVideo2.5 stage did (result cache hit,
+            # frame cache or decode): the Phase 2 Cosmos frame cache, else the proxy rendition, else
+            # the web video. Frames shared from the InternVideo2.5 decode come from the proxy, so they
+            # are only used when the proxy is that source
+            cosmos_source_uri = cosmos_cache_uris.get(video_uri) or model_video_uris.get(video_uri, video_uri)
+            shared_frames = shared_cosmos_frames.pop(video_uri, None)
+            if video_uri in cosmos_cache_uris:
+                shared_frames = None
+
+            # Result cache keyed on the bytes of that source
+            cosmos_cache_key = None
+            if result_cache_enabled():
+                if cosmos_source_uri not in content_hashes:
+                    content_hashes[cosmos_source_uri] = get_s3_content_hash(cosmos_source_uri)
+                if content_hashes[cosmos_source_uri] is not None:
+                    cosmos_cache_key = result_cache_key(content_hashes[cosmos_source_uri], get_cosmos_cache_config())
+                    cached_embedding = read_cached_result('cosmos', cosmos_cache_key)
+                    if cached_embedding is not None:
+                        cosmos_embeddings[video_uri] = cached_embedding
+                        stage_metrics.mark_cached(video_uri, 'cosmos')
+                        logger.info(f"Result cache: reusing Cosmos embedding for {video_uri}")
+                        continue
+
+            if shared_frames is not None:
+                local_video_path = video_uri
+            elif video_uri in cosmos_cache_uris:
+                local_video_path = f"/tmp/{scene_id}_cosmos_video_{i}.npy"
+                with StageMetrics.timed(stage_metrics, video_uri, 'download'):
+                    load_video_from_s3(cosmos_source_uri, local_video_path)
+            else:
+                local_video_path = f"/tmp/{scene_id}_cosmos_video_{i}.mp4"
+                with StageMetrics.timed(stage_metrics, video_uri, 'download'):
+                    load_video_from_s3(cosmos_source_uri, local_video_path)
+                # Same decode and resize as frames shared from the InternVideo2.5 stage, so the
+                # embedding does not depend on which stage decoded the video
+                if COSMOS_AVAILABLE:
+                    try:
+                        shared_frames = resize_cosmos_frames(
+                            decode_sampled_frames(local_video_path, {'cosmos': get_cosmos_frame_indices})['cosmos']
+                        )
+                    except Exception as e:
+                        logger.warning(f"Cosmos frame decode failed for {video_uri}, using OpenCV: {e}")
 
             # Generate Cosmos video embedding (768-dim, matches Cohere)
-            cosmos_embedding = cosmos_embed_video(local_video_path)
+            StageMetrics.reset_device_peak()
+            with StageMetrics.timed(stage_metrics, video_uri, 'cosmos'):
+                cosmos_embedding = cosmos_embed_video(local_video_path, frames=shared_frames)
+            stage_metrics.record_memory([video_uri])
 
             if cosmos_embedding is not None:
                 cosmos_embeddings[video_uri] = {
@@ -1229,6 +2381,8 @@ def main():
                     "l2_normalized": True
                 }
                 logger.info(f"SUCCESS: Cosmos embedding generated for {video_uri}: {cosmos_embedding.shape[0]} dimensions")
+                if cosmos_cache_key:
+                    write_cached_result('cosmos', cosmos_cache_key, cosmos_embeddings[video_uri])
             else:
                 logger.error(f"ERROR: Failed to generate Cosmos embedding for {video_uri}")
                 cosmos_embeddings[video_uri] = None
@@ -1272,7 +2426,8 @@ def main():
         model_outputs = {}  # Multi-camera aggregate doesn't have single model outputs
         analysis_method = primary_analysis.get('analysis_method', 'multi_camera_aggregate')
 
-        parsed_metrics = parse_video_analysis_to_metrics(analysis_results)
+        with StageMetrics.timed(stage_metrics, None, 'parsing'):
+            parsed_metrics = parse_video_analysis_to_metrics(analysis_results)
 
         # Apply industry standards framework (same as backup)
         industry_metrics = apply_industry_standards_to_parsed_metrics(parsed_metrics)
@@ -1290,7 +2445,9 @@ def main():
         }
 
         # Add downstream interface data (NO CHANGES to phases 4-6 needed)
-        downstream_data = format_to_downstream_interface(industry_metrics, scene_id, phase2_data, all_video_analysis, fallback_used)
+        with StageMetrics.timed(stage_metrics, None, 'downstream_formatting'):
+            structured_metrics = aggregate_structured_metrics(all_video_analysis, video_s3_uris)
+            downstream_data = format_to_downstream_interface(industry_metrics, scene_id, phase2_data, all_video_analysis, fallback_used, structured_metrics)
         output_data.update(downstream_data)
 
         # Add InternVideo2.5 raw outputs as supplementary metadata (doesn't break existing interface)
@@ -1339,12 +2496,37 @@ def main():
         # IDENTICAL S3 verification
         verify_s3_output_exists(s3_bucket, output_s3_key)
 
+        # Stage timing/memory record next to the analysis output (best effort)
+        metrics_s3_key = f"{os.path.dirname(output_s3_key)}/internvideo25_stage_metrics.json"
+        try:
+            stage_metrics_record = stage_metrics.to_dict({
+                "internvideo_model": os.getenv('INTERNVIDEO_MODEL_PATH', 'OpenGVLab/InternVideo2_5_Chat_8B'),
+                "cosmos_model": os.getenv('COSMOS_MODEL_PATH', 'nvidia/Cosmos-Embed1-448p'),
+                "prompts_sha256": hashlib.sha256(json.dumps(automotive_prompts).encode()).hexdigest(),
+                "num_frames": int(os.getenv('INTERNVIDEO_NUM_FRAMES', '8')),
+                "input_size": int(os.getenv('INTERNVIDEO_INPUT_SIZE', '224')),
+                "prompt_mode": os.getenv('INTERNVIDEO_PROMPT_MODE', 'batched').lower(),
+                "metrics_profile": metrics_profile_enabled(),
+                "camera_batch_size": camera_batch_size,
+                "worker_mode": worker_mode_enabled(),
+            })
+            s3_client.put_object(
+                Bucket=s3_bucket,
+                Key=metrics_s3_key,
+                Body=json.dumps(stage_metrics_record, indent=2),
+                ContentType='application/json'
+            )
+            logger.info(f"Stage metrics: {stage_metrics_record['scene']} -> s3://{s3_bucket}/{metrics_s3_key}")
+        except Exception as e:
+            logger.warning(f"Failed to write stage metrics: {e}")
+
         # IDENTICAL Step Functions success callback
         success_payload = {"output_s3_key": output_s3_key, "s3_uri": f"s3://{s3_bucket}/{output_s3_key}"}
-        sfn_client.send_task_success(
-            taskToken=task_token,
-            output=json.dumps(success_payload)
-        )
+        if task_token:
+            sfn_client.send_task_success(
+                taskToken=task_token,
+                output=json.dumps(success_payload)
+            )
 
         # Cleanup
         if os.path.exists(local_phase2_path):
@@ -1387,7 +2569,8 @@ def apply_industry_standards_to_parsed_metrics(parsed_metrics: Dict[str, Any]) -
         "raw_analysis": parsed_metrics.get('raw_analysis', {})
     }
 
-def format_to_downstream_interface(metrics: Dict[str, Any], scene_id: str, phase2_data: Dict[str, Any], video_analysis: Dict[str, Any], fallback_used: bool) -> Dict[str, Any]:
+def format_to_downstream_interface(metrics: Dict[str, Any], scene_id: str, phase2_data: Dict[str, Any], video_analysis: Dict[str, Any], fallback_used: bool,
+                                   structured_metrics: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Format scene description into interface structure for downstream phases"""
 
     # Extract scene description directly (it was put there by parse_video_analysis_to_metrics)
@@ -1400,9 +2583,12 @@ def format_to_downstream_interface(metrics: Dict[str, Any], scene_id: str, phase
                  scene_description = value.strip()
                  break
 
-    # Extract quantified metrics using Claude-Haiku with visual evidence grounding
-    # GenAI extracts metrics from rich scene descriptions
-    quantified_metrics = extract_quantified_metrics_from_scene_description(scene_description)
+    # Quantified metrics: InternVideo2.5 metrics profile (schema-validated JSON) when available,
+    # otherwise Claude-Haiku extraction grounded in the rich scene description
+    if structured_metrics:
+        quantified_metrics = structured_metrics
+    else:
+        quantified_metrics = extract_quantified_metrics_from_scene_description(scene_description)
     logger.info(f"Quantified metrics extracted: {list(quantified_metrics.keys())}")
 
     # Scene context from video analysis (keep this helper if it still works, otherwise remove)
@@ -1532,5 +2718,211 @@ def verify_s3_output_exists(bucket: str, key: str):
     except Exception as e:
         raise RuntimeError(f"Failed to verify S3 output: {str(e)}")
 
+def poll_activity_job(activity_arn: str) -> Optional[Dict[str, Any]]:
+    """
+    Long-poll a Step Functions activity for the next scene job
+
+    The activity input carries the same fields as the ECS task environment
+    (scene_id, input_s3_key, output_s3_key) and the activity task token replaces
+    STEP_FUNCTIONS_TASK_TOKEN.
+
+    Returns:
+        Job dict, or None when the poll times out without work
+    """
+    response = sfn_activity_client.get_activity_task(
+        activityArn=activity_arn,
+        workerName=os.getenv('PHASE3_WORKER_NAME', f"phase3-{os.uname().nodename}-{os.getpid()}")
+    )
+    task_token = response.get('taskToken')
+    if not task_token:
+        return None
+
+    job = json.loads(response.get('input') or '{}')
+    job['task_token'] = task_token
+    return job
+
+def get_job_claim_timeout() -> int:
+    """Seconds after which a *.json.running claim without heartbeats is considered abandoned (0 = never)"""
+    return int(os.getenv('PHASE3_JOB_CLAIM_TIMEOUT_SEC', '1800'))
+
+def list_jobs_by_mtime(pattern: str) -> List[Tuple[float, str]]:
+    """(mtime, path) for matching files, oldest first; files renamed away meanwhile are skipped"""
+    jobs = []
+    for path in glob.glob(pattern):
+        try:
+            jobs.append((os.path.getmtime(path), path))
+        except OSError:
+            continue  # Claimed or finished by another worker since the glob
+    return sorted(jobs)
+
+def reclaim_stale_jobs(job_dir: str, claim_timeout: int):
+    """Return claims whose worker stopped heartbeating (e.g. it crashed) to the pending queue"""
+    if not claim_timeout:
+        return
+    cutoff = time.time() - claim_timeout
+    for claimed_at, claim_path in list_jobs_by_mtime(os.path.join(job_dir, '*.json.running')):
+        if claimed_at >= cutoff:
+            break
+        try:
+            os.rename(claim_path, claim_path[:-len('.running')])
+            logger.warning(f"Reclaimed abandoned job {claim_path} (no heartbeat for {claim_timeout}s)")
+        except OSError:
+            continue  # Finished or reclaimed by another worker
+
+def heartbeat_job_claim(claim_path: str, stop_event: threading.Event, interval: float):
+    """Keep a claim's mtime fresh while its job runs so other workers don't reclaim it"""
+    while not stop_event.wait(interval):
+        try:
+            os.utime(claim_path)
+        except OSError:
+            return
+
+def poll_directory_job(job_dir: str) -> Optional[Dict[str, Any]]:
+    """
+    Claim the oldest *.json scene job in a local job directory
+
+    A job is claimed by renaming it to *.json.running (atomic, so several workers can
+    share one directory) and is finished as *.json.done or *.json.failed. The running
+    worker touches its claim periodically; claims older than PHASE3_JOB_CLAIM_TIMEOUT_SEC
+    (default 1800, 0 = never) are assumed abandoned and put back as *.json.
+
+    Returns:
+        Job dict with its claim path, or None when the directory has no pending jobs
+    """
+    reclaim_stale_jobs(job_dir, get_job_claim_timeout())
+
+    for _, job_path in list_jobs_by_mtime(os.path.join(job_dir, '*.json')):
+        claim_path = f"{job_path}.running"
+        try:
+            os.rename(job_path, claim_path)
+            os.utime(claim_path)  # Claim age is measured from now, not from job submission
+        except OSError:
+            continue  # Claimed by another worker
+
+        try:
+            with open(claim_path) as f:
+                job = json.load(f)
+        except Exception as e:
+            logger.error(f"Invalid job file {job_path}: {e}")
+            os.rename(claim_path, f"{job_path}.failed")
+            continue
+
+        job['claim_path'] = claim_path
+        return job
+
+    return None
+
+def run_scene_job(job: Dict[str, Any]) -> bool:
+    """
+    Run main() for one worker job with the job's fields as its environment
+
+    Returns:
+        True if the scene completed successfully
+    """
+    job_env = {
+        'SCENE_ID': job.get('scene_id', ''),
+        'INPUT_S3_KEY': job.get('input_s3_key', ''),
+        'OUTPUT_S3_KEY': job.get('output_s3_key', ''),
+        'STEP_FUNCTIONS_TASK_TOKEN': job.get('task_token', ''),
+        'PHASE3_JOB_SOURCE': 'directory' if 'claim_path' in job else 'activity',
+    }
+    if job.get('s3_bucket'):
+        job_env['S3_BUCKET'] = job['s3_bucket']
+
+    previous_env = {key: os.environ.get(key) for key in job_env}
+    os.environ.update(job_env)
+    try:
+        main()
+        return True
+    except SystemExit as exit_error:
+        # main() reports the failure (and Step Functions callback) before exiting
+        return not exit_error.code
+    finally:
+        for key, value in previous_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+def run_worker():
+    """
+    Long-lived Phase 3 worker (PHASE3_WORKER_MODE=true)
+
+    Loads InternVideo2.5 and Cosmos-Embed1 once and keeps them resident, then processes
+    scene jobs from a Step Functions activity (PHASE3_ACTIVITY_ARN) or a local job
+    directory (PHASE3_JOB_DIR) until PHASE3_WORKER_MAX_IDLE_SEC passes without work
+    (0 = run forever). Both models must fit in device memory together; COSMOS_DEVICE=cpu
+    moves Cosmos-Embed1 off the GPU if they do not.
+    """
+    activity_arn = os.getenv('PHASE3_ACTIVITY_ARN')
+    job_dir = os.getenv('PHASE3_JOB_DIR')
+    if not activity_arn and not job_dir:
+        raise ValueError("Worker mode requires PHASE3_ACTIVITY_ARN or PHASE3_JOB_DIR")
+
+    max_idle_seconds = int(os.getenv('PHASE3_WORKER_MAX_IDLE_SEC', '0'))
+    poll_interval = float(os.getenv('PHASE3_JOB_POLL_SEC', '5'))
+
+    logger.info(f"Starting Phase 3 worker ({'activity ' + activity_arn if activity_arn else 'job directory ' + job_dir})")
+    load_start = time.time()
+    model, _ = load_internvideo25_model()
+    if model is None:
+        raise RuntimeError("InternVideo2.5 model failed to load - worker not started")
+    load_cosmos_embed1_model()
+    logger.info(f"Worker models loaded in {time.time() - load_start:.1f}s")
+
+    completed, failed = 0, 0
+    poll_failures = 0
+    idle_since = time.time()
+    while True:
+        try:
+            job = poll_activity_job(activity_arn) if activity_arn else poll_directory_job(job_dir)
+            poll_failures = 0
+        except (BotoCoreError, ClientError) as e:
+            # Transient service or network errors must not take down an idle worker
+            poll_failures += 1
+            backoff = min(poll_interval * 2 ** (poll_failures - 1), 300.0)
+            logger.warning(f"Job poll failed ({poll_failures} in a row): {e} - retrying in {backoff:.0f}s")
+            time.sleep(backoff)
+            continue
+
+        if job is None:
+            if max_idle_seconds and time.time() - idle_since >= max_idle_seconds:
+                logger.info(f"Worker idle for {max_idle_seconds}s - exiting ({completed} completed, {failed} failed)")
+                return
+            if not activity_arn:
+                time.sleep(poll_interval)  # Activity polls already block for up to a minute
+            continue
+
+        logger.info(f"Worker job: scene {job.get('scene_id')}")
+        heartbeat_stop = threading.Event()
+        if 'claim_path' in job:
+            claim_timeout = get_job_claim_timeout()
+            threading.Thread(
+                target=heartbeat_job_claim,
+                args=(job['claim_path'], heartbeat_stop, min(60.0, claim_timeout / 4) if claim_timeout else 60.0),
+                daemon=True
+            ).start()
+        try:
+            succeeded = run_scene_job(job)
+        finally:
+            heartbeat_stop.set()
+        if succeeded:
+            completed += 1
+        else:
+            failed += 1
+
+        if 'claim_path' in job:
+            try:
+                os.rename(job['claim_path'], job['claim_path'][:-len('.running')] + ('.done' if succeeded else '.failed'))
+            except OSError as e:
+                logger.warning(f"Could not finish job claim {job['claim_path']}: {e}")
+        idle_since = time.time()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if worker_mode_enabled():
+        run_worker()
+    else:
+        main()
\ No newline at end of file
@@ -10,9 +10,14 @@ import json
 import boto3
 import logging
 import numpy as np
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, Any, List, Tuple
 
+from embedding_cache import embedding_cache, embedding_cache_key
+from local_s3vectors import create_s3vectors_client
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -22,7 +27,13 @@ _aws_region = os.environ.get('AWS_REGION', os.environ.get('AWS_DEFAULT_REGION',
 s3_client = boto3.client('s3')
 sfn_client = boto3.client('stepfunctions')
 bedrock_client = boto3.client('bedrock-runtime', region_name=_aws_region)
-s3vectors_client = boto3.client('s3vectors')
+
+
+# Adaptive retry mode: throttled put_vectors calls back off and the client rate-limits itself
+s3vectors_client = create_s3vectors_client(config=Config(
+    retries={'max_attempts': int(os.getenv('S3VECTORS_MAX_ATTEMPTS', '10')), 'mode': 'adaptive'},
+    max_pool_connections=int(os.getenv('S3VECTORS_PUT_CONCURRENCY', '4')) * 2
+))
 
 # ============================================================================
 # Helper Functions for Camera-Specific ID Processing
@@ -180,6 +191,113 @@ def extract_behavioral_keywords(scene_description: str) -> List[str]:
 
     return keywords
 
+COHERE_MODEL_ID = "us.cohere.embed-v4:0"
+# Cohere embed request limits: texts per request, and a token budget per request
+# (estimated at ~4 characters per token, since no tokenizer is available here)
+COHERE_MAX_BATCH_TEXTS = int(os.getenv('COHERE_MAX_BATCH_TEXTS', '96'))
+COHERE_MAX_BATCH_TOKENS = int(os.getenv('COHERE_MAX_BATCH_TOKENS', '128000'))
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for request packing (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+def pack_embedding_batches(texts: List[str], max_texts: int = None, max_tokens: int = None) -> List[List[int]]:
+    """
+    Greedily pack texts, in order, into as few embedding requests as the limits allow
+
+    Args:
+        texts: Texts to embed
+        max_texts: Maximum texts per request (default COHERE_MAX_BATCH_TEXTS)
+        max_tokens: Maximum estimated tokens per request (default COHERE_MAX_BATCH_TOKENS);
+            a single text over the budget still gets a request of its own
+
+    Returns:
+        Lists of indices into texts, one list per request
+    """
+    max_texts = max_texts or COHERE_MAX_BATCH_TEXTS
+    max_tokens = max_tokens or COHERE_MAX_BATCH_TOKENS
+
+    batches = []
+    current, current_tokens = [], 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (len(current) >= max_texts or current_tokens + tokens > max_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+def invoke_cohere_embed(texts: List[str], input_type: str = "search_document") -> List[List[float]]:
+    """One Bedrock Cohere embed request for several texts; returns float32 vectors in input order"""
+    response = bedrock_client.invoke_model(
+        modelId=COHERE_MODEL_ID,
+        contentType='application/json',
+        accept='application/json',
+        body=json.dumps({
+            "texts": texts,
+            "input_type": input_type,
+            "embedding_types": ["float"],
+            "truncate": "NONE"  # Ensures full 1536 dimensions
+        })
+    )
+
+    response_body = json.loads(response['body'].read())
+    embedding_vectors = response_body['embeddings']['float']
+    if len(embedding_vectors) != len(texts):
+        raise ValueError(f"Cohere returned {len(embedding_vectors)} embeddings for {len(texts)} texts")
+
+    # Safer embedding vector handling (prevents format change bugs)
+    return [np.array(vector, dtype=np.float32).tolist() for vector in embedding_vectors]
+
+def generate_cohere_embeddings(texts: List[str], input_type: str = "search_document") -> List[List[float]]:
+    """
+    Generate Cohere embeddings for many texts with as few Bedrock requests as possible
+
+    Texts already in the embedding cache are served from it. The rest are packed by
+    pack_embedding_batches; if a packed request fails, its texts are retried one per
+    request so a single bad input only fails itself.
+
+    Args:
+        texts: Texts to embed
+        input_type: Cohere input type
+
+    Returns:
+        One 1536-dimensional vector per text, in order (None where generation failed)
+    """
+    cache_keys = [embedding_cache_key(COHERE_MODEL_ID, input_type, text) for text in texts]
+    embeddings = embedding_cache.get_many(cache_keys)
+    missing = [i for i, vector in enumerate(embeddings) if vector is None]
+
+    batches = [[missing[j] for j in batch] for batch in pack_embedding_batches([texts[i] for i in missing])]
+    logger.info(f"Generating {len(texts)} Cohere embeddings: {len(texts) - len(missing)} cached, "
+                f"{len(missing)} in {len(batches)} request(s)")
+
+    for batch in batches:
+        try:
+            for i, vector in zip(batch, invoke_cohere_embed([texts[i] for i in batch], input_type)):
+                embeddings[i] = vector
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"Failed to generate Cohere embedding: {str(e)}")
+                continue
+            logger.warning(f"Batched Cohere request of {len(batch)} texts failed ({e}), retrying one text per request")
+
+            for i in batch:
+                try:
+                    embeddings[i] = invoke_cohere_embed([texts[i]], input_type)[0]
+                except Exception as e:
+                    logger.error(f"Failed to generate Cohere embedding for: {texts[i][:50]}...: {str(e)}")
+
+        for i in batch:
+            if embeddings[i] is not None:
+                embedding_cache.put_key(cache_keys[i], embeddings[i])
+
+    return embeddings
+
 def generate_cohere_embedding(text: str) -> List[float]:
     """
     Generate Cohere embedding for structured behavioral text
@@ -190,38 +308,11 @@ def generate_cohere_embedding(text: str) -> List[float]:
     Returns:
         1536-dimensional Cohere embedding vector (correct dimensions)
     """
-    try:
-        logger.info(f"Generating Cohere embedding for: {text[:50]}...")
-
-        response = bedrock_client.invoke_model(
-            modelId="us.cohere.embed-v4:0",
-            contentType='application/json',
-            accept='application/json',
-            body=json.dumps({
-                "texts": [text],
-                "input_type": "search_document",
-                "embedding_types": ["float"],
-                "truncate": "NONE"  # Ensures full 1536 dimensions
-            })
-        )
-
-        response_body = json.loads(response['body'].read())
-        embedding_vector = response_body['embeddings']['float'][0]
-
-        # Safer embedding vector handling (prevents format change bugs)
-        if isinstance(embedding_vector, list):
-            # It's already a list, just ensure floats
-            embedding_vector_f32 = [float(x) for x in embedding_vector]
-        else:
-            # It's a numpy array or other iterable
-            embedding_vector_f32 = np.array(embedding_vector, dtype=np.float32).tolist()
-
+    logger.info(f"Generating Cohere embedding for: {text[:50]}...")
+    embedding_vector_f32 = generate_cohere_embeddings([text])[0]
+    if embedding_vector_f32 is not None:
         logger.info(f"Generated Cohere embedding: {len(embedding_vector_f32)} dimensions")
-        return embedding_vector_f32
-
-    except Exception as e:
-        logger.error(f"Failed to generate Cohere embedding: {str(e)}")
-        return None
+    return embedding_vector_f32
 
 def main():
     """AWS orchestration handler - manages Step Functions callback pattern"""
@@ -272,15 +363,17 @@ def main():
 
         logger.info(f"Found behavioral analysis with {len(behavioral_analysis.get('insights', []))} insights")
 
-        # PURE BUSINESS LOGIC: Generate embeddings (no AWS dependencies)
+        # PURE BUSINESS LOGIC: Generate embeddings, handing records to the S3 Vectors
+        # writer as they become ready so indexing overlaps with embedding generation
+        vector_writer = VectorIndexWriter(vector_bucket_name, vector_index_name)
         embeddings_results = generate_behavioral_embeddings(
-            phase3_data, scene_id
+            phase3_data, scene_id, vector_writer
         )
 
-        # AWS Handler: Index embeddings in S3 Vectors
-        s3_vectors_results = index_embeddings_in_s3_vectors(
-            embeddings_results["s3_vectors_records"], vector_bucket_name, vector_index_name, scene_id
-        )
+        # AWS Handler: Finish indexing embeddings in S3 Vectors
+        s3_vectors_results = vector_writer.close()
+        if not embeddings_results["s3_vectors_records"]:
+            s3_vectors_results["error"] = "No vectors to index"
 
         # AWS Handler: Upload embeddings results to S3
         output_data = {
@@ -362,13 +455,16 @@ def main():
         sys.exit(1)
 
 
-def generate_behavioral_embeddings(phase3_data: Dict[str, Any], scene_id: str) -> Dict[str, Any]:
+def generate_behavioral_embeddings(phase3_data: Dict[str, Any], scene_id: str,
+                                   vector_writer: "VectorIndexWriter" = None) -> Dict[str, Any]:
     """
     THREE-INDEX ARCHITECTURE: Generate embeddings for Titan + Cohere + Cosmos indices
 
     Args:
         phase3_data: Phase 3 analysis with Cosmos embeddings and behavioral text
         scene_id: Scene identifier
+        vector_writer: If given, records are handed to it as soon as they are ready
+            (Cosmos records before Cohere generation starts)
 
     Returns:
         Dictionary with three sets of embedding vectors and metadata for separate indices
@@ -378,6 +474,66 @@ def generate_behavioral_embeddings(phase3_data: Dict[str, Any], scene_id: str) -
     # Extract behavioral analysis components for embedding
     behavioral_analysis = phase3_data.get('behavioral_analysis', {})
 
+    # ============================================================================
+    # INDEX 3: NEW COSMOS SYSTEM (Video embeddings from Phase 3)
+    # ============================================================================
+    logger.info("Processing Cosmos embeddings from Phase 3...")
+    cosmos_s3_records = []
+
+    try:
+        # Extract Cosmos embeddings from Phase 3 output (updated for individual camera architecture)
+        cosmos_data = phase3_data.get('cosmos_embeddings', {})
+        per_camera_embeddings = cosmos_data.get('per_camera_embeddings', {})
+
+        if per_camera_embeddings:
+            # Process each camera embedding separately
+            for camera_specific_id, embedding_data in per_camera_embeddings.items():
+                if embedding_data and embedding_data.get('embedding'):
+                    # Convert to float32 for consistency
+                    cosmos_vector_f32 = [float(x) for x in embedding_data['embedding']]
+
+                    # Extract camera information from Phase 3
+                    camera_name = embedding_data.get('camera_name', 'UNKNOWN')
+                    video_uri = embedding_data.get('video_uri', 'unknown')
+
+                    # Prepare Cosmos S3 Vectors records for each camera
+                    business_intelligence = extract_business_intelligence_metadata(behavioral_analysis)
+
+                    cosmos_metadata_record = {
+                        "scene_id": scene_id,
+                        "camera_id": camera_specific_id,  # e.g., "scene_0123_CAM_FRONT"
+                        "camera_name": camera_name,       # e.g., "CAM_FRONT"
+                        "video_uri": video_uri,           # Original S3 video URI
+                        "input_type": "video_frames",
+                        "successful_cameras": cosmos_data.get('successful_embeddings', 0),
+                        "total_cameras": cosmos_data.get('total_cameras', 0),
+                        "timestamp": datetime.utcnow().isoformat(),
+                        "embedding_model": "nvidia/Cosmos-Embed1-448p",
+                        "dimensions": len(cosmos_vector_f32)
+                    }
+                    cosmos_metadata_record.update(business_intelligence)
+
+                    cosmos_s3_records.append({
+                        "key": camera_specific_id,  # Use camera-specific ID as key
+                        "data": {"float32": cosmos_vector_f32},
+                        "metadata": cosmos_metadata_record,
+                        "target_index": "video-similarity-index"  # All cameras go to same index
+                    })
+
+                    logger.info(f"Processed Cosmos embedding for {camera_name}: {len(cosmos_vector_f32)} dimensions")
+
+            logger.info(f"Processed {len(cosmos_s3_records)} camera embeddings total")
+        else:
+            logger.warning("No per-camera embeddings found in Phase 3 output")
+
+    except Exception as e:
+        logger.error(f"Failed to process Cosmos embeddings: {str(e)}")
+
+    # Video vectors need no generation: start writing them while Cohere embeddings are generated
+    if vector_writer is not None:
+        vector_writer.submit(cosmos_s3_records)
+        vector_writer.flush()
+
     # ============================================================================
     # PRIMARY COHERE SYSTEM (Behavioral metadata embeddings)
     # ============================================================================
@@ -386,36 +542,32 @@ def generate_behavioral_embeddings(phase3_data: Dict[str, Any], scene_id: str) -
     # Prepare text inputs for embedding generation (similar to previous Titan logic)
     embedding_inputs = prepare_embedding_inputs(behavioral_analysis, scene_id)
 
-    # Generate embeddings using Cohere instead of Titan
+    # Structured behavioral features are embedded in the same packed requests as the inputs
+    try:
+        structured_features = extract_structured_behavioral_features(behavioral_analysis)
+    except Exception as e:
+        logger.error(f"Failed to extract structured behavioral features: {str(e)}")
+        structured_features = None
+
+    # Generate embeddings using Cohere instead of Titan: all of the scene's texts in as few
+    # multi-text requests as the text-count and token limits allow
+    texts = [input_item["text"] for input_item in embedding_inputs]
+    if structured_features:
+        texts.append(structured_features)
+    scene_embeddings = generate_cohere_embeddings(texts)
+
     cohere_embeddings = []
     cohere_s3_records = []
     cohere_metadata = {
-        "model_id": "us.cohere.embed-v4:0",
+        "model_id": COHERE_MODEL_ID,
         "dimensions": 1536,
         "processing_method": "cohere_embed_v4_1536"
     }
 
-    for input_item in embedding_inputs:
+    for input_item, embedding_vector_f32 in zip(embedding_inputs, scene_embeddings):
         try:
-            # Call Bedrock Cohere Embeddings model
-            response = bedrock_client.invoke_model(
-                modelId=cohere_metadata["model_id"],
-                contentType='application/json',
-                accept='application/json',
-                body=json.dumps({
-                    "texts": [input_item["text"]],
-                    "input_type": "search_document",
-                    "embedding_types": ["float"],
-                    "truncate": "NONE"  # SUCCESS: Ensures full 1536 dimensions, prevents truncation errors
-                })
-            )
-
-            # Parse Cohere embeddings response
-            response_body = json.loads(response['body'].read())
-            embedding_vector = response_body['embeddings']['float'][0]  # SUCCESS: Match working structured embedding format
-
-            # Convert to numpy float32 for S3 Vectors compatibility
-            embedding_vector_f32 = np.array(embedding_vector, dtype=np.float32).tolist()
+            if embedding_vector_f32 is None:
+                raise ValueError("no embedding returned")
 
             cohere_embeddings.append({
                 "input_type": input_item["type"],
@@ -459,11 +611,8 @@ def generate_behavioral_embeddings(phase3_data: Dict[str, Any], scene_id: str) -
     logger.info("Generating additional Cohere embeddings for structured features...")
 
     try:
-        # Extract structured behavioral features for Cohere
-        structured_features = extract_structured_behavioral_features(behavioral_analysis)
-
-        # Generate Cohere embedding
-        cohere_embedding_vector = generate_cohere_embedding(structured_features)
+        # Cohere embedding from the packed requests above
+        cohere_embedding_vector = scene_embeddings[-1] if structured_features else None
 
         if cohere_embedding_vector:
             # Prepare Cohere S3 Vectors records
@@ -493,61 +642,6 @@ def generate_behavioral_embeddings(phase3_data: Dict[str, Any], scene_id: str) -
     except Exception as e:
         logger.error(f"Failed to generate Cohere embeddings: {str(e)}")
 
-    # ============================================================================
-    # INDEX 3: NEW COSMOS SYSTEM (Video embeddings from Phase 3)
-    # ============================================================================
-    logger.info("Processing Cosmos embeddings from Phase 3...")
-    cosmos_s3_records = []
-
-    try:
-        # Extract Cosmos embeddings from Phase 3 output (updated for individual camera architecture)
-        cosmos_data = phase3_data.get('cosmos_embeddings', {})
-        per_camera_embeddings = cosmos_data.get('per_camera_embeddings', {})
-
-        if per_camera_embeddings:
-            # Process each camera embedding separately
-            for camera_specific_id, embedding_data in per_camera_embeddings.items():
-                if embedding_data and embedding_data.get('embedding'):
-                    # Convert to float32 for consistency
-                    cosmos_vector_f32 = [float(x) for x in embedding_data['embedding']]
-
-                    # Extract camera information from Phase 3
-                    camera_name = embedding_data.get('camera_name', 'UNKNOWN')
-                    video_uri = embedding_data.get('video_uri', 'unknown')
-
-                    # Prepare Cosmos S3 Vectors records for each camera
-                    business_intelligence = extract_business_intelligence_metadata(behavioral_analysis)
-
-                    cosmos_metadata_record = {
-                        "scene_id": scene_id,
-                        "camera_id": camera_specific_id,  # e.g., "scene_0123_CAM_FRONT"
-                        "camera_name": camera_name,       # e.g., "CAM_FRONT"
-                        "video_uri": video_uri,           # Original S3 video URI
-                        "input_type": "video_frames",
-                        "successful_cameras": cosmos_data.get('successful_embeddings', 0),
-                        "total_cameras": cosmos_data.get('total_cameras', 0),
-                        "timestamp": datetime.utcnow().isoformat(),
-                        "embedding_model": "nvidia/Cosmos-Embed1-448p",
-                        "dimensions": len(cosmos_vector_f32)
-                    }
-                    cosmos_metadata_record.update(business_intelligence)
-
-                    cosmos_s3_records.append({
-                        "key": camera_specific_id,  # Use camera-specific ID as key
-                        "data": {"float32": cosmos_vector_f32},
-                        "metadata": cosmos_metadata_record,
-                        "target_index": "video-similarity-index"  # All cameras go to same index
-                    })
-
-                    logger.info(f"Processed Cosmos embedding for {camera_name}: {len(cosmos_vector_f32)} dimensions")
-
-            logger.info(f"Processed {len(cosmos_s3_records)} camera embeddings total")
-        else:
-            logger.warning("No per-camera embeddings found in Phase 3 output")
-
-    except Exception as e:
-        logger.error(f"Failed to process Cosmos embeddings: {str(e)}")
-
     # ============================================================================
     # CONSOLIDATE RECORDS FOR INDEXER (Flat List with target_index)
     # ============================================================================
@@ -559,6 +653,9 @@ def generate_behavioral_embeddings(phase3_data: Dict[str, Any], scene_id: str) -
         if "metadata" in record and "data" in record:
             record["metadata"]["dimensions"] = len(record["data"]["float32"])
 
+    if vector_writer is not None:
+        vector_writer.submit(cohere_s3_records)
+
     # 2. Combine all records into one master list for indexer (Cohere + Cosmos only)
     all_records = cohere_s3_records + cosmos_s3_records
 
@@ -619,88 +716,110 @@ def generate_behavioral_embeddings(phase3_data: Dict[str, Any], scene_id: str) -
     }
 
 
-def index_embeddings_in_s3_vectors(vectors_records: List[Dict[str, Any]],
-                                 vector_bucket_name: str, vector_index_name: str,
-                                 scene_id: str) -> Dict[str, Any]:
+class VectorIndexWriter:
     """
-    Index embedding vectors in S3 Vectors using PutVectors API (Multi-Index Support)
+    Bounded-concurrency put_vectors writer for the multi-index architecture
 
-    Enhanced to support dual-index architecture with target_index routing:
-    - behavioral-metadata-index (Cohere 1536-dim)
-    - video-similarity-index (Cosmos 768-dim)
+    Records are routed by target_index and sent in batches of batch_size as soon as a
+    batch fills, so writes overlap with whatever is still producing records. Batches
+    for all indices share one pool of S3VECTORS_PUT_CONCURRENCY in-flight requests;
+    throttling is handled by the client's adaptive retry mode. A failed batch is
+    reported in the results without stopping the other batches.
     """
 
-    if not vectors_records:
-        return {"vectors_stored": 0, "error": "No vectors to index"}
-
-    try:
-        logger.info(f"Processing {len(vectors_records)} vectors for multi-index storage")
-
-        # ============================================================================
-        # GROUP RECORDS BY TARGET INDEX
-        # ============================================================================
-        index_batches = {}
-
-        for record in vectors_records:
+    def __init__(self, vector_bucket_name: str, default_index_name: str,
+                 batch_size: int = 100, max_concurrency: int = None):
+        self.vector_bucket_name = vector_bucket_name
+        self.default_index_name = default_index_name
+        self.batch_size = batch_size  # Recommended batch size for optimal performance
+        self.pool = ThreadPoolExecutor(max_workers=max_concurrency or int(os.getenv('S3VECTORS_PUT_CONCURRENCY', '4')))
+        self.buffers: Dict[str, List[Dict[str, Any]]] = {}
+        self.batches: List[Tuple[str, int, Any]] = []  # (index name, vector count, future)
+
+    def submit(self, records: List[Dict[str, Any]]):
+        """Queue records; full batches are sent immediately"""
+        for record in records:
             # Extract target index (default to legacy if not specified)
-            target_index = record.pop("target_index", vector_index_name)
-
-            if target_index not in index_batches:
-                index_batches[target_index] = []
+            index_name = record.get("target_index", self.default_index_name)
+            buffer = self.buffers.setdefault(index_name, [])
+            buffer.append({field: record[field] for field in ("key", "data", "metadata") if field in record})
+
+            if len(buffer) >= self.batch_size:
+                self._send(index_name, buffer)
+                self.buffers[index_name] = []
+
+    def _send(self, index_name: str, batch: List[Dict[str, Any]]):
+        future = self.pool.submit(
+            s3vectors_client.put_vectors,
+            vectorBucketName=self.vector_bucket_name,
+            indexName=index_name,
+            vectors=batch
+        )
+        self.batches.append((index_name, len(batch), future))
 
-            index_batches[target_index].append(record)
+    def flush(self):
+        """Send partial batches now (e.g. when a group of records is complete)"""
+        for index_name, buffer in self.buffers.items():
+            if buffer:
+                self._send(index_name, buffer)
+        self.buffers = {}
 
-        logger.info(f"Grouped records into {len(index_batches)} indices: {list(index_batches.keys())}")
+    def close(self) -> Dict[str, Any]:
+        """Send partial batches, wait for every write and summarize per index"""
+        self.flush()
 
-        # ============================================================================
-        # INDEX EACH GROUP SEPARATELY
-        # ============================================================================
-        batch_size = 100  # Recommended batch size for optimal performance
-        total_vectors_stored = 0
         index_results = {}
-
-        for index_name, index_records in index_batches.items():
-            vectors_stored = 0
-
-            logger.info(f"Indexing {len(index_records)} vectors in index: {index_name}")
-
-            # Process in batches for each index
-            for i in range(0, len(index_records), batch_size):
-                batch = index_records[i:i + batch_size]
-
-                response = s3vectors_client.put_vectors(
-                    vectorBucketName=vector_bucket_name,
-                    indexName=index_name,
-                    vectors=batch
-                )
-
-                vectors_stored += len(batch)
-                logger.info(f"Indexed batch of {len(batch)} vectors in {index_name} (total: {vectors_stored})")
-
-            index_results[index_name] = {
-                "vectors_stored": vectors_stored,
-                "status": "success"
-            }
-            total_vectors_stored += vectors_stored
-
-        logger.info(f"Successfully indexed all {total_vectors_stored} vectors across {len(index_batches)} indices")
-
-        return {
+        errors = []
+        for index_name, count, future in self.batches:
+            result = index_results.setdefault(index_name, {"vectors_stored": 0, "failed_batches": 0, "status": "success"})
+            try:
+                future.result()
+                result["vectors_stored"] += count
+                logger.info(f"Indexed batch of {count} vectors in {index_name} (total: {result['vectors_stored']})")
+            except Exception as e:
+                result["failed_batches"] += 1
+                result["status"] = "partial" if result["vectors_stored"] else "failed"
+                errors.append(f"{index_name}: {str(e)}")
+                logger.error(f"Failed to index batch of {count} vectors in {index_name}: {str(e)}")
+        self.pool.shutdown(wait=True)
+
+        total_vectors_stored = sum(result["vectors_stored"] for result in index_results.values())
+        logger.info(f"Indexed {total_vectors_stored} vectors across {len(index_results)} indices ({len(self.batches)} batches)")
+
+        results = {
             "vectors_stored": total_vectors_stored,
-            "vector_bucket": vector_bucket_name,
-            "indices_used": list(index_batches.keys()),
+            "vector_bucket": self.vector_bucket_name,
+            "indices_used": list(index_results.keys()),
             "index_results": index_results,  # Per-index breakdown
-            "total_batch_operations": sum((len(records) + batch_size - 1) // batch_size for records in index_batches.values()),
+            "total_batch_operations": len(self.batches),
             "indexing_timestamp": datetime.utcnow().isoformat(),
             "multi_index_architecture": True
         }
+        if errors:
+            results["error"] = f"S3 Vectors indexing failed for {len(errors)} batch(es): {'; '.join(errors)}"
+        return results
 
-    except Exception as e:
-        logger.error(f"Failed to index vectors in S3 Vectors: {str(e)}")
-        return {
-            "vectors_stored": 0,
-            "error": f"S3 Vectors indexing failed: {str(e)}"
-        }
+
+def index_embeddings_in_s3_vectors(vectors_records: List[Dict[str, Any]],
+                                 vector_bucket_name: str, vector_index_name: str,
+                                 scene_id: str) -> Dict[str, Any]:
+    """
+    Index embedding vectors in S3 Vectors using PutVectors API (Multi-Index Support)
+
+    Enhanced to support dual-index architecture with target_index routing:
+    - behavioral-metadata-index (Cohere 1536-dim)
+    - video-similarity-index (Cosmos 768-dim)
+
+    Batches for both indices are written concurrently through VectorIndexWriter.
+    """
+
+    if not vectors_records:
+        return {"vectors_stored": 0, "error": "No vectors to index"}
+
+    logger.info(f"Processing {len(vectors_records)} vectors for multi-index storage")
+    vector_writer = VectorIndexWriter(vector_bucket_name, vector_index_name)
+    vector_writer.submit(vectors_records)
+    return vector_writer.close()
 
 
 def prepare_embedding_inputs(behavioral_analysis: Dict[str, Any], scene_id: str) -> List[Dict[str, Any]]:
@@ -64,6 +64,8 @@ from strands.multiagent.base import MultiAgentBase, NodeResult, Status, MultiAge
 from strands.agent.agent_result import AgentResult
 from strands.types.content import ContentBlock, Message
 
+from local_s3vectors import create_s3vectors_client
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -135,9 +137,9 @@ class AnomalyDetector:
     The 'Anomaly Detection Agent' logic.
     Stateless: Uses S3 Vectors as the reference database to find outliers.
     """
-    def __init__(self):
-        # Initialize specific S3 Vectors client
-        self.client = boto3.client('s3vectors')
+    def __init__(self, client=None):
+        # Initialize specific S3 Vectors client (injectable for offline runs)
+        self.client = client or create_s3vectors_client()
         self.bucket = os.getenv('VECTOR_BUCKET_NAME', '')
         self.index = os.getenv('VECTOR_INDEX_NAME', 'behavioral-metadata-index')
 
@@ -3110,7 +3112,7 @@ COLLABORATION ROLE: Cross-scene pattern matcher for {scene_id}
         def _sync_query_cosmos():
             try:
                 # Following existing pattern from query_similar_scenes function
-                s3vectors_client = boto3.client('s3vectors')
+                s3vectors_client = create_s3vectors_client()
 
                 response = s3vectors_client.query_vectors(
                     vectorBucketName=os.getenv('VECTOR_BUCKET_NAME', ''),
@@ -3180,7 +3182,7 @@ COLLABORATION ROLE: Cross-scene pattern matcher for {scene_id}
                     return []
 
                 # Following existing pattern from query_similar_scenes function
-                s3vectors_client = boto3.client('s3vectors')
+                s3vectors_client = create_s3vectors_client()
 
                 response = s3vectors_client.query_vectors(
                     vectorBucketName=os.getenv('VECTOR_BUCKET_NAME', ''),
@@ -3449,7 +3451,7 @@ async def query_cosmos_video_similarity_for_scene(phase3_data: dict, scene_id: s
 
     def _sync_query():
         try:
-            s3vectors_client = boto3.client('s3vectors')
+            s3vectors_client = create_s3vectors_client()
             response = s3vectors_client.query_vectors(
                 vectorBucketName=os.getenv('VECTOR_BUCKET_NAME', ''),
                 indexName='video-similarity-index',
@@ -3517,7 +3519,7 @@ async def query_behavioral_metadata_similarity_for_scene(behavioral_text: str, s
             if len(cohere_embedding) != 1536:
                 return []
 
-            s3vectors_client = boto3.client('s3vectors')
+            s3vectors_client = create_s3vectors_client()
             response = s3vectors_client.query_vectors(
                 vectorBucketName=os.getenv('VECTOR_BUCKET_NAME', ''),
                 indexName='behavioral-metadata-index',
@@ -4192,7 +4194,7 @@ async def query_similar_scenes(scene_embeddings: List[float], workflow_filters:
 
     try:
         # Create S3 Vectors client (correct pattern from your existing code)
-        s3vectors_client = boto3.client('s3vectors')
+        s3vectors_client = create_s3vectors_client()
 
         # Use the first embedding as the query vector (most representative)
         query_vector = scene_embeddings[0] if isinstance(scene_embeddings[0], list) else scene_embeddings
@@ -8,12 +8,13 @@ Creates the two new indices required for Cosmos + Cohere architecture:
 Follows the same direct API pattern as the S3 Vectors multi-index architecture.
 """
 
-import boto3
 import time
 import logging
 import os
 from typing import Dict, Any
 
+from local_s3vectors import create_s3vectors_client
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -21,7 +22,7 @@ logger = logging.getLogger(__name__)
 class S3VectorsDualIndexCreator:
     def __init__(self):
         region = os.environ.get('AWS_REGION', os.environ.get('AWS_DEFAULT_REGION', 'us-west-2'))
-        self.s3vectors_client = boto3.client('s3vectors', region_name=region)
+        self.s3vectors_client = create_s3vectors_client(region_name=region)
         self.vector_bucket = os.getenv('VECTOR_BUCKET_NAME', '')
 
         # New index configurations
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Fleet Discovery Studio - Local S3 Vectors Stand-in
+In-process, NumPy-backed replacement for boto3.client('s3vectors') for offline runs,
+benchmarks and tests. Implements the subset of the API the pipeline, agents and
+dashboard use, with the same request and response shapes:
+
+    create_index / get_index / list_indexes / delete_index
+    put_vectors / get_vectors / list_vectors / delete_vectors
+    query_vectors (exact k-NN, metadata filters, returnDistance / returnMetadata)
+
+Every place that needs an S3 Vectors client calls create_s3vectors_client(), which
+returns this stand-in instead when S3VECTORS_LOCAL_DIR is set (this module must be
+on PYTHONPATH; the Docker images copy it next to the code that imports it, and the
+agents and API fall back to plain boto3 when it is not importable):
+
+    S3VECTORS_LOCAL_DIR=/tmp/s3vectors      persisted per index as <dir>/<bucket>/<index>.npz
+    S3VECTORS_LOCAL_DIR=:memory:            process-local, nothing written
+
+Persisted indices are written on save() and at interpreter exit, and reloaded when
+another process has written a newer file, so a pipeline run and the API can share
+one directory.
+"""
+
+import os
+import json
+import atexit
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+MEMORY_ONLY = ':memory:'
+
+COMPARISON_OPERATORS = {
+    '$gt': lambda value, operand: value > operand,
+    '$gte': lambda value, operand: value >= operand,
+    '$lt': lambda value, operand: value < operand,
+    '$lte': lambda value, operand: value <= operand,
+}
+
+
+def _client_error(code: str, message: str, operation: str) -> ClientError:
+    """Same exception type and error code the real service raises"""
+    return ClientError({'Error': {'Code': code, 'Message': message}}, operation)
+
+
+def _values_equal(value: Any, operand: Any) -> bool:
+    """$eq semantics: an array metadata value matches if any element equals the operand"""
+    if isinstance(value, list):
+        return operand in value
+    return value == operand
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _match_condition(metadata: Dict[str, Any], field: str, condition: Any) -> bool:
+    """Evaluate one field condition ({'$op': operand, ...} or a bare value meaning $eq)"""
+    if not isinstance(condition, dict):
+        condition = {'$eq': condition}
+
+    present = field in metadata
+    value = metadata.get(field)
+
+    for operator, operand in condition.items():
+        if operator == '$eq':
+            matched = present and _values_equal(value, operand)
+        elif operator == '$ne':
+            matched = not (present and _values_equal(value, operand))
+        elif operator == '$in':
+            matched = present and any(_values_equal(value, item) for item in operand)
+        elif operator == '$nin':
+            matched = not (present and any(_values_equal(value, item) for item in operand))
+        elif operator == '$exists':
+            matched = present == bool(operand)
+        elif operator in COMPARISON_OPERATORS:
+            matched = present and _is_number(value) and COMPARISON_OPERATORS[operator](value, operand)
+        else:
+            raise _client_error('ValidationException', f"Unsupported filter operator: {operator}", 'QueryVectors')
+
+        if not matched:
+            return False
+    return True
+
+
+def matches_filter(metadata: Dict[str, Any], metadata_filter: Dict[str, Any]) -> bool:
+    """
+    S3 Vectors metadata filter evaluation.
+
+    Top-level keys are ANDed; $and / $or take lists of nested filters.
+    """
+    for field, condition in metadata_filter.items():
+        if field == '$and':
+            if not all(matches_filter(metadata, sub_filter) for sub_filter in condition):
+                return False
+        elif field == '$or':
+            if not any(matches_filter(metadata, sub_filter) for sub_filter in condition):
+                return False
+        elif not _match_condition(metadata, field, condition):
+            return False
+    return True
+
+
+def _filter_fields(metadata_filter: Dict[str, Any]) -> List[str]:
+    """Metadata keys referenced anywhere in a filter"""
+    fields = []
+    for field, condition in metadata_filter.items():
+        if field in ('$and', '$or'):
+            for sub_filter in condition:
+                fields.extend(_filter_fields(sub_filter))
+        else:
+            fields.append(field)
+    return fields
+
+
+class LocalVectorIndex:
+    """One index: contiguous float32 matrix plus keys, norms and metadata rows"""
+
+    def __init__(self, name: str, dimension: int, distance_metric: str = 'cosine',
+                 data_type: str = 'float32', metadata_configuration: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.dimension = int(dimension)
+        self.distance_metric = distance_metric
+        self.data_type = data_type
+        self.metadata_configuration = metadata_configuration or {}
+        self.keys: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.metadata: List[Dict[str, Any]] = []
+        self.data = np.zeros((0, self.dimension), dtype=np.float32)
+        self.norms = np.zeros(0, dtype=np.float32)
+
+    @property
+    def count(self) -> int:
+        return len(self.keys)
+
+    def _reserve(self, rows: int):
+        """Grow the backing arrays geometrically so repeated puts stay amortized O(n)"""
+        if rows <= self.data.shape[0]:
+            return
+        capacity = max(rows, self.data.shape[0] * 2, 64)
+        data = np.zeros((capacity, self.dimension), dtype=np.float32)
+        norms = np.zeros(capacity, dtype=np.float32)
+        data[:self.count] = self.data[:self.count]
+        norms[:self.count] = self.norms[:self.count]
+        self.data, self.norms = data, norms
+
+    def put(self, key: str, vector: np.ndarray, metadata: Dict[str, Any]):
+        row = self.rows.get(key)
+        if row is None:
+            row = self.count
+            self._reserve(row + 1)
+            self.rows[key] = row
+            self.keys.append(key)
+            self.metadata.append(metadata)
+        else:
+            self.metadata[row] = metadata
+        self.data[row] = vector
+        self.norms[row] = np.linalg.norm(vector)
+
+    def delete(self, key: str):
+        """Swap-remove so the live rows stay contiguous"""
+        row = self.rows.pop(key, None)
+        if row is None:
+            return
+        last = self.count - 1
+        if row != last:
+            moved_key = self.keys[last]
+            self.keys[row] = moved_key
+            self.metadata[row] = self.metadata[last]
+            self.data[row] = self.data[last]
+            self.norms[row] = self.norms[last]
+            self.rows[moved_key] = row
+        self.keys.pop()
+        self.metadata.pop()
+
+    def distances(self, query: np.ndarray) -> np.ndarray:
+        """Distances from query to every live row (cosine distance = 1 - cosine similarity)"""
+        data = self.data[:self.count]
+        if self.distance_metric == 'euclidean':
+            return np.linalg.norm(data - query, axis=1)
+        denominator = self.norms[:self.count] * np.linalg.norm(query)
+        similarity = np.divide(data @ query, denominator, out=np.zeros(self.count, dtype=np.float32),
+                               where=denominator > 0)
+        return np.clip(1.0 - similarity, 0.0, 2.0)
+
+    def describe(self, vector_bucket_name: str) -> Dict[str, Any]:
+        return {
+            'vectorBucketName': vector_bucket_name,
+            'indexName': self.name,
+            'dataType': self.data_type,
+            'dimension': self.dimension,
+            'distanceMetric': self.distance_metric,
+            'metadataConfiguration': self.metadata_configuration,
+        }
+
+    def save(self, path: str):
+        """Atomic write so a concurrent reader never sees a partial file"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        config = {
+            'dimension': self.dimension,
+            'distanceMetric': self.distance_metric,
+            'dataType': self.data_type,
+            'metadataConfiguration': self.metadata_configuration,
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, data=self.data[:self.count], keys=np.array(self.keys, dtype=str),
+                     metadata=np.array(json.dumps(self.metadata)), config=np.array(json.dumps(config)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, name: str, path: str) -> 'LocalVectorIndex':
+        with np.load(path, allow_pickle=False) as archive:
+            config = json.loads(str(archive['config']))
+            index = cls(name, config['dimension'], config['distanceMetric'], config['dataType'],
+                        config['metadataConfiguration'])
+            data = archive['data'].astype(np.float32)
+            index.keys = [str(key) for key in archive['keys']]
+            index.metadata = json.loads(str(archive['metadata']))
+        index.rows = {key: row for row, key in enumerate(index.keys)}
+        index.data = data.reshape(len(index.keys), index.dimension)
+        index.norms = np.linalg.norm(index.data, axis=1).astype(np.float32)
+        return index
+
+
+class LocalS3VectorsClient:
+    """
+    Drop-in for boto3.client('s3vectors'). Queries are exact (brute force) rather than
+    approximate, which makes results deterministic for tests and gives an upper bound
+    on recall when benchmarking.
+    """
+
+    def __init__(self, persist_dir: Optional[str] = None):
+        self.persist_dir = None if persist_dir in (None, '', MEMORY_ONLY) else persist_dir
+        self.lock = threading.RLock()
+        self.indexes: Dict[tuple, LocalVectorIndex] = {}
+        self.loaded_mtimes: Dict[tuple, float] = {}
+        self.dirty = set()
+        if self.persist_dir:
+            atexit.register(self.save)
+        logger.info(f"Local S3 Vectors stand-in initialized ({self.persist_dir or 'in-memory'})")
+
+    def _index_path(self, bucket: str, index_name: str) -> str:
+        return os.path.join(self.persist_dir, bucket or '_default', f"{index_name}.npz")
+
+    def _find(self, bucket: str, index_name: str) -> Optional[LocalVectorIndex]:
+        """Index by name (or None), reloading it from disk if another process wrote a newer copy"""
+        index_id = (bucket, index_name)
+        if self.persist_dir and index_id not in self.dirty:
+            path = self._index_path(bucket, index_name)
+            if os.path.exists(path):
+                mtime = os.path.getmtime(path)
+                if self.loaded_mtimes.get(index_id) != mtime:
+                    self.indexes[index_id] = LocalVectorIndex.load(index_name, path)
+                    self.loaded_mtimes[index_id] = mtime
+            elif index_id in self.loaded_mtimes:
+                # Deleted by another process
+                self.indexes.pop(index_id, None)
+                self.loaded_mtimes.pop(index_id)
+
+        return self.indexes.get(index_id)
+
+    def _get(self, bucket: str, index_name: str, operation: str) -> LocalVectorIndex:
+        index = self._find(bucket, index_name)
+        if index is None:
+            raise _client_error('NotFoundException', f"Index not found: {index_name}", operation)
+        return index
+
+    def save(self):
+        """Write every modified index to S3VECTORS_LOCAL_DIR (no-op when in-memory)"""
+        if not self.persist_dir:
+            return
+        with self.lock:
+            for index_id in list(self.dirty):
+                path = self._index_path(*index_id)
+                if index_id in self.indexes:
+                    self.indexes[index_id].save(path)
+                    self.loaded_mtimes[index_id] = os.path.getmtime(path)
+                elif os.path.exists(path):
+                    os.remove(path)
+                    self.loaded_mtimes.pop(index_id, None)
+                self.dirty.discard(index_id)
+
+    def _to_vector(self, index: LocalVectorIndex, data: Dict[str, Any], operation: str) -> np.ndarray:
+        vector = np.asarray(data.get('float32', []), dtype=np.float32)
+        if vector.shape != (index.dimension,):
+            raise _client_error('ValidationException',
+                                f"Vector dimension {vector.size} does not match index dimension {index.dimension}",
+                                operation)
+        return vector
+
+    # Index management
+
+    def create_vector_bucket(self, vectorBucketName: str, **kwargs) -> Dict[str, Any]:
+        return {}
+
+    def create_index(self, vectorBucketName: str, indexName: str, dimension: int, dataType: str = 'float32',
+                     distanceMetric: str = 'cosine', metadataConfiguration: Optional[Dict[str, Any]] = None,
+                     **kwargs) -> Dict[str, Any]:
+        with self.lock:
+            if self._find(vectorBucketName, indexName) is not None:
+                raise _client_error('ConflictException', f"Index already exists: {indexName}", 'CreateIndex')
+            if distanceMetric not in ('cosine', 'euclidean'):
+                raise _client_error('ValidationException', f"Unsupported distance metric: {distanceMetric}",
+                                    'CreateIndex')
+            index_id = (vectorBucketName, indexName)
+            self.indexes[index_id] = LocalVectorIndex(indexName, dimension, distanceMetric, dataType,
+                                                      metadataConfiguration)
+            self.dirty.add(index_id)
+        return {}
+
+    def get_index(self, vectorBucketName: str, indexName: str, **kwargs) -> Dict[str, Any]:
+        with self.lock:
+            return {'index': self._get(vectorBucketName, indexName, 'GetIndex').describe(vectorBucketName)}
+
+    def list_indexes(self, vectorBucketName: str, **kwargs) -> Dict[str, Any]:
+        with self.lock:
+            names = {name for bucket, name in self.indexes if bucket == vectorBucketName}
+            if self.persist_dir:
+                bucket_dir = os.path.join(self.persist_dir, vectorBucketName or '_default')
+                if os.path.isdir(bucket_dir):
+                    names.update(f[:-len('.npz')] for f in os.listdir(bucket_dir) if f.endswith('.npz'))
+            return {'indexes': [{'vectorBucketName': vectorBucketName, 'indexName': name} for name in sorted(names)]}
+
+    def delete_index(self, vectorBucketName: str, indexName: str, **kwargs) -> Dict[str, Any]:
+        with self.lock:
+            self._get(vectorBucketName, indexName, 'DeleteIndex')
+            index_id = (vectorBucketName, indexName)
+            del self.indexes[index_id]
+            self.dirty.add(index_id)
+        return {}
+
+    # Vector operations
+
+    def put_vectors(self, vectorBucketName: str, indexName: str, vectors: List[Dict[str, Any]],
+                    **kwargs) -> Dict[str, Any]:
+        with self.lock:
+            index = self._get(vectorBucketName, indexName, 'PutVectors')
+            # Validate the whole batch before writing any of it, as the service does
+            records = [(v['key'], self._to_vector(index, v['data'], 'PutVectors'), dict(v.get('metadata') or {}))
+                       for v in vectors]
+            for key, vector, metadata in records:
+                index.put(key, vector, metadata)
+            self.dirty.add((vectorBucketName, indexName))
+        return {}
+
+    def delete_vectors(self, vectorBucketName: str, indexName: str, keys: List[str], **kwargs) -> Dict[str, Any]:
+        with self.lock:
+            index = self._get(vectorBucketName, indexName, 'DeleteVectors')
+            for key in keys:
+                index.delete(key)
+            self.dirty.add((vectorBucketName, indexName))
+        return {}
+
+    def _vector_record(self, index: LocalVectorIndex, row: int, return_data: bool,
+                       return_metadata: bool) -> Dict[str, Any]:
+        record = {'key': index.keys[row]}
+        if return_data:
+            record['data'] = {'float32': index.data[row].tolist()}
+        if return_metadata:
+            record['metadata'] = dict(index.metadata[row])
+        return record
+
+    def get_vectors(self, vectorBucketName: str, indexName: str, keys: List[str], returnData: bool = False,
+                    returnMetadata: bool = False, **kwargs) -> Dict[str, Any]:
+        with self.lock:
+            index = self._get(vectorBucketName, indexName, 'GetVectors')
+            return {'vectors': [self._vector_record(index, index.rows[key], returnData, returnMetadata)
+                                for key in keys if key in index.rows]}
+
+    def list_vectors(self, vectorBucketName: str, indexName: str, maxResults: int = 500,
+                     nextToken: Optional[str] = None, returnData: bool = False, returnMetadata: bool = False,
+                     segmentCount: int = 1, segmentIndex: int = 0, **kwargs) -> Dict[str, Any]:
+        with self.lock:
+            index = self._get(vectorBucketName, indexName, 'ListVectors')
+            # Key order is stable between calls, so the token is just an offset into this segment
+            segment = [row for row in sorted(range(index.count), key=lambda r: index.keys[r])
+                       if row % segmentCount == segmentIndex]
+            start = int(nextToken or 0)
+            page = segment[start:start + maxResults]
+            response = {'vectors': [self._vector_record(index, row, returnData, returnMetadata) for row in page]}
+            if start + maxResults < len(segment):
+                response['nextToken'] = str(start + maxResults)
+            return response
+
+    def query_vectors(self, vectorBucketName: str, indexName: str, queryVector: Dict[str, Any], topK: int,
+                      filter: Optional[Dict[str, Any]] = None, returnMetadata: bool = False,
+                      returnDistance: bool = False, **kwargs) -> Dict[str, Any]:
+        with self.lock:
+            index = self._get(vectorBucketName, indexName, 'QueryVectors')
+            query = self._to_vector(index, queryVector, 'QueryVectors')
+            if topK < 1:
+                raise _client_error('ValidationException', "topK must be at least 1", 'QueryVectors')
+
+            distances = index.distances(query)
+            if filter:
+                non_filterable = set(index.metadata_configuration.get('nonFilterableMetadataKeys', []))
+                rejected = non_filterable.intersection(_filter_fields(filter))
+                if rejected:
+                    raise _client_error('ValidationException',
+                                        f"Filter uses non-filterable metadata keys: {sorted(rejected)}",
+                                        'QueryVectors')
+                candidates = np.array([row for row in range(index.count)
+                                       if matches_filter(index.metadata[row], filter)], dtype=np.int64)
+            else:
+                candidates = np.arange(index.count)
+
+            if candidates.size > topK:
+                nearest = candidates[np.argpartition(distances[candidates], topK - 1)[:topK]]
+            else:
+                nearest = candidates
+            nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+
+            results = []
+            for row in nearest:
+                record = self._vector_record(index, row, False, returnMetadata)
+                if returnDistance:
+                    record['distance'] = float(distances[row])
+                results.append(record)
+            return {'vectors': results, 'distanceMetric': index.distance_metric}
+
+
+_local_clients: Dict[str, LocalS3VectorsClient] = {}
+_local_clients_lock = threading.Lock()
+
+
+def get_local_client(persist_dir: Optional[str] = None) -> LocalS3VectorsClient:
+    """Process-wide stand-in per directory, so every call site sees the same indices"""
+    persist_dir = persist_dir or os.getenv('S3VECTORS_LOCAL_DIR', MEMORY_ONLY)
+    with _local_clients_lock:
+        if persist_dir not in _local_clients:
+            _local_clients[persist_dir] = LocalS3VectorsClient(persist_dir)
+        return _local_clients[persist_dir]
+
+
+def create_s3vectors_client(**kwargs):
+    """S3 Vectors client, or the stand-in when S3VECTORS_LOCAL_DIR is set.
+
+    kwargs go to boto3.client('s3vectors', ...) unchanged. The stand-in is in-process,
+    so region, endpoint and retry Config have nothing to apply to and are ignored.
+    """
+    local_dir = os.getenv('S3VECTORS_LOCAL_DIR')
+    if local_dir:
+        if kwargs:
+            logger.info(f"Local S3 Vectors stand-in ({local_dir}) ignores client options: {sorted(kwargs)}")
+        return get_local_client(local_dir)
+
+    import boto3
+    return boto3.client('s3vectors', **kwargs)
@@ -23,6 +23,8 @@ from datetime import datetime
 from typing import List, Dict, Set
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from local_s3vectors import create_s3vectors_client
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -31,7 +33,7 @@ class S3VectorsBackfillOrchestrator:
     def __init__(self):
         region = os.environ.get('AWS_REGION', os.environ.get('AWS_DEFAULT_REGION', 'us-west-2'))
         self.s3_client = boto3.client('s3', region_name=region)
-        self.s3vectors_client = boto3.client('s3vectors', region_name=region)
+        self.s3vectors_client = create_s3vectors_client(region_name=region)
         self.stepfunctions_client = boto3.client('stepfunctions', region_name=region)
 
         # Configuration (UPDATED FOR COHERE/COSMOS ARCHITECTURE)